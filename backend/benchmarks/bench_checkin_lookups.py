@@ -0,0 +1,80 @@
+"""
+Critical path of the entitlement check and card scan.
+
+Runs the real router handlers twice: once with gather_lookups replaced by a
+sequential stand-in (the previous behaviour) and once as shipped. Collections
+get different latencies so the concurrent path should approach the slowest
+single query rather than the sum.
+
+    cd backend && python -m benchmarks.bench_checkin_lookups
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import routers.checkin as checkin_router
+import routers.entitlements as entitlements_router
+from benchmarks.latency_db import LatencyDB
+from models.checkin import CheckInCreate
+from services.customer_cache import customerCardCache
+from utils.concurrency import gather_lookups
+
+
+async def sequential_lookups(*lookups):
+    return [await lookup if lookup is not None else None for lookup in lookups]
+
+
+def seed(db: LatencyDB) -> None:
+    db.customers.docs.append({
+        "customer_id": "cust-1",
+        "card_number": "CARD-1",
+        "child_name": "Adam",
+        "waiver_accepted": True,
+        "guardian": {"name": "Sara", "phone": "0790000000"},
+    })
+    # Walk-in child: no subscription or pack, so every candidate lookup runs
+
+
+async def entitlement_check(db):
+    await entitlements_router.check_entitlement(child_id="child-1", area="DAYCARE", user={}, db=db)
+
+
+async def card_scan(db):
+    customerCardCache.clear()
+    await checkin_router.scan_card(CheckInCreate(card_number="CARD-1", branch_id="branch-1"), user={}, db=db)
+
+
+async def measure(label, fn, db, runs):
+    timings = []
+    for _ in range(runs):
+        db.round_trips = 0
+        started = time.perf_counter()
+        await fn(db)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    print(f"{label:<34} round_trips={db.round_trips:<3} p50={timings[len(timings) // 2]:.1f}ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    latencies = {"customers": 3, "checkin_sessions": 4, "subscriptions": 8, "visit_packs": 6}
+    db = LatencyDB(per_collection_ms=latencies)
+    seed(db)
+    print("per-collection latency (ms):", latencies)
+
+    for mode, helper in (("sequential", sequential_lookups), ("gather_lookups", gather_lookups)):
+        checkin_router.gather_lookups = helper
+        entitlements_router.gather_lookups = helper
+        await measure(f"check_entitlement/{mode}", entitlement_check, db, args.runs)
+        await measure(f"scan_card/{mode}", card_scan, db, args.runs)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
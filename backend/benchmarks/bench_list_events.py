@@ -0,0 +1,94 @@
+"""
+Month calendar view: GET /events for 200 events with heavy bookings.
+
+Compares the previous per-event registration scan with the single $group
+aggregation now used by list_events.
+
+    cd backend && python -m benchmarks.bench_list_events --latency-ms 2
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.latency_db import LatencyDB
+from routers.events import build_event_response, list_events
+
+
+def seed(db: LatencyDB, events: int, bookings_per_event: int) -> None:
+    start = date(2026, 11, 1)
+    for i in range(events):
+        event_id = f"evt-{i}"
+        db.events.docs.append({
+            "id": event_id,
+            "title": f"Birthday {i}",
+            "type": "birthday",
+            "branch_id": "branch-1",
+            "date": (start + timedelta(days=i % 30)).isoformat(),
+            "start_time": "10:00",
+            "end_time": "12:00",
+            "capacity": bookings_per_event + 10,
+            "price": 50.0,
+            "status": "scheduled",
+            "booked_count": bookings_per_event,
+        })
+        for b in range(bookings_per_event):
+            db.event_registrations.docs.append({
+                "id": f"{event_id}-reg-{b}",
+                "event_id": event_id,
+                "customer_id": f"cust-{b}",
+                "status": "booked",
+            })
+
+
+async def per_event_scan(db):
+    """Previous behaviour: one registration query per listed event."""
+    events = await db.events.find({"branch_id": "branch-1"}).sort("date", 1).to_list(200)
+    responses = []
+    for event in events:
+        event["date"] = date.fromisoformat(event["date"])
+        bookings = await db.event_registrations.find(
+            {"event_id": event["id"], "status": "booked"}
+        ).to_list(500)
+        responses.append(await build_event_response(db, event, [b["customer_id"] for b in bookings]))
+    return responses
+
+
+async def grouped(db):
+    return await list_events(branch_id="branch-1", event_date=None, db=db, user={"role": "ADMIN"})
+
+
+async def measure(label, fn, db, runs):
+    timings = []
+    for _ in range(runs):
+        db.round_trips = 0
+        started = time.perf_counter()
+        responses = await fn(db)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    print(
+        f"{label:<16} events={len(responses):<4} round_trips={db.round_trips:<4} "
+        f"p50={timings[len(timings) // 2]:.1f}ms max={timings[-1]:.1f}ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--bookings", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    db = LatencyDB(latency_ms=args.latency_ms)
+    seed(db, args.events, args.bookings)
+    await measure("per-event scan", per_event_scan, db, args.runs)
+    await measure("$group", grouped, db, args.runs)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+"""
+Check-in latency during a login storm (every staff tablet logging in at once).
+
+Runs a steady stream of check-ins through the real handler while --logins
+logins, spread over --storm-ms, hit the real login handler. It runs twice:
+once with bcrypt inline on the event loop (the previous behaviour) and once on
+the password service's thread pool. Reports check-in p50/p99/max and how long
+the whole run took.
+
+    cd backend && python -m benchmarks.bench_login_storm
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import bcrypt
+from fastapi import HTTPException
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import routers.auth as auth_router
+import routers.checkin as checkin_router
+from benchmarks.bench_pool import USER, customers
+from benchmarks.latency_db import LatencyDB
+from models.checkin import CheckInCreate
+from models.user import UserLogin
+from services.customer_cache import customerCardCache
+from services.password_service import PasswordService
+
+PASSWORD = "storm-password"
+
+
+async def run_inline(fn, *args):
+    return fn(*args)
+
+
+def seed(db: LatencyDB, logins: int, checkins: int, rounds: int) -> None:
+    password_hash = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(rounds)).decode()
+    db.users.docs.extend(
+        {"user_id": f"staff-{i}", "email": f"staff{i}@bench.local", "password_hash": password_hash, "role": "RECEPTION"}
+        for i in range(logins)
+    )
+    db.customers.docs.extend(customers(checkins))
+
+
+async def login(db, i, delay_s):
+    await asyncio.sleep(delay_s)
+    request = SimpleNamespace(client=SimpleNamespace(host=f"10.0.{i // 250}.{i % 250}"), headers={})
+    try:
+        await auth_router.login(UserLogin(email=f"staff{i}@bench.local", password=PASSWORD), request=request, db=db)
+        return True
+    except HTTPException:
+        return False
+
+
+async def checkin_stream(db, count: int, interval_s: float) -> list[float]:
+    latencies = []
+    for i in range(count):
+        started = time.perf_counter()
+        await checkin_router.check_in(CheckInCreate(card_number=f"BENCH-{i:05d}", branch_id="branch-1"), user=USER, db=db)
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(interval_s)
+    return sorted(latencies)
+
+
+async def scenario(label, service, args):
+    auth_router.passwordService = service
+    customerCardCache.clear()
+    db = LatencyDB(latency_ms=args.latency_ms)
+    seed(db, args.logins, args.checkins, await service.rounds())
+
+    started = time.perf_counter()
+    spacing = args.storm_ms / 1000 / args.logins
+    storm = asyncio.gather(*(login(db, i, i * spacing) for i in range(args.logins)))
+    latencies = await checkin_stream(db, args.checkins, args.interval_ms / 1000)
+    results = await storm
+    elapsed = time.perf_counter() - started
+
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)]
+    print(
+        f"{label:<10} check-in p50={p50:7.1f}ms p99={p99:7.1f}ms max={latencies[-1]:7.1f}ms  "
+        f"logins ok={sum(results)}/{len(results)}  wall={elapsed:.2f}s"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--storm-ms", type=float, default=2000.0)
+    parser.add_argument("--checkins", type=int, default=100)
+    parser.add_argument("--interval-ms", type=float, default=10.0)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--rounds", default="12")
+    args = parser.parse_args()
+
+    inline = PasswordService(rounds=args.rounds, max_pending=args.logins)
+    inline._run = run_inline
+    pooled = PasswordService(rounds=args.rounds, max_pending=args.logins)
+    print(f"bcrypt cost {await pooled.rounds()}, {pooled.workers} hash workers, {args.logins} concurrent logins")
+
+    await scenario("inline", inline, args)
+    await scenario("executor", pooled, args)
+    pooled.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,103 @@
+"""
+Check-in throughput at different connection pool sizes.
+
+Fires --concurrency check-ins at once through the real check-in handler and
+reports throughput and latency percentiles for each pool size. By default the
+pool is simulated (LatencyDB caps concurrent round trips at the pool size);
+with --mongo-url each size gets its own Motor client with that maxPoolSize,
+against a scratch database that is dropped afterwards.
+
+    cd backend && python -m benchmarks.bench_pool
+    cd backend && python -m benchmarks.bench_pool --mongo-url mongodb://localhost:27017
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import routers.checkin as checkin_router
+from benchmarks.latency_db import LatencyDB
+from models.checkin import CheckInCreate
+from services.customer_cache import customerCardCache
+
+USER = {"user_id": "bench-staff", "role": "RECEPTION", "branch_id": "branch-1"}
+
+
+def customers(count: int) -> list[dict]:
+    return [
+        {
+            "customer_id": f"bench-cust-{i}",
+            "card_number": f"BENCH-{i:05d}",
+            "child_name": f"Child {i}",
+            "waiver_accepted": True,
+            "guardian": {"name": f"Guardian {i}", "phone": "0790000000"},
+        }
+        for i in range(count)
+    ]
+
+
+async def check_in_storm(db, concurrency: int) -> tuple[float, list[float]]:
+    customerCardCache.clear()
+
+    async def one(i):
+        started = time.perf_counter()
+        await checkin_router.check_in(
+            CheckInCreate(card_number=f"BENCH-{i:05d}", branch_id="branch-1"), user=USER, db=db,
+        )
+        return (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(one(i) for i in range(concurrency)))
+    return time.perf_counter() - started, sorted(latencies)
+
+
+def report(pool_size: int, elapsed: float, latencies: list[float]) -> None:
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"maxPoolSize={pool_size:<4} {len(latencies) / elapsed:8.0f} check-ins/s  p50={p50:7.1f}ms  p95={p95:7.1f}ms")
+
+
+async def run_simulated(pool_sizes, concurrency, latency_ms):
+    print(f"simulated pool, {latency_ms}ms per round trip, {concurrency} concurrent check-ins")
+    for size in pool_sizes:
+        db = LatencyDB(latency_ms=latency_ms, pool_size=size)
+        db.customers.docs.extend(customers(concurrency))
+        report(size, *await check_in_storm(db, concurrency))
+
+
+async def run_mongo(pool_sizes, concurrency, mongo_url):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    print(f"{mongo_url}, {concurrency} concurrent check-ins")
+    for size in pool_sizes:
+        client = AsyncIOMotorClient(mongo_url, maxPoolSize=size, serverSelectionTimeoutMS=5000)
+        db = client["bench_pool"]
+        try:
+            await client.drop_database("bench_pool")
+            await db.customers.insert_many(customers(concurrency))
+            report(size, *await check_in_storm(db, concurrency))
+        finally:
+            await client.drop_database("bench_pool")
+            client.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pool-sizes", default="1,5,10,25,50,100")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--mongo-url")
+    args = parser.parse_args()
+
+    pool_sizes = [int(size) for size in args.pool_sizes.split(",")]
+    if args.mongo_url:
+        await run_mongo(pool_sizes, args.concurrency, args.mongo_url)
+    else:
+        await run_simulated(pool_sizes, args.concurrency, args.latency_ms)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""
+Cold-start cost: importing the app and creating indexes.
+
+Imports `server` in --runs fresh interpreters and reports the median. Index
+creation then runs three ways: one awaited create_index per index (the
+previous startup), one createIndexes per collection with all collections
+concurrently (utils.indexes.create_indexes), and skipped (SKIP_INDEX_CREATION).
+By default every command costs --command-ms on LatencyDB; with --mongo-url the
+indexes are built in a scratch database that is dropped afterwards.
+
+    cd backend && python -m benchmarks.bench_startup
+    cd backend && python -m benchmarks.bench_startup --mongo-url mongodb://localhost:27017
+"""
+import argparse
+import asyncio
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+sys.path.append(str(BACKEND))
+
+from benchmarks.latency_db import LatencyDB
+from utils.indexes import GUARDED_INDEXES, create_indexes, index_specs
+
+IMPORT_PROBE = "import time; started = time.perf_counter(); import server; print(time.perf_counter() - started)"
+
+
+def import_times(runs: int) -> list[float]:
+    times = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE], cwd=BACKEND, capture_output=True, text=True, check=True,
+        ).stdout
+        times.append(float(out.strip().splitlines()[-1]) * 1000)
+    return times
+
+
+async def create_sequentially(db) -> None:
+    for name, models in index_specs().items():
+        for model in models:
+            await db[name].create_indexes([model])
+    for name, model in GUARDED_INDEXES:
+        await db[name].create_indexes([model])
+
+
+async def timed(label, make_db, create, cleanup=None) -> None:
+    db = await make_db()
+    started = time.perf_counter()
+    if create is not None:
+        await create(db)
+    elapsed = (time.perf_counter() - started) * 1000
+    trips = f"  round trips={db.round_trips}" if isinstance(db, LatencyDB) else ""
+    print(f"{label:<12} {elapsed:8.1f}ms{trips}")
+    if cleanup is not None:
+        await cleanup(db)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--command-ms", type=float, default=15.0)
+    parser.add_argument("--mongo-url", default=None)
+    args = parser.parse_args()
+
+    times = import_times(args.runs)
+    print(f"import server: median {statistics.median(times):.1f}ms  min {min(times):.1f}ms  ({args.runs} runs)")
+
+    if args.mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        client = AsyncIOMotorClient(args.mongo_url)
+
+        async def make_db():
+            await client.drop_database("bench_startup")
+            return client["bench_startup"]
+
+        async def cleanup(db):
+            await client.drop_database("bench_startup")
+    else:
+        async def make_db():
+            return LatencyDB(latency_ms=args.command_ms)
+
+        cleanup = None
+
+    await timed("sequential", make_db, create_sequentially, cleanup)
+    await timed("concurrent", make_db, create_indexes, cleanup)
+    await timed("skipped", make_db, None, cleanup)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,349 @@
+"""
+End-to-end API benchmark against a local MongoDB.
+
+Drops and re-seeds a scratch database (--db, whose name must contain "bench"
+unless --yes-drop is given) with load data (services.load_data) at the given
+scale, applies migrations, then boots the real FastAPI app in-process (its
+lifespan included) behind httpx's ASGI transport and drives four workloads at
+once:
+
+  rush       --rush check-ins from --desks front desks, then checks a third out
+  heartbeat  --devices scanners pinging every --heartbeat-ms
+  pos        --orders POS orders (create + pay) from --registers tills
+  dashboard  --pollers dashboards polling active check-ins, the daily summary
+             and attendance KPIs every --poll-ms
+
+Heartbeats and polling run until the rush and POS workloads finish. Reports
+request count, errors, throughput and p50/p95/p99/max per endpoint, and writes
+them with the run's parameters to JSON (--out) for comparison (--compare).
+
+    cd backend && python -m benchmarks.e2e --mongo-url mongodb://localhost:27017
+    cd backend && python -m benchmarks.e2e --customers 20000 --sessions 400000 --compare benchmarks/results/before.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+BACKEND = Path(__file__).resolve().parents[1]
+sys.path.append(str(BACKEND))
+
+RESULTS_DIR = BACKEND / "benchmarks" / "results"
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class Recorder:
+    """Latency samples and status codes per endpoint label."""
+
+    def __init__(self):
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, Counter] = defaultdict(Counter)
+
+    async def request(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = response.status_code
+        except Exception as exc:
+            response, status = None, type(exc).__name__
+        self.samples[label].append((time.perf_counter() - started) * 1000)
+        self.statuses[label][str(status)] += 1
+        return response
+
+    def summary(self, elapsed_s: float) -> dict:
+        endpoints = {}
+        for label, samples in sorted(self.samples.items()):
+            ordered = sorted(samples)
+            statuses = self.statuses[label]
+            endpoints[label] = {
+                "requests": len(ordered),
+                "errors": sum(n for code, n in statuses.items() if not code.startswith(("2", "3"))),
+                "throughput_rps": round(len(ordered) / elapsed_s, 2) if elapsed_s else 0.0,
+                "p50_ms": round(percentile(ordered, 50), 2),
+                "p95_ms": round(percentile(ordered, 95), 2),
+                "p99_ms": round(percentile(ordered, 99), 2),
+                "max_ms": round(ordered[-1], 2),
+                "status_codes": dict(statuses),
+            }
+        return endpoints
+
+
+class Workloads:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, args, fixtures: dict):
+        self.client = client
+        self.recorder = recorder
+        self.args = args
+        self.fixtures = fixtures
+        self.rng = random.Random(args.seed)
+        self.done = asyncio.Event()
+
+    def _auth(self, token: str) -> dict:
+        return {"Authorization": f"Bearer {token}"}
+
+    async def rush(self) -> None:
+        desks = asyncio.Semaphore(self.args.desks)
+        headers = self._auth(self.fixtures["desk_token"])
+        session_ids = []
+
+        async def check_in(card: str, branch_id: str):
+            async with desks:
+                response = await self.recorder.request(
+                    self.client, "POST /checkin", "POST", "/api/checkin",
+                    json={"card_number": card, "branch_id": branch_id}, headers=headers,
+                )
+                if response is not None and response.status_code == 201:
+                    session_ids.append(response.json()["session_id"])
+
+        await asyncio.gather(*(check_in(card, branch) for card, branch in self.fixtures["rush_cards"]))
+
+        async def check_out(session_id: str):
+            async with desks:
+                await self.recorder.request(
+                    self.client, "POST /checkin/{id}/checkout", "POST", f"/api/checkin/{session_id}/checkout",
+                    headers=headers,
+                )
+
+        await asyncio.gather(*(check_out(s) for s in session_ids[: len(session_ids) // 3]))
+
+    async def pos(self) -> None:
+        tills = asyncio.Semaphore(self.args.registers)
+        headers = self._auth(self.fixtures["desk_token"])
+        products = self.fixtures["products"]
+        baskets = [
+            [{"product_id": p["product_id"], "quantity": self.rng.randint(1, 2)}
+             for p in self.rng.sample(products, self.rng.randint(1, 3))]
+            for _ in range(self.args.orders)
+        ]
+
+        async def sell(items: list):
+            async with tills:
+                response = await self.recorder.request(
+                    self.client, "POST /orders", "POST", "/api/orders",
+                    json={"items": items, "payment_method": "CASH"}, headers=headers,
+                )
+                if response is None or response.status_code != 201:
+                    return
+                order = response.json()
+                await self.recorder.request(
+                    self.client, "POST /orders/{id}/pay", "POST", f"/api/orders/{order['order_id']}/pay",
+                    json={"order_id": order["order_id"], "method": "CASH", "amount": order["total_amount"]},
+                    headers=headers,
+                )
+
+        await asyncio.gather(*(sell(items) for items in baskets))
+
+    async def heartbeat(self) -> None:
+        async def scanner(device_id: str, offset: float):
+            await asyncio.sleep(offset)
+            while not self.done.is_set():
+                await self.recorder.request(
+                    self.client, "POST /devices/ping", "POST", "/api/devices/ping", json={"id": device_id},
+                )
+                await self._sleep(self.args.heartbeat_ms / 1000)
+
+        interval = self.args.heartbeat_ms / 1000
+        await asyncio.gather(*(
+            scanner(device_id, interval * i / max(1, len(self.fixtures["devices"])))
+            for i, device_id in enumerate(self.fixtures["devices"])
+        ))
+
+    async def dashboard(self) -> None:
+        headers = self._auth(self.fixtures["admin_token"])
+        branch_id = self.fixtures["branch_ids"][0]
+
+        async def poller(offset: float):
+            await asyncio.sleep(offset)
+            while not self.done.is_set():
+                await asyncio.gather(
+                    self.recorder.request(self.client, "GET /checkin/active", "GET", "/api/checkin/active",
+                                          params={"branch_id": branch_id}, headers=headers),
+                    self.recorder.request(self.client, "GET /reports/daily-summary", "GET",
+                                          "/api/reports/daily-summary", headers=headers),
+                    self.recorder.request(self.client, "GET /analytics/attendance", "GET",
+                                          "/api/analytics/attendance", headers=headers),
+                )
+                await self._sleep(self.args.poll_ms / 1000)
+
+        interval = self.args.poll_ms / 1000
+        await asyncio.gather(*(poller(interval * i / self.args.pollers) for i in range(self.args.pollers)))
+
+    async def _sleep(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self.done.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def run(self) -> float:
+        started = time.perf_counter()
+        background = [asyncio.create_task(self.heartbeat()), asyncio.create_task(self.dashboard())]
+        await asyncio.gather(self.rush(), self.pos())
+        self.done.set()
+        await asyncio.gather(*background)
+        return time.perf_counter() - started
+
+
+async def seed(args) -> dict:
+    """Fresh scratch database with load data and indexes; returns workload fixtures."""
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    from middleware.auth import create_token
+    from migrations.runner import MigrationRunner
+    from services.load_data import LoadProfile, generate
+
+    client = AsyncIOMotorClient(args.mongo_url)
+    await client.drop_database(args.db)
+    db = client[args.db]
+
+    profile = LoadProfile(branches=args.branches, customers=args.customers, sessions=args.sessions, seed=args.seed)
+    started = time.perf_counter()
+    counts = await generate(db, profile, log=lambda _: None)
+    await MigrationRunner().up(db, log=lambda _: None)
+    print(f"seeded {sum(counts.values())} documents in {time.perf_counter() - started:.1f}s")
+
+    rng = random.Random(args.seed)
+    busy = set(await db.checkin_sessions.distinct("customer_id", {"status": "CHECKED_IN"}))
+    customers = await db.customers.find(
+        {"customer_id": {"$nin": list(busy)}}, {"_id": 0, "card_number": 1, "branch_id": 1},
+    ).to_list(None)
+    rush = rng.sample(customers, min(args.rush, len(customers)))
+    products = await db.products.find({}, {"_id": 0, "product_id": 1}).to_list(None)
+    branch_ids = [b["branch_id"] for b in await db.branches.find({}, {"_id": 0, "branch_id": 1}).to_list(None)]
+
+    devices = [f"bench-scanner-{i:03d}" for i in range(args.devices)]
+    client.close()
+
+    return {
+        "counts": counts,
+        "rush_cards": [(c["card_number"], c["branch_id"]) for c in rush],
+        "products": products,
+        "branch_ids": branch_ids,
+        "devices": devices,
+        "desk_token": create_token("bench-desk", "desk@bench.local", "RECEPTION"),
+        "admin_token": create_token("bench-admin", "admin@bench.local", "ADMIN"),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def print_table(endpoints: dict, previous: dict = None) -> None:
+    print(f"{'endpoint':<30} {'req':>6} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for label, row in endpoints.items():
+        line = (f"{label:<30} {row['requests']:>6} {row['errors']:>5} {row['throughput_rps']:>8.1f} "
+                f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}")
+        before = (previous or {}).get(label)
+        if before and before["p99_ms"]:
+            change = (row["p99_ms"] - before["p99_ms"]) / before["p99_ms"] * 100
+            line += f"   p99 {change:+.0f}% vs {before['p99_ms']:.1f}"
+        print(line)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", default=os.environ.get("BENCH_MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="daycare_e2e_bench")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database afterwards")
+    parser.add_argument("--yes-drop", action="store_true",
+                        help="allow dropping a --db whose name does not contain 'bench'")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--branches", type=int, default=3)
+    parser.add_argument("--customers", type=int, default=5000)
+    parser.add_argument("--sessions", type=int, default=50000)
+    parser.add_argument("--rush", type=int, default=400)
+    parser.add_argument("--desks", type=int, default=6)
+    parser.add_argument("--orders", type=int, default=300)
+    parser.add_argument("--registers", type=int, default=4)
+    parser.add_argument("--devices", type=int, default=20)
+    parser.add_argument("--heartbeat-ms", type=float, default=1000.0)
+    parser.add_argument("--pollers", type=int, default=3)
+    parser.add_argument("--poll-ms", type=float, default=2000.0)
+    parser.add_argument("--out", type=Path, default=None, help="default benchmarks/results/e2e-<timestamp>.json")
+    parser.add_argument("--compare", type=Path, default=None, help="earlier result JSON to diff p99 against")
+    args = parser.parse_args()
+    if "bench" not in args.db and not args.yes_drop:
+        sys.exit(f"refusing to drop database {args.db!r}: use a name containing 'bench' or pass --yes-drop")
+
+    # The app reads these at import; no real LLM calls from the report workers
+    os.environ["MONGO_URL"] = args.mongo_url
+    os.environ["DB_NAME"] = args.db
+    os.environ.setdefault("LLM_PROVIDER", "stub")
+
+    fixtures = await seed(args)
+
+    import server
+
+    recorder = Recorder()
+    async with server.lifespan(server.app):
+        if server.db is None:
+            sys.exit("app failed to connect to MongoDB")
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            # Warm-up outside the measurement: registers the scanners and pays for
+            # first-request costs (pool connections, lazy imports, caches)
+            warmup = Recorder()
+            await warmup.request(client, "warmup", "GET", "/api/health")
+            for i, device_id in enumerate(fixtures["devices"]):
+                branch_id = fixtures["branch_ids"][i % len(fixtures["branch_ids"])]
+                await warmup.request(client, "warmup", "POST", "/api/devices/register",
+                                     json={"id": device_id, "deviceType": "scanner", "branchId": branch_id})
+            elapsed = await Workloads(client, recorder, args, fixtures).run()
+
+    if not args.keep:
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        cleanup = AsyncIOMotorClient(args.mongo_url)
+        await cleanup.drop_database(args.db)
+        cleanup.close()
+
+    endpoints = recorder.summary(elapsed)
+    result = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()},
+            "seeded": fixtures["counts"],
+        },
+        "elapsed_s": round(elapsed, 3),
+        "total_rps": round(sum(len(s) for s in recorder.samples.values()) / elapsed, 2),
+        "endpoints": endpoints,
+    }
+
+    previous = json.loads(args.compare.read_text())["endpoints"] if args.compare else None
+    print_table(endpoints, previous)
+    print(f"{result['total_rps']:.1f} requests/s over {elapsed:.1f}s")
+
+    out = args.out or RESULTS_DIR / f"e2e-{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, indent=2))
+    print(f"results written to {out}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
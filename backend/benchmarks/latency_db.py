@@ -0,0 +1,168 @@
+"""
+In-memory stand-in for a Motor database that charges a fixed delay per round
+trip. Benchmarks use it to compare query shapes (N+1 vs batched) without a
+MongoDB server; absolute numbers only mean "round trips x latency".
+"""
+import asyncio
+import copy
+from collections import defaultdict
+
+from pymongo import IndexModel
+
+
+def _matches(doc, query):
+    for key, cond in query.items():
+        if key == "$and":
+            if not all(_matches(doc, q) for q in cond):
+                return False
+            continue
+        if key == "$or":
+            if not any(_matches(doc, q) for q in cond):
+                return False
+            continue
+        value = doc.get(key)
+        if isinstance(cond, dict):
+            if "$in" in cond and value not in cond["$in"]:
+                return False
+            if "$ne" in cond and value == cond["$ne"]:
+                return False
+            if "$lt" in cond and not (value is not None and value < cond["$lt"]):
+                return False
+            if "$gt" in cond and not (value is not None and value > cond["$gt"]):
+                return False
+            if "$gte" in cond and not (value is not None and value >= cond["$gte"]):
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+class LatencyCursor:
+    def __init__(self, collection, docs):
+        self._collection = collection
+        self._docs = docs
+
+    def sort(self, key, direction=None):
+        keys = key if isinstance(key, list) else [(key, direction or 1)]
+        for field, order in reversed(keys):
+            self._docs.sort(key=lambda d: (d.get(field) is None, d.get(field)), reverse=order < 0)
+        return self
+
+    def limit(self, n):
+        if n:
+            self._docs = self._docs[:n]
+        return self
+
+    def max_time_ms(self, _ms):
+        return self
+
+    async def to_list(self, length=None):
+        await self._collection.round_trip()
+        return copy.deepcopy(self._docs[:length] if length else self._docs)
+
+
+class LatencyCollection:
+    def __init__(self, db, name):
+        self._db = db
+        self.name = name
+        self.docs = []
+        self.indexes = set()
+
+    async def round_trip(self):
+        self._db.round_trips += 1
+        if self._db.pool is None:
+            await asyncio.sleep(self._db.latency_for(self.name))
+            return
+        # Hold a "connection" for the whole round trip, like a pooled checkout
+        async with self._db.pool:
+            await asyncio.sleep(self._db.latency_for(self.name))
+
+    def find(self, query=None, projection=None):
+        return LatencyCursor(self, [d for d in self.docs if _matches(d, query or {})])
+
+    async def find_one(self, query=None, projection=None):
+        await self.round_trip()
+        doc = next((d for d in self.docs if _matches(d, query or {})), None)
+        return copy.deepcopy(doc)
+
+    async def count_documents(self, query):
+        await self.round_trip()
+        return sum(1 for d in self.docs if _matches(d, query))
+
+    async def insert_one(self, doc):
+        await self.round_trip()
+        self.docs.append(copy.deepcopy(doc))
+
+    async def insert_many(self, docs, ordered=True):
+        await self.round_trip()
+        self.docs.extend(copy.deepcopy(list(docs)))
+
+    async def update_one(self, query, update, upsert=False):
+        await self.round_trip()
+        doc = next((d for d in self.docs if _matches(d, query)), None)
+        if doc is not None:
+            doc.update(copy.deepcopy(update.get("$set", {})))
+            for field, amount in update.get("$inc", {}).items():
+                doc[field] = doc.get(field, 0) + amount
+
+    async def create_index(self, keys, **kwargs):
+        return (await self.create_indexes([IndexModel(keys, **kwargs)]))[0]
+
+    async def create_indexes(self, models):
+        await self.round_trip()
+        names = [model.document["name"] for model in models]
+        self.indexes.update(names)
+        return names
+
+    async def drop_index(self, name):
+        await self.round_trip()
+        self.indexes.discard(name)
+
+    def aggregate(self, pipeline):
+        """Supports the $match + $group($push / $sum) shapes used by the routers."""
+        docs = list(self.docs)
+        for stage in pipeline:
+            if "$match" in stage:
+                docs = [d for d in docs if _matches(d, stage["$match"])]
+            elif "$group" in stage:
+                spec = stage["$group"]
+                groups = defaultdict(list)
+                for d in docs:
+                    groups[d.get(spec["_id"].lstrip("$"))].append(d)
+                docs = []
+                for group_id, members in groups.items():
+                    row = {"_id": group_id}
+                    for out, acc in spec.items():
+                        if out == "_id":
+                            continue
+                        if "$push" in acc:
+                            row[out] = [m.get(acc["$push"].lstrip("$")) for m in members]
+                        elif "$sum" in acc:
+                            row[out] = len(members) if acc["$sum"] == 1 else sum(
+                                m.get(acc["$sum"].lstrip("$"), 0) for m in members
+                            )
+                    docs.append(row)
+        return LatencyCursor(self, docs)
+
+
+class LatencyDB:
+    def __init__(self, latency_ms: float = 2.0, per_collection_ms: dict = None, pool_size: int = None):
+        self.latency_s = latency_ms / 1000
+        # Optional cap on concurrent round trips, standing in for maxPoolSize
+        self.pool = asyncio.Semaphore(pool_size) if pool_size else None
+        self.per_collection_s = {name: ms / 1000 for name, ms in (per_collection_ms or {}).items()}
+        self.round_trips = 0
+        self._collections = {}
+
+    def latency_for(self, collection: str) -> float:
+        return self.per_collection_s.get(collection, self.latency_s)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name not in self._collections:
+            self._collections[name] = LatencyCollection(self, name)
+        return self._collections[name]
+
+    def __getitem__(self, name):
+        return getattr(self, name)
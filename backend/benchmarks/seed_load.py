@@ -0,0 +1,72 @@
+"""
+Fill a development database with production-sized, deterministic data.
+
+Generates --branches branches, --customers customers and about --sessions
+check-ins over --days days (plus their orders, ledger events, bookable events
+and registrations) and writes them with parallel insert_many batches. The same
+--seed and --anchor always produce the same documents. Requires DEV_MODE=true;
+point it at a scratch database, then run `python -m migrations up` for indexes.
+
+    cd backend && DEV_MODE=true python -m benchmarks.seed_load --mongo-url mongodb://localhost:27017 --db load_db
+    cd backend && DEV_MODE=true python -m benchmarks.seed_load --mongo-url ... --customers 2000 --sessions 40000
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.latency_db import LatencyDB
+from services.dev_seed_service import DevSeedService
+from services.load_data import LoadProfile
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    defaults = LoadProfile()
+    parser.add_argument("--mongo-url", default=None, help="without it, documents go to an in-memory LatencyDB")
+    parser.add_argument("--db", default="daycare_load")
+    parser.add_argument("--branches", type=int, default=defaults.branches)
+    parser.add_argument("--customers", type=int, default=defaults.customers)
+    parser.add_argument("--sessions", type=int, default=defaults.sessions)
+    parser.add_argument("--days", type=int, default=defaults.days)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--anchor", type=datetime.fromisoformat, default=None,
+                        help="end of the generated period (ISO date), default today")
+    parser.add_argument("--batch-size", type=int, default=defaults.batch_size)
+    parser.add_argument("--concurrency", type=int, default=defaults.concurrency)
+    args = parser.parse_args()
+
+    anchor = args.anchor.replace(tzinfo=args.anchor.tzinfo or timezone.utc) if args.anchor else None
+    profile = LoadProfile(
+        branches=args.branches, customers=args.customers, sessions=args.sessions, days=args.days,
+        seed=args.seed, anchor=anchor, batch_size=args.batch_size, concurrency=args.concurrency,
+    )
+
+    client = None
+    if args.mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        client = AsyncIOMotorClient(args.mongo_url, maxPoolSize=max(args.concurrency, 10))
+        db = client[args.db]
+    else:
+        db = LatencyDB(latency_ms=1.0)
+
+    started = time.perf_counter()
+    result = await DevSeedService(db).seed_load(profile)
+    if client is not None:
+        client.close()
+    if not result["allowed"]:
+        print(result["message"], file=sys.stderr)
+        sys.exit(1)
+    print(result["message"])
+    for collection, count in sorted(result["created"].items()):
+        print(f"  {collection:<20} {count:>10}")
+    print(f"wall {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,5 +1,6 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+import hmac
 import jwt
 import os
 from datetime import datetime, timezone, timedelta
@@ -89,3 +90,13 @@ async def get_optional_user(
         return decode_token(credentials.credentials)
     except:
         return None
+
+
+async def require_metrics_access(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
+) -> None:
+    """Metrics are for scrapers holding METRICS_TOKEN (when set) or ADMIN users"""
+    metrics_token = os.environ.get("METRICS_TOKEN", "")
+    if metrics_token and credentials and hmac.compare_digest(credentials.credentials, metrics_token):
+        return
+    await require_role("ADMIN")(credentials)
@@ -0,0 +1,333 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Optional
+
+from pymongo import monitoring
+
+# Command fields that describe what a query does; values are redacted to "?"
+SHAPE_FIELDS = ("filter", "query", "sort", "pipeline", "updates", "deletes")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_CALL_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+UNMATCHED_ROUTE = "unmatched"
+
+_lock = threading.Lock()
+
+
+def server_timing_enabled() -> bool:
+    return os.environ.get("DEV_MODE", "").lower() == "true"
+
+
+def slow_query_threshold_ms() -> Optional[float]:
+    """SLOW_QUERY_MS when the slow-query log is on (SLOW_QUERY_LOG, else DEV_MODE), otherwise None."""
+    if os.environ.get("SLOW_QUERY_LOG", os.environ.get("DEV_MODE", "")).lower() != "true":
+        return None
+    return float(os.environ.get("SLOW_QUERY_MS", "100"))
+
+
+class RequestStats:
+    """DB commands issued while serving one request."""
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope or {}
+        self.db_calls = 0
+        self.db_seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or self.scope.get("path") or UNMATCHED_ROUTE
+
+    def record(self, seconds: float) -> None:
+        with _lock:
+            self.db_calls += 1
+            self.db_seconds += seconds
+
+
+# Motor runs pymongo calls on executor threads with a copy of the caller's
+# context, so the command listener sees the stats object of the request that
+# issued the command.
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.series: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        entry = self.series.setdefault(labels, [[0] * (len(self.buckets) + 1), 0.0])
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def render(self, name: str, label_names: tuple) -> list[str]:
+        lines = []
+        for labels, (counts, total) in sorted(self.series.items()):
+            base = _labels(label_names, labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{base},le="{_format(bound)}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{name}_bucket{{{base},le="+Inf"}} {cumulative}')
+            lines.append(f"{name}_sum{{{base}}} {_format(total)}")
+            lines.append(f"{name}_count{{{base}}} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """In-process metrics rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self.request_latency = Histogram(LATENCY_BUCKETS)
+        self.request_db_calls = Histogram(DB_CALL_BUCKETS)
+        self.requests: dict[tuple, int] = {}
+        self.db_commands: dict[tuple, list] = {}
+        self.pool = {"max_size": 0, "open": 0, "checked_out": 0, "checked_out_peak": 0, "waiting": 0, "checkouts": 0}
+        self.pool_checkout_failures: dict[str, int] = {}
+
+    def update_pool(self, **deltas) -> None:
+        with _lock:
+            for key, delta in deltas.items():
+                self.pool[key] += delta
+            self.pool["checked_out_peak"] = max(self.pool["checked_out_peak"], self.pool["checked_out"])
+
+    def pool_checkout_failed(self, reason: str) -> None:
+        with _lock:
+            self.pool["waiting"] -= 1
+            self.pool_checkout_failures[reason] = self.pool_checkout_failures.get(reason, 0) + 1
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+        with _lock:
+            self.request_latency.observe((method, route), seconds)
+            self.request_db_calls.observe((method, route), stats.db_calls)
+            key = (method, route, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def observe_command(self, command: str, seconds: float, failed: bool) -> None:
+        with _lock:
+            entry = self.db_commands.setdefault((command, "error" if failed else "ok"), [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+    def render(self) -> str:
+        with _lock:
+            lines = [
+                "# HELP http_request_duration_seconds Request latency by route.",
+                "# TYPE http_request_duration_seconds histogram",
+                *self.request_latency.render("http_request_duration_seconds", ("method", "route")),
+                "# HELP http_request_db_commands Database commands issued per request by route.",
+                "# TYPE http_request_db_commands histogram",
+                *self.request_db_calls.render("http_request_db_commands", ("method", "route")),
+                "# HELP http_requests_total Requests by route and status.",
+                "# TYPE http_requests_total counter",
+            ]
+            for labels, count in sorted(self.requests.items()):
+                lines.append(f"http_requests_total{{{_labels(('method', 'route', 'status'), labels)}}} {count}")
+            lines += [
+                "# HELP mongodb_commands_total MongoDB commands by name and outcome.",
+                "# TYPE mongodb_commands_total counter",
+            ]
+            for labels, (count, _) in sorted(self.db_commands.items()):
+                lines.append(f"mongodb_commands_total{{{_labels(('command', 'outcome'), labels)}}} {count}")
+            lines += [
+                "# HELP mongodb_command_duration_seconds_total Time spent in MongoDB commands.",
+                "# TYPE mongodb_command_duration_seconds_total counter",
+            ]
+            for labels, (_, total) in sorted(self.db_commands.items()):
+                lines.append(
+                    f"mongodb_command_duration_seconds_total{{{_labels(('command', 'outcome'), labels)}}} {_format(total)}"
+                )
+            lines += [
+                "# HELP mongodb_pool_connections Connection pool state across servers.",
+                "# TYPE mongodb_pool_connections gauge",
+            ]
+            for state in ("max_size", "open", "checked_out", "checked_out_peak", "waiting"):
+                lines.append(f'mongodb_pool_connections{{state="{state}"}} {self.pool[state]}')
+            lines += [
+                "# HELP mongodb_pool_checkouts_total Connections checked out of the pool.",
+                "# TYPE mongodb_pool_checkouts_total counter",
+                f"mongodb_pool_checkouts_total {self.pool['checkouts']}",
+                "# HELP mongodb_pool_checkout_failures_total Failed checkouts by reason (timeout = pool exhausted).",
+                "# TYPE mongodb_pool_checkout_failures_total counter",
+            ]
+            for reason, count in sorted(self.pool_checkout_failures.items()):
+                lines.append(f'mongodb_pool_checkout_failures_total{{reason="{_escape(reason)}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+def query_shape(command_name: str, command: dict) -> dict:
+    """The collection and filter/sort/pipeline structure of a command, without its values."""
+    target = command.get(command_name)
+    shape = {"collection": target if isinstance(target, str) else command.get("collection")}
+    for field in SHAPE_FIELDS:
+        if field in command:
+            shape[field] = _redact(command[field])
+    return shape
+
+
+def _redact(value):
+    if isinstance(value, dict):
+        return {key: _redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_redact(value[0])] if value else []
+    return "?"
+
+
+class DBCommandListener(monitoring.CommandListener):
+    """
+    Counts MongoDB round trips globally and against the current request.
+
+    With slow_query_ms set, commands at or over the threshold are logged with
+    the route that issued them and their query shape.
+    """
+
+    def __init__(self, registry: MetricsRegistry, slow_query_ms: Optional[float] = None):
+        self.registry = registry
+        self.slow_query_ms = slow_query_ms
+        self._shapes: dict[tuple, dict] = {}
+
+    def started(self, event) -> None:
+        if self.slow_query_ms is not None:
+            self._shapes[(event.connection_id, event.request_id)] = query_shape(event.command_name, event.command)
+
+    def succeeded(self, event) -> None:
+        self._record(event, failed=False)
+
+    def failed(self, event) -> None:
+        self._record(event, failed=True)
+
+    def _record(self, event, failed: bool) -> None:
+        seconds = event.duration_micros / 1_000_000
+        self.registry.observe_command(event.command_name, seconds, failed)
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.record(seconds)
+        if self.slow_query_ms is not None:
+            shape = self._shapes.pop((event.connection_id, event.request_id), None)
+            if seconds * 1000 >= self.slow_query_ms:
+                route = stats.route if stats is not None else "background"
+                print(
+                    f"Slow query: {seconds * 1000:.1f}ms {event.command_name} route={route} "
+                    f"shape={json.dumps(shape, default=str)}"
+                )
+
+
+class DBPoolListener(monitoring.ConnectionPoolListener):
+    """Tracks open, checked-out and waiting connections for pool sizing."""
+
+    def __init__(self, registry: MetricsRegistry):
+        self.registry = registry
+
+    def pool_created(self, event) -> None:
+        self.registry.update_pool(max_size=event.options.get("maxPoolSize") or 0)
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        pass
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_created(self, event) -> None:
+        self.registry.update_pool(open=1)
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_closed(self, event) -> None:
+        self.registry.update_pool(open=-1)
+
+    def connection_check_out_started(self, event) -> None:
+        self.registry.update_pool(waiting=1)
+
+    def connection_check_out_failed(self, event) -> None:
+        self.registry.pool_checkout_failed(str(event.reason))
+
+    def connection_checked_out(self, event) -> None:
+        self.registry.update_pool(waiting=-1, checked_out=1, checkouts=1)
+
+    def connection_checked_in(self, event) -> None:
+        self.registry.update_pool(checked_out=-1)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency and DB command counts.
+
+    Routes are labelled by their path template ("/api/customers/{customer_id}")
+    so label cardinality stays bounded. With server_timing on, responses carry a
+    Server-Timing header with the app time and DB time/commands so far.
+    """
+
+    def __init__(self, app, registry: Optional[MetricsRegistry] = None, server_timing: Optional[bool] = None):
+        self.app = app
+        self.registry = registry or metricsRegistry
+        # Read when the app builds its middleware stack, after .env is loaded
+        self.server_timing = server_timing_enabled() if server_timing is None else server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = current_request_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", _server_timing(stats, started).encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request_stats.reset(token)
+            route = scope.get("route")
+            self.registry.observe_request(
+                scope["method"],
+                getattr(route, "path", UNMATCHED_ROUTE),
+                status_code,
+                time.perf_counter() - started,
+                stats,
+            )
+
+
+def _server_timing(stats: RequestStats, started: float) -> str:
+    app_ms = (time.perf_counter() - started) * 1000
+    return (
+        f'app;dur={app_ms:.1f}, '
+        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.db_calls} commands"'
+    )
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format(value: float) -> str:
+    return repr(float(value))
+
+
+metricsRegistry = MetricsRegistry()
+# server.py sets slow_query_ms from slow_query_threshold_ms() when it connects
+dbCommandListener = DBCommandListener(metricsRegistry)
+dbPoolListener = DBPoolListener(metricsRegistry)
@@ -0,0 +1,66 @@
+"""
+Apply or inspect schema/data migrations.
+
+    cd backend && python -m migrations status
+    cd backend && python -m migrations up [--to 0003] [--batch-size 1000]
+
+Uses MONGO_URL and DB_NAME like the API. Only one replica migrates at a time
+(lease in `job_leases`); interrupted backfills resume from their checkpoint.
+"""
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+# Before the imports below, which read MIGRATION_* settings at import time
+load_dotenv()
+
+from migrations.runner import MIGRATION_BATCH_SIZE, MigrationRunner
+from utils.db_profiles import client_options, frontdesk_db
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m migrations", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    up = commands.add_parser("up", help="apply pending migrations")
+    up.add_argument("--to", default=None, help="stop after this version")
+    up.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE)
+    commands.add_parser("status", help="list migrations and their state")
+    args = parser.parse_args()
+
+    mongo_url = os.environ.get("MONGO_URL")
+    if not mongo_url:
+        print("MONGO_URL is not configured", file=sys.stderr)
+        return 2
+
+    client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=5000, **client_options())
+    db = frontdesk_db(client[os.environ.get("DB_NAME", "daycare_db")])
+    try:
+        if args.command == "status":
+            runner = MigrationRunner()
+            for row in await runner.status(db):
+                processed = f" ({row['processed']} documents)" if row["processed"] else ""
+                print(f"{row['version']} {row['name']:<28} {row['state']:<8} {row['applied_at'] or ''}{processed}")
+            return 0
+
+        runner = MigrationRunner(batch_size=args.batch_size)
+        try:
+            applied = await runner.up(db, target=args.to)
+        except Exception as exc:
+            print(f"Migration failed: {exc}", file=sys.stderr)
+            return 1
+        print(f"Applied {len(applied)} migration(s)" if applied else "Database is up to date")
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
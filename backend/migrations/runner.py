@@ -0,0 +1,250 @@
+import importlib
+import os
+import pkgutil
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+from uuid import uuid4
+
+from pymongo.errors import DuplicateKeyError
+
+MIGRATION_LOCK_SECONDS = float(os.environ.get("MIGRATION_LOCK_SECONDS", "300"))
+MIGRATION_BATCH_SIZE = int(os.environ.get("MIGRATION_BATCH_SIZE", "500"))
+
+LOCK_NAME = "migrations"
+
+
+class Migration:
+    """
+    One numbered step loaded from migrations/versions/NNNN_name.py.
+
+    The module provides `async def up(ctx)` and may set RUN_ON_STARTUP = True
+    when it is cheap, idempotent and independent of earlier backfills (index
+    builds); boot applies those out of order. Everything else, such as large
+    backfills, only runs from `python -m migrations up`.
+    """
+
+    def __init__(self, version: str, name: str, up: Callable[["MigrationContext"], Awaitable[None]],
+                 description: str = "", run_on_startup: bool = False):
+        self.version = version
+        self.name = name
+        self.up = up
+        self.description = description
+        self.run_on_startup = run_on_startup
+
+    @classmethod
+    def from_module(cls, module) -> "Migration":
+        stem = module.__name__.rsplit(".", 1)[-1]
+        version, _, name = stem.partition("_")
+        return cls(
+            version=version,
+            name=name,
+            up=module.up,
+            description=next(iter((module.__doc__ or "").strip().splitlines()), ""),
+            run_on_startup=getattr(module, "RUN_ON_STARTUP", False),
+        )
+
+
+def discover() -> list[Migration]:
+    from migrations import versions
+
+    migrations = [
+        Migration.from_module(importlib.import_module(f"{versions.__name__}.{info.name}"))
+        for info in pkgutil.iter_modules(versions.__path__)
+        if info.name[:1].isdigit()
+    ]
+    return sorted(migrations, key=lambda m: m.version)
+
+
+class MigrationLock:
+    """Lease in `job_leases` so only one replica migrates at a time."""
+
+    def __init__(self, db, lease_seconds: float = MIGRATION_LOCK_SECONDS):
+        self.db = db
+        self.lease_seconds = lease_seconds
+        self.owner = str(uuid4())
+
+    async def acquire(self) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            await self.db.job_leases.update_one(
+                {"_id": LOCK_NAME, "$or": [{"owner": self.owner}, {"expires_at": {"$lte": now.isoformat()}}]},
+                {"$set": {
+                    "owner": self.owner,
+                    "expires_at": (now + timedelta(seconds=self.lease_seconds)).isoformat(),
+                }},
+                upsert=True,
+            )
+            return True
+        except DuplicateKeyError:
+            # Another replica holds an unexpired lease
+            return False
+
+    async def renew(self) -> None:
+        """Extend the lease during long backfills; raises if another replica took it over."""
+        if not await self.acquire():
+            raise RuntimeError("Migration lock lost to another replica")
+
+    async def release(self) -> None:
+        await self.db.job_leases.delete_one({"_id": LOCK_NAME, "owner": self.owner})
+
+
+class MigrationContext:
+    """What a migration's `up` receives: the database plus checkpoint/progress helpers."""
+
+    def __init__(self, db, migration: Migration, record: dict, lock: MigrationLock,
+                 batch_size: int = MIGRATION_BATCH_SIZE, log=print):
+        self.db = db
+        self.migration = migration
+        self.checkpoint = record.get("checkpoint")
+        self.processed = record.get("processed", 0)
+        self.lock = lock
+        self.batch_size = batch_size
+        self.log = log
+
+    async def save_checkpoint(self, checkpoint, processed: int) -> None:
+        self.checkpoint = checkpoint
+        self.processed = processed
+        await self.db.migrations.update_one(
+            {"_id": self.migration.version},
+            {"$set": {"checkpoint": checkpoint, "processed": processed,
+                      "updated_at": datetime.now(timezone.utc).isoformat()}},
+        )
+        await self.lock.renew()
+
+    async def backfill(self, collection: str, query: dict, apply: Callable[[list], Awaitable[None]],
+                       projection: Optional[dict] = None) -> int:
+        """
+        Walk `collection` in _id order in batches of batch_size, calling `apply`
+        on each batch. The last _id is checkpointed after every batch, so a rerun
+        after a crash or a lost lock resumes where it stopped.
+        """
+        started = time.perf_counter()
+        while True:
+            page_query = dict(query)
+            if self.checkpoint is not None:
+                page_query["_id"] = {"$gt": self.checkpoint}
+            batch = await self.db[collection].find(page_query, projection).sort("_id", 1).limit(
+                self.batch_size
+            ).to_list(self.batch_size)
+            if not batch:
+                return self.processed
+
+            await apply(batch)
+            await self.save_checkpoint(batch[-1]["_id"], self.processed + len(batch))
+            rate = self.processed / max(time.perf_counter() - started, 1e-6)
+            self.log(f"  {self.migration.version} {collection}: {self.processed} documents ({rate:.0f}/s)")
+
+
+class MigrationRunner:
+    """
+    Applies pending migrations in version order and records them in `migrations`.
+
+    Each record holds state (running / applied), timings and the backfill
+    checkpoint, so a failed or interrupted migration resumes instead of
+    starting over.
+    """
+
+    def __init__(self, migrations: Optional[list[Migration]] = None, batch_size: int = MIGRATION_BATCH_SIZE):
+        self._migrations = migrations
+        self.batch_size = batch_size
+
+    @property
+    def migrations(self) -> list[Migration]:
+        if self._migrations is None:
+            self._migrations = discover()
+        return self._migrations
+
+    async def status(self, db) -> list[dict]:
+        records = await db.migrations.find({}, {"_id": 1, "state": 1, "applied_at": 1, "processed": 1}).to_list(None)
+        by_version = {r["_id"]: r for r in records}
+        return [
+            {
+                "version": m.version,
+                "name": m.name,
+                "description": m.description,
+                "state": by_version.get(m.version, {}).get("state", "pending"),
+                "applied_at": by_version.get(m.version, {}).get("applied_at"),
+                "processed": by_version.get(m.version, {}).get("processed"),
+            }
+            for m in self.migrations
+        ]
+
+    async def pending(self, db) -> list[Migration]:
+        applied = await db.migrations.find({"state": "applied"}, {"_id": 1}).to_list(None)
+        done = {r["_id"] for r in applied}
+        return [m for m in self.migrations if m.version not in done]
+
+    async def up(self, db, target: Optional[str] = None, startup: bool = False, log=print) -> list[str]:
+        """
+        Apply pending migrations up to `target` (inclusive); returns the versions applied.
+
+        With startup=True every pending RUN_ON_STARTUP migration is applied, even
+        past a pending backfill, and the backfills are only reported. A lock held
+        by another replica is not an error then (it is doing the work).
+        """
+        pending = [m for m in await self.pending(db) if target is None or m.version <= target]
+        if startup:
+            for migration in pending:
+                if not migration.run_on_startup:
+                    log(f"Warning: migration {migration.version}_{migration.name} is pending; "
+                        f"run `python -m migrations up`")
+            pending = [m for m in pending if m.run_on_startup]
+        if not pending:
+            return []
+
+        lock = MigrationLock(db)
+        if not await lock.acquire():
+            if startup:
+                log("Migrations are being applied by another replica")
+                return []
+            raise RuntimeError("Another replica holds the migration lock")
+
+        applied = []
+        try:
+            # Re-read under the lock: another replica may have finished some meanwhile
+            still_pending = {m.version for m in await self.pending(db)}
+            for migration in pending:
+                if migration.version not in still_pending:
+                    continue
+                await self._apply(db, migration, lock, log)
+                applied.append(migration.version)
+        finally:
+            await lock.release()
+        return applied
+
+    async def _apply(self, db, migration: Migration, lock: MigrationLock, log) -> None:
+        now = datetime.now(timezone.utc).isoformat()
+        await db.migrations.update_one(
+            {"_id": migration.version},
+            {"$set": {"name": migration.name, "state": "running", "started_at": now},
+             "$unset": {"error": ""}},
+            upsert=True,
+        )
+        record = await db.migrations.find_one({"_id": migration.version}) or {}
+        if record.get("checkpoint") is not None:
+            log(f"Resuming {migration.version}_{migration.name} after {record.get('processed', 0)} documents")
+        else:
+            log(f"Applying {migration.version}_{migration.name}")
+
+        ctx = MigrationContext(db, migration, record, lock, batch_size=self.batch_size, log=log)
+        started = time.perf_counter()
+        try:
+            await migration.up(ctx)
+        except Exception as exc:
+            await db.migrations.update_one(
+                {"_id": migration.version},
+                {"$set": {"state": "failed", "error": str(exc)[:500]}},
+            )
+            raise
+
+        duration_ms = round((time.perf_counter() - started) * 1000)
+        await db.migrations.update_one(
+            {"_id": migration.version},
+            {"$set": {"state": "applied", "applied_at": datetime.now(timezone.utc).isoformat(),
+                      "duration_ms": duration_ms}},
+        )
+        log(f"Applied {migration.version}_{migration.name} in {duration_ms}ms")
+
+
+migrationRunner = MigrationRunner()
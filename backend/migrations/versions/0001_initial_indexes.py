@@ -0,0 +1,8 @@
+"""Create the collection indexes defined in utils.indexes."""
+from utils.indexes import create_indexes
+
+RUN_ON_STARTUP = True
+
+
+async def up(ctx):
+    await create_indexes(ctx.db)
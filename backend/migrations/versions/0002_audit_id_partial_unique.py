@@ -0,0 +1,8 @@
+"""Replace the legacy unique audit_id index with a partial unique one."""
+from utils.indexes import ensure_audit_id_index
+
+RUN_ON_STARTUP = True
+
+
+async def up(ctx):
+    await ensure_audit_id_index(ctx.db)
@@ -0,0 +1,19 @@
+"""Populate type-ahead search fields on customers created before they existed."""
+from pymongo import UpdateOne
+
+from services.customer_search import build_search_fields
+
+
+async def up(ctx):
+    async def apply(batch):
+        await ctx.db.customers.bulk_write(
+            [UpdateOne({"_id": c["_id"]}, {"$set": build_search_fields(c)}) for c in batch],
+            ordered=False,
+        )
+
+    await ctx.backfill(
+        "customers",
+        {"search_card": {"$exists": False}},
+        apply,
+        projection={"_id": 1, "child_name": 1, "card_number": 1, "guardian": 1},
+    )
@@ -0,0 +1,9 @@
+"""Copy legacy child-keyed parent_feed items into per-guardian timelines."""
+from services.parent_feed import parentFeed
+
+
+async def up(ctx):
+    async def apply(batch):
+        await parentFeed.copy_legacy_items(ctx.db, batch)
+
+    await ctx.backfill("parent_feed", {}, apply)
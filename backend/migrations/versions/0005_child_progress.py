@@ -0,0 +1,7 @@
+"""Build child_progress rollups from existing observations."""
+from services import child_progress
+
+
+async def up(ctx):
+    rebuilt = await child_progress.rebuild(ctx.db, batch_size=ctx.batch_size, on_batch=ctx.lock.renew)
+    ctx.log(f"  {ctx.migration.version} child_progress: {rebuilt} rollups")
@@ -0,0 +1,8 @@
+"""Index users by phone, role and branch for guardian resolution and list_users."""
+from utils.indexes import index_specs
+
+RUN_ON_STARTUP = True
+
+
+async def up(ctx):
+    await ctx.db.users.create_indexes(index_specs()["users"])
@@ -0,0 +1 @@
+# Numbered migration steps, applied in filename order
@@ -96,3 +96,16 @@ class WaiverAcceptance(BaseModel):
     customer_id: str
     guardian_signature: Optional[str] = None  # Base64 signature image (optional)
     accepted_terms: bool = True
+
+
+class CustomerSearchResult(BaseModel):
+    """Lightweight type-ahead match"""
+    model_config = ConfigDict(extra="ignore")
+
+    customer_id: str
+    card_number: str
+    child_name: str
+    guardian_name: Optional[str] = None
+    guardian_phone: Optional[str] = None
+    branch_id: str
+    status: str = "active"
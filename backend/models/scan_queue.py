@@ -0,0 +1,31 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Any, Dict, Literal, Optional
+from datetime import datetime
+
+
+ScanKind = Literal["CHECKIN", "WRISTBAND"]
+ScanStatus = Literal["QUEUED", "COMMITTED", "FAILED"]
+
+
+class ScanTicket(BaseModel):
+    """Acknowledgement returned to the scanner before the scan is committed"""
+    model_config = ConfigDict(extra="ignore")
+
+    scan_id: str
+    kind: ScanKind
+    status: ScanStatus
+    provisional_status: str
+    provisional: Dict[str, Any] = {}
+    queue_position: Optional[int] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    error_status_code: Optional[int] = None
+    branch_id: Optional[str] = None
+    accepted_at: datetime
+    committed_at: Optional[datetime] = None
+    reconciled: bool = False
+
+
+class ScanReconciliation(BaseModel):
+    pending: int
+    failed: list[ScanTicket]
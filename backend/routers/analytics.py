@@ -11,8 +11,8 @@ router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
 
 def get_db():
-    from server import db
-    return db
+    from server import reports_db
+    return reports_db
 
 
 def _to_datetime(value: Any) -> datetime | None:
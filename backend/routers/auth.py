@@ -1,10 +1,11 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, Request, status, Depends
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from models.user import User, UserCreate, UserLogin, UserResponse, TokenResponse
 from middleware.auth import create_token, get_current_user
+from services.password_service import client_address, passwordService
+from services.user_directory import userDirectory
 from datetime import datetime, timezone
 import logging
-import bcrypt
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 logger = logging.getLogger(__name__)
@@ -31,7 +32,7 @@ async def register(
         )
     
     # Hash password
-    password_hash = bcrypt.hashpw(user_data.password.encode(), bcrypt.gensalt()).decode()
+    password_hash = await passwordService.hash(user_data.password)
     
     # Create user
     user = User(
@@ -48,6 +49,7 @@ async def register(
     user_dict["updated_at"] = user_dict["updated_at"].isoformat()
     
     await db.users.insert_one(user_dict)
+    userDirectory.invalidate(user_dict)
     
     # Create token
     token = create_token(user.user_id, user.email, user.role)
@@ -68,6 +70,7 @@ async def register(
 @router.post("/login", response_model=TokenResponse)
 async def login(
     credentials: UserLogin,
+    request: Request,
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """Login and get access token"""
@@ -115,8 +118,10 @@ async def login(
             detail="بيانات الدخول غير صحيحة"
         )
 
-    # Check password
-    if not bcrypt.checkpw(credentials.password.encode(), str(password_hash).encode()):
+    # Check password (off the event loop, limited per client address and email)
+    async with passwordService.limit(client_address(request), normalized_email):
+        password_ok = await passwordService.verify(credentials.password, password_hash)
+    if not password_ok:
         logger.warning("Login failed: invalid password", extra={"email": normalized_email})
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -139,10 +144,13 @@ async def login(
             detail="بيانات الدخول غير صحيحة"
         )
 
-    # Update last login
+    # Update last login; re-hash at the configured cost if it has changed
+    login_updates = {"last_login_at": datetime.now(timezone.utc).isoformat()}
+    if await passwordService.needs_rehash(password_hash):
+        login_updates["password_hash"] = await passwordService.hash(credentials.password)
     await db.users.update_one(
         {"user_id": user_id},
-        {"$set": {"last_login_at": datetime.now(timezone.utc).isoformat()}}
+        {"$set": login_updates}
     )
 
     # Create token
@@ -226,7 +234,7 @@ async def create_staff(
         )
     
     # Hash password
-    password_hash = bcrypt.hashpw(user_data.password.encode(), bcrypt.gensalt()).decode()
+    password_hash = await passwordService.hash(user_data.password)
     
     # Create user with specified role
     user = User(
@@ -242,6 +250,7 @@ async def create_staff(
     user_dict["updated_at"] = user_dict["updated_at"].isoformat()
     
     await db.users.insert_one(user_dict)
+    userDirectory.invalidate(user_dict)
     
     return UserResponse(
         user_id=user.user_id,
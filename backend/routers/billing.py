@@ -3,6 +3,7 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 from pydantic import BaseModel, Field
 from typing import Optional, List, Literal
 from middleware.auth import require_role
+from services.household_graph import householdGraph
 from datetime import datetime, timezone, date
 from models.session import OVERTIME_RATE_PER_HOUR
 import uuid
@@ -286,10 +287,7 @@ async def list_invoices(
 
     role = user.get("role", "").upper()
     if role == "PARENT":
-        children = await db.children.find(
-            {"guardian_id": user.get("user_id")}, {"_id": 0, "child_id": 1}
-        ).to_list(20)
-        child_ids = [c["child_id"] for c in children if c.get("child_id")]
+        child_ids = await householdGraph.child_ids_for_guardian(db, user.get("user_id"))
         if not child_ids:
             return []
         query = {"child_id": {"$in": child_ids}}
@@ -1,10 +1,16 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Response
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from typing import List, Optional
 from models.checkin import CheckInSession, CheckInCreate, CheckInSessionResponse
 from middleware.auth import require_role
+from utils.pagination import DEFAULT_PAGE_SIZE, paginate
 from utils.audit import log_audit
+from utils.concurrency import gather_lookups
+from utils.lookups import fetch_by_ids
 from services.event_logger import eventLogger
+from services.scan_queue import scanQueue
+from services.customer_cache import customerCardCache
+from services.user_directory import userDirectory
 from datetime import datetime, timezone
 from uuid import uuid4
 import math
@@ -41,20 +47,7 @@ def _resolve_included_minutes(session: dict) -> int:
 
 
 async def _derive_guardian_id(db: AsyncIOMotorDatabase, customer: dict) -> Optional[str]:
-    guardian = customer.get("guardian") or {}
-    guardian_email = guardian.get("email")
-    if guardian_email:
-        user = await db.users.find_one({"email": guardian_email}, {"_id": 0, "user_id": 1})
-        if user:
-            return user.get("user_id")
-
-    guardian_phone = guardian.get("phone")
-    if guardian_phone:
-        user = await db.users.find_one({"phone": guardian_phone}, {"_id": 0, "user_id": 1})
-        if user:
-            return user.get("user_id")
-
-    return None
+    return await userDirectory.resolve_guardian_id(db, customer.get("guardian"))
 
 
 def _calculate_overdue(minutes_used: int, included_minutes: int) -> tuple[int, float]:
@@ -157,6 +150,10 @@ async def _attach_wristband_state(db: AsyncIOMotorDatabase, session: dict) -> di
         return session
 
     wristband = await db.wristbands.find_one({"session_id": session_id}, {"_id": 0})
+    return _apply_wristband_state(session, wristband)
+
+
+def _apply_wristband_state(session: dict, wristband: Optional[dict]) -> dict:
     if not wristband:
         session["wristband_status"] = session.get("wristband_status") or "not_assigned"
         return session
@@ -168,6 +165,17 @@ async def _attach_wristband_state(db: AsyncIOMotorDatabase, session: dict) -> di
     return session
 
 
+SESSION_CUSTOMER_FIELDS = {"_id": 0, "customer_id": 1, "child_name": 1, "guardian": 1}
+
+
+def _apply_customer(entry: CheckInSessionResponse, customer: Optional[dict]) -> CheckInSessionResponse:
+    if customer:
+        entry.child_name = customer.get("child_name")
+        entry.guardian_name = customer.get("guardian", {}).get("name")
+        entry.guardian_phone = customer.get("guardian", {}).get("phone")
+    return entry
+
+
 @router.post("/scan", response_model=dict)
 async def scan_card(
     scan_data: CheckInCreate,
@@ -179,7 +187,7 @@ async def scan_card(
     Returns customer data and whether they need to register or can check in.
     """
     # Look up customer by card
-    customer = await db.customers.find_one({"card_number": scan_data.card_number}, {"_id": 0})
+    customer = await customerCardCache.get_by_card(db, scan_data.card_number)
     
     if not customer:
         # Card not registered - need to create new customer
@@ -196,13 +204,24 @@ async def scan_card(
     if isinstance(customer.get("child_dob"), str):
         customer["child_dob"] = customer["child_dob"]  # Keep as string for response
     
-    # Check if already checked in (active session)
-    active_session = await db.checkin_sessions.find_one({
-        "customer_id": customer["customer_id"],
-        "status": "CHECKED_IN"
-    }, {"_id": 0})
+    # Active session and subscription are independent; fetch them together
+    active_session, subscription = await gather_lookups(
+        db.checkin_sessions.find_one({
+            "customer_id": customer["customer_id"],
+            "status": "CHECKED_IN"
+        }, {"_id": 0}),
+        db.subscriptions.find_one({
+            "customer_id": customer["customer_id"],
+            "status": "ACTIVE",
+            "expires_at": {"$gt": datetime.now(timezone.utc).isoformat()}
+        }, {"_id": 0}) if customer.get("waiver_accepted") else None,
+    )
     
+    if not active_session:
+        # Closed by another replica or outside check_out; drop the provisional hint
+        scanQueue.forget_active_session(customer["customer_id"])
     if active_session:
+        scanQueue.remember_active_session(customer["customer_id"], active_session.get("session_id"))
         if isinstance(active_session.get("check_in_time"), str):
             active_session["check_in_time"] = datetime.fromisoformat(active_session["check_in_time"])
         if isinstance(active_session.get("session_started_at"), str):
@@ -230,13 +249,6 @@ async def scan_card(
             "has_subscription": False
         }
     
-    # Check for active subscription
-    subscription = await db.subscriptions.find_one({
-        "customer_id": customer["customer_id"],
-        "status": "ACTIVE",
-        "expires_at": {"$gt": datetime.now(timezone.utc).isoformat()}
-    }, {"_id": 0})
-    
     has_subscription = subscription is not None
     subscription_info = None
     
@@ -270,7 +282,7 @@ async def check_in(
 ):
     """Check in a customer"""
     # Get customer
-    customer = await db.customers.find_one({"card_number": checkin_data.card_number}, {"_id": 0})
+    customer = await customerCardCache.get_by_card(db, checkin_data.card_number)
     if not customer:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -284,12 +296,24 @@ async def check_in(
             detail="يجب الموافقة على إقرار المسؤولية أولاً"
         )
     
-    # Check if already checked in
-    existing_session = await db.checkin_sessions.find_one({
-        "customer_id": customer["customer_id"],
-        "status": "CHECKED_IN"
-    })
+    # Check if already checked in; subscription candidates are read alongside
+    existing_session, subscription, pending_sub = await gather_lookups(
+        db.checkin_sessions.find_one({
+            "customer_id": customer["customer_id"],
+            "status": "CHECKED_IN"
+        }, {"_id": 0, "session_id": 1}),
+        db.subscriptions.find_one({
+            "customer_id": customer["customer_id"],
+            "status": "ACTIVE",
+            "expires_at": {"$gt": datetime.now(timezone.utc).isoformat()}
+        }, {"_id": 0}) if use_subscription else None,
+        db.subscriptions.find_one({
+            "customer_id": customer["customer_id"],
+            "status": "PENDING"
+        }, {"_id": 0}) if use_subscription else None,
+    )
     if existing_session:
+        scanQueue.remember_active_session(customer["customer_id"], existing_session.get("session_id"))
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="الطفل مسجل دخول بالفعل"
@@ -301,24 +325,11 @@ async def check_in(
     included_minutes = PAYMENT_INCLUDED_MINUTES["HOURLY"]
     
     if use_subscription:
-        # Check for active subscription
-        subscription = await db.subscriptions.find_one({
-            "customer_id": customer["customer_id"],
-            "status": "ACTIVE",
-            "expires_at": {"$gt": datetime.now(timezone.utc).isoformat()}
-        }, {"_id": 0})
-        
         if subscription:
             payment_type = "SUBSCRIPTION"
             subscription_id = subscription["subscription_id"]
             included_minutes = PAYMENT_INCLUDED_MINUTES["SUBSCRIPTION"]
         else:
-            # Check for pending subscription to activate
-            pending_sub = await db.subscriptions.find_one({
-                "customer_id": customer["customer_id"],
-                "status": "PENDING"
-            }, {"_id": 0})
-            
             if pending_sub:
                 # Activate the subscription on first use
                 now = datetime.now(timezone.utc)
@@ -369,18 +380,21 @@ async def check_in(
         session_dict["session_started_at"] = session_dict["session_started_at"].isoformat()
     
     await db.checkin_sessions.insert_one(session_dict)
+    scanQueue.remember_active_session(customer["customer_id"], session.session_id)
     
     # Update customer visit stats
+    visited_at = datetime.now(timezone.utc).isoformat()
     await db.customers.update_one(
         {"customer_id": customer["customer_id"]},
         {
             "$inc": {"total_visits": 1},
             "$set": {
-                "last_visit": datetime.now(timezone.utc).isoformat(),
-                "updated_at": datetime.now(timezone.utc).isoformat()
+                "last_visit": visited_at,
+                "updated_at": visited_at
             }
         }
     )
+    customerCardCache.apply_visit(checkin_data.card_number, visited_at)
     
     await log_audit(
         db, "CHECKIN", session.session_id, "CHECKED_IN",
@@ -475,6 +489,7 @@ async def check_out(
             "updated_at": now.isoformat()
         }}
     )
+    scanQueue.forget_active_session(session["customer_id"])
 
     await log_audit(
         db, "CHECKIN", session_id, "CHECKED_OUT",
@@ -512,17 +527,8 @@ async def check_out(
     if isinstance(updated.get("check_out_time"), str):
         updated["check_out_time"] = datetime.fromisoformat(updated["check_out_time"])
     
-    # Get customer info
-    customer = await db.customers.find_one({"customer_id": updated["customer_id"]}, {"_id": 0})
-    
     updated = _enrich_session_for_ui(updated)
-    response = CheckInSessionResponse(**updated)
-    if customer:
-        response.child_name = customer.get("child_name")
-        response.guardian_name = customer.get("guardian", {}).get("name")
-        response.guardian_phone = customer.get("guardian", {}).get("phone")
-    
-    return response
+    return _apply_customer(CheckInSessionResponse(**updated), customer)
 
 
 @router.get("/active", response_model=List[CheckInSessionResponse])
@@ -541,6 +547,12 @@ async def list_active_sessions(
             query["branch_id"] = user["branch_id"]
     
     sessions = await db.checkin_sessions.find(query, {"_id": 0}).sort("check_in_time", -1).to_list(100)
+
+    # Wristbands and customers for the whole board in one query each
+    wristbands, customers = await gather_lookups(
+        fetch_by_ids(db.wristbands, "session_id", (s.get("session_id") for s in sessions)),
+        fetch_by_ids(db.customers, "customer_id", (s.get("customer_id") for s in sessions), SESSION_CUSTOMER_FIELDS),
+    )
     
     result = []
     for sess in sessions:
@@ -548,21 +560,12 @@ async def list_active_sessions(
             sess["check_in_time"] = datetime.fromisoformat(sess["check_in_time"])
         if isinstance(sess.get("session_started_at"), str):
             sess["session_started_at"] = datetime.fromisoformat(sess["session_started_at"])
-        sess = await _attach_wristband_state(db, sess)
+        sess = _apply_wristband_state(sess, wristbands.get(sess.get("session_id")))
         if isinstance(sess.get("wristband_activated_at"), str):
             sess["wristband_activated_at"] = datetime.fromisoformat(sess["wristband_activated_at"])
         sess = _enrich_session_for_ui(sess)
         
-        # Get customer info
-        customer = await db.customers.find_one({"customer_id": sess["customer_id"]}, {"_id": 0})
-        
-        response = CheckInSessionResponse(**sess)
-        if customer:
-            response.child_name = customer.get("child_name")
-            response.guardian_name = customer.get("guardian", {}).get("name")
-            response.guardian_phone = customer.get("guardian", {}).get("phone")
-        
-        result.append(response)
+        result.append(_apply_customer(CheckInSessionResponse(**sess), customers.get(sess["customer_id"])))
     
     return result
 
@@ -572,7 +575,9 @@ async def list_session_history(
     branch_id: Optional[str] = None,
     customer_id: Optional[str] = None,
     date_from: Optional[str] = None,
-    limit: int = 50,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    response: Response = None,
     user: dict = Depends(require_role("ADMIN", "MANAGER", "RECEPTION", "STAFF", "CASHIER", "ATTENDANT")),
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
@@ -591,7 +596,14 @@ async def list_session_history(
     if date_from:
         query["check_in_time"] = {"$gte": date_from}
     
-    sessions = await db.checkin_sessions.find(query, {"_id": 0}).sort("check_in_time", -1).limit(limit).to_list(limit)
+    sessions = await paginate(
+        db.checkin_sessions, query, sort_field="check_in_time", id_field="session_id",
+        limit=limit, cursor=cursor, response=response,
+    )
+    
+    customers = await fetch_by_ids(
+        db.customers, "customer_id", (s.get("customer_id") for s in sessions), SESSION_CUSTOMER_FIELDS,
+    )
     
     result = []
     for sess in sessions:
@@ -600,14 +612,6 @@ async def list_session_history(
         if isinstance(sess.get("check_out_time"), str):
             sess["check_out_time"] = datetime.fromisoformat(sess["check_out_time"])
         
-        customer = await db.customers.find_one({"customer_id": sess["customer_id"]}, {"_id": 0})
-        
-        response = CheckInSessionResponse(**sess)
-        if customer:
-            response.child_name = customer.get("child_name")
-            response.guardian_name = customer.get("guardian", {}).get("name")
-            response.guardian_phone = customer.get("guardian", {}).get("phone")
-        
-        result.append(response)
+        result.append(_apply_customer(CheckInSessionResponse(**sess), customers.get(sess["customer_id"])))
     
     return result
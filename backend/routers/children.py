@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Response
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from typing import List, Optional
 from models.child import Child, ChildCreate, ChildUpdate, ChildResponse
 from middleware.auth import get_current_user, require_role
+from services.household_graph import householdGraph
+from utils.pagination import paginate
 from datetime import datetime, timezone, date
 
 router = APIRouter(prefix="/children", tags=["Children"])
@@ -13,8 +15,6 @@ def get_db():
     return db
 
 
-
-
 def _normalize_household_id(value: Optional[str]) -> Optional[str]:
     if value is None:
         return None
@@ -27,8 +27,7 @@ async def _ensure_household_exists(db: AsyncIOMotorDatabase, household_id: Optio
     if not normalized:
         return None
 
-    existing = await db.households.find_one({"household_id": normalized}, {"_id": 0, "household_id": 1})
-    if not existing:
+    if not await householdGraph.household(db, normalized):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="الأسرة المرتبطة غير موجودة"
@@ -45,6 +44,9 @@ def calculate_age(birth_date: date) -> int:
 @router.get("", response_model=List[ChildResponse])
 async def list_children(
     guardian_id: Optional[str] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    response: Response = None,
     user: dict = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
@@ -60,7 +62,10 @@ async def list_children(
     elif guardian_id:
         query["guardian_id"] = guardian_id
     
-    children = await db.children.find(query, {"_id": 0}).sort("created_at", -1).to_list(100)
+    children = await paginate(
+        db.children, query, sort_field="created_at", id_field="child_id",
+        limit=limit, cursor=cursor, response=response,
+    )
     
     result = []
     for child in children:
@@ -104,6 +109,7 @@ async def create_child(
     child_dict["birth_date"] = child_dict["birth_date"].isoformat()
     
     await db.children.insert_one(child_dict)
+    householdGraph.invalidate_child(child_dict)
     
     response = ChildResponse(**child.model_dump())
     response.age_years = calculate_age(child.birth_date)
@@ -186,6 +192,7 @@ async def update_child(
             {"child_id": child_id},
             {"$set": update_data}
         )
+        householdGraph.invalidate_child(child)
     
     # Get updated child
     updated = await db.children.find_one({"child_id": child_id}, {"_id": 0})
@@ -233,6 +240,7 @@ async def create_child_by_staff(
     child_dict["birth_date"] = child_dict["birth_date"].isoformat()
     
     await db.children.insert_one(child_dict)
+    householdGraph.invalidate_child(child_dict)
     
     response = ChildResponse(**child.model_dump())
     response.age_years = calculate_age(child.birth_date)
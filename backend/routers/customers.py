@@ -1,10 +1,15 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Security
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Security, Response
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from typing import List, Optional
-from models.customer import Customer, CustomerCreate, CustomerUpdate, CustomerResponse, WaiverAcceptance, GuardianInfo
+from models.customer import Customer, CustomerCreate, CustomerUpdate, CustomerResponse, CustomerSearchResult, WaiverAcceptance, GuardianInfo
 from middleware.auth import get_current_user, require_role
+from utils.pagination import DEFAULT_PAGE_SIZE, paginate
 from constants.roles import FRONTDESK_ROLES
 from utils.audit import log_audit
+from services.customer_cache import customerCardCache
+from services.household_graph import householdGraph
+from services.customer_search import TYPEAHEAD_MAX_TIME_MS, backfill_search_fields, build_search_fields, customer_search_filter, searchBackfill
+from pymongo.errors import ExecutionTimeout
 from datetime import datetime, timezone, date
 from dateutil.relativedelta import relativedelta
 
@@ -29,30 +34,58 @@ def validate_child_age(dob: date) -> bool:
     return age_months <= 48  # 4 years = 48 months
 
 
-
-
 def _safe_list(value) -> list:
     return value if isinstance(value, list) else []
 
 
-async def _hydrate_household_context(db: AsyncIOMotorDatabase, customer: dict) -> dict:
-    """Attach lightweight household context for admin/reception clarity and parent-safe linkage."""
-    household_id = customer.get("household_id")
-    if not household_id:
-        customer.setdefault("household_primary_guardian", None)
-        customer.setdefault("household_children_count", 0)
-        customer.setdefault("household_customer_count", 1)
-        return customer
+async def _hydrate_customers(db: AsyncIOMotorDatabase, customers: List[dict]) -> List[dict]:
+    """
+    Attach active-subscription and household context to a page of customers.
 
-    household = await db.households.find_one({"household_id": household_id}, {"_id": 0})
-    household_children = _safe_list((household or {}).get("children"))
+    Uses one `$in` on subscriptions regardless of page size. Household context
+    comes from the household graph, which costs two more `$in` queries only for
+    households it has not loaded yet.
+    """
+    if not customers:
+        return customers
 
-    linked_customers_count = await db.customers.count_documents({"household_id": household_id})
+    customer_ids = [c["customer_id"] for c in customers if c.get("customer_id")]
+    household_ids = list({c["household_id"] for c in customers if c.get("household_id")})
 
-    customer["household_primary_guardian"] = (household or {}).get("primary_guardian")
-    customer["household_children_count"] = len(household_children)
-    customer["household_customer_count"] = max(1, linked_customers_count)
-    return customer
+    subscriptions = await db.subscriptions.find({
+        "customer_id": {"$in": customer_ids},
+        "status": "ACTIVE",
+        "expires_at": {"$gt": datetime.now(timezone.utc).isoformat()}
+    }, {"_id": 0, "customer_id": 1, "expires_at": 1}).to_list(None)
+    # Keep the longest-running active subscription per customer
+    subscription_by_customer = {}
+    for subscription in subscriptions:
+        current = subscription_by_customer.get(subscription["customer_id"])
+        if current is None or str(subscription.get("expires_at")) > str(current.get("expires_at")):
+            subscription_by_customer[subscription["customer_id"]] = subscription
+
+    households_by_id = await householdGraph.households(db, household_ids)
+
+    for customer in customers:
+        subscription = subscription_by_customer.get(customer.get("customer_id"))
+        if subscription:
+            customer["has_active_subscription"] = True
+            if isinstance(subscription.get("expires_at"), str):
+                customer["subscription_expires_at"] = datetime.fromisoformat(subscription["expires_at"])
+
+        household_id = customer.get("household_id")
+        if not household_id:
+            customer.setdefault("household_primary_guardian", None)
+            customer.setdefault("household_children_count", 0)
+            customer.setdefault("household_customer_count", 1)
+            continue
+
+        household = households_by_id.get(household_id) or {}
+        customer["household_primary_guardian"] = household.get("primary_guardian")
+        customer["household_children_count"] = len(_safe_list(household.get("children")))
+        customer["household_customer_count"] = max(1, len(household.get("customer_ids", [])))
+
+    return customers
 
 
 def normalize_guardian_contacts(guardian: GuardianInfo) -> GuardianInfo:
@@ -73,7 +106,9 @@ async def list_customers(
     status_filter: Optional[str] = None,
     search: Optional[str] = None,
     household_id: Optional[str] = None,
-    limit: int = 50,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    response: Response = None,
     user: dict = Security(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
@@ -94,18 +129,18 @@ async def list_customers(
     if household_id:
         query["household_id"] = household_id
 
-    # Search by name or card
+    # Search by name, phone suffix or card prefix
     if search:
-        query["$or"] = [
-            {"child_name": {"$regex": search, "$options": "i"}},
-            {"card_number": {"$regex": search, "$options": "i"}},
-            {"guardian.name": {"$regex": search, "$options": "i"}},
-            {"guardian.phone": {"$regex": search, "$options": "i"}}
-        ]
+        search_filter = await customer_search_filter(db, search)
+        if search_filter is None:
+            return []
+        query.update(search_filter)
     
-    customers = await db.customers.find(query, {"_id": 0}).sort("created_at", -1).limit(limit).to_list(limit)
+    customers = await paginate(
+        db.customers, query, sort_field="created_at", id_field="customer_id",
+        limit=limit, cursor=cursor, response=response,
+    )
     
-    result = []
     for cust in customers:
         # Parse dates
         if isinstance(cust.get("created_at"), str):
@@ -119,23 +154,9 @@ async def list_customers(
         
         # Calculate age
         cust["child_age_months"] = calculate_age_months(cust["child_dob"])
-        
-        # Check for active subscription
-        subscription = await db.subscriptions.find_one({
-            "customer_id": cust["customer_id"],
-            "status": "ACTIVE",
-            "expires_at": {"$gt": datetime.now(timezone.utc).isoformat()}
-        }, {"_id": 0})
-        
-        if subscription:
-            cust["has_active_subscription"] = True
-            if isinstance(subscription.get("expires_at"), str):
-                cust["subscription_expires_at"] = datetime.fromisoformat(subscription["expires_at"])
 
-        cust = await _hydrate_household_context(db, cust)
-        result.append(CustomerResponse(**cust))
-    
-    return result
+    await _hydrate_customers(db, customers)
+    return [CustomerResponse(**cust) for cust in customers]
 
 
 @router.post("", response_model=CustomerResponse, status_code=status.HTTP_201_CREATED)
@@ -170,8 +191,7 @@ async def register_customer(
     
     # Ensure optional household linkage points to an existing household record
     if customer_data.household_id:
-        household_exists = await db.households.find_one({"household_id": customer_data.household_id}, {"_id": 0, "household_id": 1})
-        if not household_exists:
+        if not await householdGraph.household(db, customer_data.household_id):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="الأسرة المرتبطة غير موجودة"
@@ -198,8 +218,11 @@ async def register_customer(
     customer_dict["updated_at"] = customer_dict["updated_at"].isoformat()
     customer_dict["child_dob"] = customer_dict["child_dob"].isoformat()
     customer_dict["guardian"] = dict(customer_dict["guardian"])
+    customer_dict.update(build_search_fields(customer_dict))
     
     await db.customers.insert_one(customer_dict)
+    customerCardCache.invalidate_card(customer.card_number)
+    householdGraph.invalidate_customer(customer_dict)
     
     # Audit log
     await log_audit(
@@ -214,6 +237,65 @@ async def register_customer(
     return response
 
 
+@router.get("/search", response_model=List[CustomerSearchResult])
+async def search_customers(
+    q: str = Query(..., min_length=1, max_length=64),
+    branch_id: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=25),
+    user: dict = Security(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Type-ahead search by child/guardian name prefix, phone suffix or card prefix"""
+    search_filter = await customer_search_filter(db, q)
+    if search_filter is None:
+        return []
+
+    query = dict(search_filter)
+    if branch_id:
+        query["branch_id"] = branch_id
+    elif user.get("role") not in ["ADMIN"] and user.get("branch_id"):
+        query["branch_id"] = user["branch_id"]
+
+    projection = {
+        "_id": 0, "customer_id": 1, "card_number": 1, "child_name": 1,
+        "guardian.name": 1, "guardian.phone": 1, "branch_id": 1, "status": 1,
+    }
+    # No index serves a sort across the prefix clauses, so take the first `limit`
+    # matches and order just those; an unsorted limit stops after `limit` keys.
+    try:
+        matches = await db.customers.find(query, projection) \
+            .limit(limit) \
+            .max_time_ms(TYPEAHEAD_MAX_TIME_MS) \
+            .to_list(limit)
+    except ExecutionTimeout:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Search timed out, type more characters to narrow it"
+        )
+    matches.sort(key=lambda match: (match.get("child_name") or "", match.get("customer_id") or ""))
+
+    return [
+        CustomerSearchResult(
+            **match,
+            guardian_name=(match.get("guardian") or {}).get("name"),
+            guardian_phone=(match.get("guardian") or {}).get("phone"),
+        )
+        for match in matches
+    ]
+
+
+@router.post("/search/reindex")
+async def reindex_customer_search(
+    full: bool = False,
+    user: dict = Depends(require_role("ADMIN")),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Backfill search keys for customers created before search indexing (or all with full=true)"""
+    updated = await backfill_search_fields(db, only_missing=not full)
+    searchBackfill.mark_complete()
+    return {"success": True, "updated": updated}
+
+
 @router.get("/card/{card_number}", response_model=CustomerResponse)
 async def get_customer_by_card(
     card_number: str,
@@ -221,7 +303,7 @@ async def get_customer_by_card(
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """Get customer by card number (for scanning)"""
-    customer = await db.customers.find_one({"card_number": card_number}, {"_id": 0})
+    customer = await customerCardCache.get_by_card(db, card_number)
     if not customer:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -241,19 +323,7 @@ async def get_customer_by_card(
     # Calculate age
     customer["child_age_months"] = calculate_age_months(customer["child_dob"])
     
-    # Check for active subscription
-    subscription = await db.subscriptions.find_one({
-        "customer_id": customer["customer_id"],
-        "status": "ACTIVE",
-        "expires_at": {"$gt": datetime.now(timezone.utc).isoformat()}
-    }, {"_id": 0})
-    
-    if subscription:
-        customer["has_active_subscription"] = True
-        if isinstance(subscription.get("expires_at"), str):
-            customer["subscription_expires_at"] = datetime.fromisoformat(subscription["expires_at"])
-
-    customer = await _hydrate_household_context(db, customer)
+    await _hydrate_customers(db, [customer])
     return CustomerResponse(**customer)
 
 
@@ -283,19 +353,7 @@ async def get_customer(
     
     customer["child_age_months"] = calculate_age_months(customer["child_dob"])
     
-    # Check subscription
-    subscription = await db.subscriptions.find_one({
-        "customer_id": customer_id,
-        "status": "ACTIVE",
-        "expires_at": {"$gt": datetime.now(timezone.utc).isoformat()}
-    }, {"_id": 0})
-    
-    if subscription:
-        customer["has_active_subscription"] = True
-        if isinstance(subscription.get("expires_at"), str):
-            customer["subscription_expires_at"] = datetime.fromisoformat(subscription["expires_at"])
-
-    customer = await _hydrate_household_context(db, customer)
+    await _hydrate_customers(db, [customer])
     return CustomerResponse(**customer)
 
 
@@ -322,8 +380,7 @@ async def update_customer(
         )
     
     if updates.household_id:
-        household_exists = await db.households.find_one({"household_id": updates.household_id}, {"_id": 0, "household_id": 1})
-        if not household_exists:
+        if not await householdGraph.household(db, updates.household_id):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="الأسرة المرتبطة غير موجودة"
@@ -350,11 +407,15 @@ async def update_customer(
         update_data["status"] = updates.status
     
     if update_data:
+        if "child_name" in update_data or "guardian" in update_data:
+            update_data.update(build_search_fields({**existing, **update_data}))
         update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
         await db.customers.update_one(
             {"customer_id": customer_id},
             {"$set": update_data}
         )
+        customerCardCache.invalidate_card(existing.get("card_number"))
+        householdGraph.invalidate_customer(existing, update_data)
         
         await log_audit(
             db, "CUSTOMER", customer_id, "UPDATED",
@@ -404,6 +465,7 @@ async def accept_waiver(
         {"customer_id": customer_id},
         {"$set": update_data}
     )
+    customerCardCache.invalidate_card(existing.get("card_number"))
     
     await log_audit(
         db, "CUSTOMER", customer_id, "WAIVER_ACCEPTED",
@@ -1,8 +1,12 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Response
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from middleware.auth import require_role
+from services.household_graph import householdGraph
+from services.parent_feed import parentFeed
+from services.report_jobs import PENDING_DESCRIPTION, PENDING_DESCRIPTION_EN, report_feed_id, reportJobs
+from utils.pagination import paginate
 from datetime import datetime, timezone
 import uuid
 
@@ -22,6 +26,10 @@ class DailyReportCreate(BaseModel):
     photo_url: Optional[str] = None
 
 
+class DailyReportBatchCreate(BaseModel):
+    reports: List[DailyReportCreate] = Field(..., min_length=1, max_length=60)
+
+
 class ReplyCreate(BaseModel):
     text: str = Field(..., min_length=1, max_length=1000)
 
@@ -44,6 +52,7 @@ class DailyReportResponse(BaseModel):
     photo_url: Optional[str] = None
     report_ar: str
     report_en: str
+    status: str = "READY"  # PENDING | GENERATING | READY | FAILED
     session_id: Optional[str] = None
     replies: List[ReplyItem] = []
     created_at: str
@@ -51,95 +60,122 @@ class DailyReportResponse(BaseModel):
 
 # ── Endpoints ──
 
-@router.post("", response_model=DailyReportResponse, status_code=status.HTTP_201_CREATED)
+async def _active_sessions_by_child(db: AsyncIOMotorDatabase, child_ids: List[str]) -> dict:
+    """Latest active session per child: play sessions first, then check-in sessions."""
+    sessions = await db.sessions.find(
+        {"child_id": {"$in": child_ids}, "state": {"$in": ["CHECKED_IN", "ACTIVE", "OVERDUE"]}},
+        {"_id": 0, "child_id": 1, "session_id": 1},
+    ).sort("checkin_at", -1).to_list(len(child_ids) * 4)
+    by_child = {}
+    for sess in sessions:
+        by_child.setdefault(sess["child_id"], sess["session_id"])
+
+    missing = [child_id for child_id in child_ids if child_id not in by_child]
+    if missing:
+        checkins = await db.checkin_sessions.find(
+            {"child_id": {"$in": missing}, "status": {"$in": ["CHECKED_IN", "ACTIVE"]}},
+            {"_id": 0, "child_id": 1, "session_id": 1},
+        ).sort("check_in_time", -1).to_list(len(missing) * 4)
+        for sess in checkins:
+            by_child.setdefault(sess["child_id"], sess["session_id"])
+    return by_child
+
+
+async def _create_pending_reports(db: AsyncIOMotorDatabase, bodies: List[DailyReportCreate], user: dict) -> List[dict]:
+    """
+    Insert PENDING reports and their feed items, then hand them to the report workers.
+
+    Child names, active sessions and guardians are resolved for the whole batch
+    with one query each.
+    """
+    child_ids = list(dict.fromkeys(body.child_id for body in bodies))
+    unnamed = list({body.child_id for body in bodies if not body.child_name})
+    names = {}
+    if unnamed:
+        children = await db.children.find(
+            {"child_id": {"$in": unnamed}}, {"_id": 0, "child_id": 1, "full_name": 1, "name": 1},
+        ).to_list(len(unnamed))
+        names = {c["child_id"]: c.get("full_name") or c.get("name") for c in children}
+    sessions = await _active_sessions_by_child(db, child_ids)
+    guardians = await parentFeed.guardians_for_children(db, child_ids)
+
+    now = datetime.now(timezone.utc).isoformat()
+    reports = []
+    for body in bodies:
+        reports.append({
+            "report_id": str(uuid.uuid4()),
+            "child_id": body.child_id,
+            "child_name": body.child_name or names.get(body.child_id) or f"Child {body.child_id}",
+            "teacher_id": user.get("user_id", ""),
+            "teacher_name": user.get("display_name") or user.get("email", "Teacher"),
+            "notes": body.notes,
+            "photo_url": body.photo_url,
+            # Placeholder text until a worker stores the generated summary
+            "report_ar": PENDING_DESCRIPTION,
+            "report_en": PENDING_DESCRIPTION_EN,
+            "status": "PENDING",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "session_id": sessions.get(body.child_id),
+            "replies": [],
+            "created_at": now,
+        })
+
+    await db.daily_reports.insert_many([dict(report) for report in reports])
+    reportJobs.notify()
+
+    # Fan out to the guardians' timelines in one bulk write; the description is filled in once generated
+    await parentFeed.publish_many(db, [
+        (
+            {
+                "id": report_feed_id(report["report_id"]),
+                "child_id": report["child_id"],
+                "type": "daily_report",
+                "title": "تقرير يومي جديد",
+                "description": PENDING_DESCRIPTION,
+                "status": "PENDING",
+                "photo_url": report["photo_url"],
+                "created_at": now,
+            },
+            [guardians[report["child_id"]]] if guardians.get(report["child_id"]) else [],
+        )
+        for report in reports
+    ])
+
+    return reports
+
+
+@router.post("", response_model=DailyReportResponse, status_code=status.HTTP_202_ACCEPTED)
 async def create_daily_report(
     body: DailyReportCreate,
     user: dict = Depends(require_role("ADMIN", "STAFF")),
     db: AsyncIOMotorDatabase = Depends(get_db),
 ):
-    """Teacher creates a daily report. Gemini generates bilingual summary. Auto-links to active session."""
+    """
+    Teacher creates a daily report. Auto-links to active session.
+
+    Returns 202 immediately with status PENDING and placeholder text; the
+    bilingual summary is generated in the background and the report becomes
+    READY (or FAILED, with the notes as fallback text). Poll GET /{report_id}.
+    """
     if db is None:
         raise HTTPException(status_code=503, detail="Database not available")
 
-    # Resolve child name if not provided
-    child_name = body.child_name
-    if not child_name:
-        child_doc = await db.children.find_one({"child_id": body.child_id}, {"_id": 0, "full_name": 1, "name": 1})
-        child_name = (child_doc or {}).get("full_name") or (child_doc or {}).get("name") or f"Child {body.child_id}"
-
-    # Auto-link to active session for this child
-    session_id = None
-    active_session = await db.sessions.find_one(
-        {"child_id": body.child_id, "state": {"$in": ["CHECKED_IN", "ACTIVE", "OVERDUE"]}},
-        {"_id": 0, "session_id": 1},
-        sort=[("checkin_at", -1)],
-    )
-    if active_session:
-        session_id = active_session.get("session_id")
-    else:
-        # Also check checkin_sessions collection
-        active_checkin = await db.checkin_sessions.find_one(
-            {"child_id": body.child_id, "status": {"$in": ["CHECKED_IN", "ACTIVE"]}},
-            {"_id": 0, "session_id": 1},
-            sort=[("check_in_time", -1)],
-        )
-        if active_checkin:
-            session_id = active_checkin.get("session_id")
-
-    # Generate bilingual report via Gemini
-    from services.gemini_service import generate_daily_report
-    generated = await generate_daily_report(
-        child_name=child_name,
-        teacher_notes=body.notes,
-        photo_url=body.photo_url,
-    )
+    reports = await _create_pending_reports(db, [body], user)
+    return reports[0]
 
-    report_id = str(uuid.uuid4())
-    now = datetime.now(timezone.utc).isoformat()
 
-    report_doc = {
-        "report_id": report_id,
-        "child_id": body.child_id,
-        "child_name": child_name,
-        "teacher_id": user.get("user_id", ""),
-        "teacher_name": user.get("display_name") or user.get("email", "Teacher"),
-        "notes": body.notes,
-        "photo_url": body.photo_url,
-        "report_ar": generated["report_ar"],
-        "report_en": generated["report_en"],
-        "session_id": session_id,
-        "replies": [],
-        "created_at": now,
-    }
+@router.post("/batch", response_model=List[DailyReportResponse], status_code=status.HTTP_202_ACCEPTED)
+async def create_daily_reports_batch(
+    body: DailyReportBatchCreate,
+    user: dict = Depends(require_role("ADMIN", "STAFF")),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+):
+    """End-of-day mode: queue a whole classroom's reports in one request."""
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database not available")
 
-    await db.daily_reports.insert_one(report_doc)
-
-    # Also push to parent_feed so it appears in parent's feed
-    feed_item = {
-        "id": f"report-{report_id}",
-        "child_id": body.child_id,
-        "type": "daily_report",
-        "title": "تقرير يومي جديد",
-        "description": generated["report_ar"][:200],
-        "photo_url": body.photo_url,
-        "created_at": now,
-    }
-    await db.parent_feed.insert_one(feed_item)
-
-    return {
-        "report_id": report_id,
-        "child_id": body.child_id,
-        "child_name": child_name,
-        "teacher_id": report_doc["teacher_id"],
-        "teacher_name": report_doc["teacher_name"],
-        "notes": body.notes,
-        "photo_url": body.photo_url,
-        "report_ar": generated["report_ar"],
-        "report_en": generated["report_en"],
-        "session_id": session_id,
-        "replies": [],
-        "created_at": now,
-    }
+    return await _create_pending_reports(db, body.reports, user)
 
 
 @router.get("/{report_id}", response_model=DailyReportResponse)
@@ -193,6 +229,9 @@ async def add_reply(
 @router.get("/child/{child_id}", response_model=List[DailyReportResponse])
 async def get_child_reports(
     child_id: str,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    response: Response = None,
     user: dict = Depends(require_role("PARENT", "ADMIN", "STAFF")),
     db: AsyncIOMotorDatabase = Depends(get_db),
 ):
@@ -200,16 +239,19 @@ async def get_child_reports(
     if db is None:
         return []
 
-    reports = await db.daily_reports.find(
-        {"child_id": child_id},
-        {"_id": 0},
-    ).sort("created_at", -1).to_list(length=100)
+    reports = await paginate(
+        db.daily_reports, {"child_id": child_id}, sort_field="created_at", id_field="report_id",
+        limit=limit, cursor=cursor, response=response,
+    )
 
     return reports
 
 
 @router.get("", response_model=List[DailyReportResponse])
 async def list_reports(
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    response: Response = None,
     user: dict = Depends(require_role("ADMIN", "STAFF", "PARENT")),
     db: AsyncIOMotorDatabase = Depends(get_db),
 ):
@@ -220,20 +262,16 @@ async def list_reports(
     role = user.get("role", "").upper()
 
     if role == "PARENT":
-        children = await db.children.find(
-            {"guardian_id": user.get("user_id")},
-            {"_id": 0, "child_id": 1},
-        ).to_list(length=20)
-        child_ids = [c.get("child_id") for c in children if c.get("child_id")]
+        child_ids = await householdGraph.child_ids_for_guardian(db, user.get("user_id"))
         if not child_ids:
             return []
         query = {"child_id": {"$in": child_ids}}
     else:
         query = {"teacher_id": user.get("user_id", "")}
 
-    reports = await db.daily_reports.find(
-        query,
-        {"_id": 0},
-    ).sort("created_at", -1).to_list(length=100)
+    reports = await paginate(
+        db.daily_reports, query, sort_field="created_at", id_field="report_id",
+        limit=limit, cursor=cursor, response=response,
+    )
 
     return reports
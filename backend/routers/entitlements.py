@@ -4,6 +4,7 @@ from typing import List, Optional
 from models.entitlement import EntitlementUsage, EntitlementUsageCreate, EntitlementUsageResponse, EntitlementCheck
 from models.subscription import PLAN_TIME_WINDOWS
 from middleware.auth import get_current_user, require_role
+from utils.concurrency import gather_lookups
 from datetime import datetime, timezone, date, timedelta
 
 router = APIRouter(prefix="/entitlements", tags=["Entitlements"])
@@ -30,12 +31,23 @@ async def check_entitlement(
     now = datetime.now(timezone.utc)
     today = date.today()
     
-    # Check for active subscription
-    sub = await db.subscriptions.find_one({
-        "child_id": child_id,
-        "status": "ACTIVE",
-        "expires_at": {"$gt": now.isoformat()}
-    }, {"_id": 0})
+    # Candidates are checked in priority order below, but read concurrently
+    sub, pending_sub, pack = await gather_lookups(
+        db.subscriptions.find_one({
+            "child_id": child_id,
+            "status": "ACTIVE",
+            "expires_at": {"$gt": now.isoformat()}
+        }, {"_id": 0}),
+        db.subscriptions.find_one({
+            "child_id": child_id,
+            "status": "PENDING"
+        }, {"_id": 0}),
+        db.visit_packs.find_one({
+            "child_id": child_id,
+            "status": "ACTIVE",
+            "remaining_visits": {"$gt": 0}
+        }, {"_id": 0}),
+    )
     
     if sub:
         # Check time window
@@ -79,12 +91,7 @@ async def check_entitlement(
             peekaboo_minutes_remaining=peekaboo_minutes_remaining if plan_type == "MONTHLY_ALL_ACCESS" else None
         )
     
-    # Check for pending subscription (can be activated)
-    pending_sub = await db.subscriptions.find_one({
-        "child_id": child_id,
-        "status": "PENDING"
-    }, {"_id": 0})
-    
+    # Pending subscription (can be activated)
     if pending_sub:
         return EntitlementCheck(
             can_access=True,
@@ -93,13 +100,7 @@ async def check_entitlement(
             subscription_id=pending_sub["subscription_id"]
         )
     
-    # Check for active visit pack
-    pack = await db.visit_packs.find_one({
-        "child_id": child_id,
-        "status": "ACTIVE",
-        "remaining_visits": {"$gt": 0}
-    }, {"_id": 0})
-    
+    # Active visit pack
     if pack:
         return EntitlementCheck(
             can_access=True,
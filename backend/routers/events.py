@@ -3,6 +3,8 @@ from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
 from middleware.auth import get_current_user
 from models.event_booking import (
@@ -25,16 +27,28 @@ def get_db():
     return db
 
 
-async def build_event_response(db: AsyncIOMotorDatabase, event_doc: dict) -> EventResponse:
-    bookings = await db.event_registrations.find(
-        {"event_id": event_doc["id"], "status": "booked"},
-        {"_id": 0, "customer_id": 1},
-    ).to_list(500)
-    booked_customers = [booking.get("customer_id") for booking in bookings if booking.get("customer_id")]
+async def booked_customers_by_event(db: AsyncIOMotorDatabase, event_ids: List[str]) -> dict:
+    """Booked customer ids for many events in one $group aggregation."""
+    if not event_ids:
+        return {}
+    rows = await db.event_registrations.aggregate([
+        {"$match": {"event_id": {"$in": event_ids}, "status": "booked"}},
+        {"$group": {"_id": "$event_id", "customers": {"$push": "$customer_id"}}},
+    ]).to_list(None)
+    return {row["_id"]: [c for c in row["customers"] if c] for row in rows}
+
+
+async def build_event_response(
+    db: AsyncIOMotorDatabase,
+    event_doc: dict,
+    booked_customers: Optional[List[str]] = None,
+) -> EventResponse:
+    if booked_customers is None:
+        booked_customers = (await booked_customers_by_event(db, [event_doc["id"]])).get(event_doc["id"], [])
     booked_count = len(booked_customers)
     remaining_capacity = max(event_doc["capacity"] - booked_count, 0)
     return EventResponse(
-        **event_doc,
+        **{k: v for k, v in event_doc.items() if k != "booked_count"},
         bookedCount=booked_count,
         usedCapacity=booked_count,
         remainingCapacity=remaining_capacity,
@@ -53,6 +67,7 @@ async def create_event(
     event_doc["date"] = event_doc["date"].isoformat()
     event_doc["created_at"] = event_doc["created_at"].isoformat()
     event_doc["updated_at"] = event_doc["updated_at"].isoformat()
+    event_doc["booked_count"] = 0
 
     await db.events.insert_one(event_doc)
 
@@ -78,16 +93,26 @@ async def list_events(
         query["date"] = event_date.isoformat()
 
     events = await db.events.find(query, {"_id": 0}).sort("date", 1).to_list(200)
+    booked_by_event = await booked_customers_by_event(db, [event["id"] for event in events])
 
     responses = []
     for event in events:
         if isinstance(event.get("date"), str):
             event["date"] = date.fromisoformat(event["date"])
-        responses.append(await build_event_response(db, event))
+        responses.append(await build_event_response(db, event, booked_by_event.get(event["id"], [])))
 
     return responses
 
 
+async def _initialize_booked_count(db: AsyncIOMotorDatabase, event_id: str) -> None:
+    """Seed the seat counter on events created before booked_count existed."""
+    booked = await db.event_registrations.count_documents({"event_id": event_id, "status": "booked"})
+    await db.events.update_one(
+        {"id": event_id, "booked_count": {"$exists": False}},
+        {"$set": {"booked_count": booked}},
+    )
+
+
 @router.post("/book")
 async def book_event(
     payload: EventBookRequest,
@@ -101,35 +126,54 @@ async def book_event(
     if event["status"] == "cancelled":
         raise HTTPException(status_code=400, detail="Event is cancelled")
 
-    active_bookings = await db.event_registrations.count_documents(
-        {"event_id": payload.event_id, "status": "booked"}
-    )
-    if active_bookings >= event["capacity"]:
-        await db.events.update_one({"id": payload.event_id}, {"$set": {"status": "full", "updated_at": datetime.utcnow().isoformat()}})
-        raise HTTPException(status_code=400, detail="Event has reached capacity")
-
-    if event.get("status") == "full":
-        await db.events.update_one({"id": payload.event_id}, {"$set": {"status": "scheduled", "updated_at": datetime.utcnow().isoformat()}})
-
     existing = await db.event_registrations.find_one(
-        {"event_id": payload.event_id, "customer_id": payload.customer_id, "status": "booked"}
+        {"event_id": payload.event_id, "customer_id": payload.customer_id, "status": "booked"},
+        {"_id": 0, "id": 1},
     )
     if existing:
         raise HTTPException(status_code=400, detail="Customer already booked")
 
+    if "booked_count" not in event:
+        await _initialize_booked_count(db, payload.event_id)
+
+    # Reserve a seat: the capacity guard and the increment are one atomic update,
+    # compared against the stored capacity in case an admin changed it meanwhile
+    reserved = await db.events.find_one_and_update(
+        {"id": payload.event_id, "status": {"$ne": "cancelled"}, "$expr": {"$lt": ["$booked_count", "$capacity"]}},
+        {"$inc": {"booked_count": 1}, "$set": {"updated_at": datetime.utcnow().isoformat()}},
+        projection={"_id": 0, "booked_count": 1, "capacity": 1, "status": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    if not reserved:
+        await db.events.update_one(
+            {"id": payload.event_id, "status": "scheduled"},
+            {"$set": {"status": "full", "updated_at": datetime.utcnow().isoformat()}},
+        )
+        raise HTTPException(status_code=400, detail="Event has reached capacity")
+
     booking = EventBookingRecord(eventId=payload.event_id, customerId=payload.customer_id)
     booking_doc = booking.model_dump(by_alias=False)
     booking_doc["created_at"] = booking_doc["created_at"].isoformat()
     booking_doc["updated_at"] = booking_doc["updated_at"].isoformat()
     booking_doc["created_by"] = user.get("user_id")
 
-    await db.event_registrations.insert_one(booking_doc)
-
-    latest_count = await db.event_registrations.count_documents(
-        {"event_id": payload.event_id, "status": "booked"}
-    )
-    if latest_count >= event["capacity"]:
-        await db.events.update_one({"id": payload.event_id}, {"$set": {"status": "full", "updated_at": datetime.utcnow().isoformat()}})
+    recorded = False
+    try:
+        await db.event_registrations.insert_one(booking_doc)
+        recorded = True
+    except DuplicateKeyError:
+        # A concurrent request booked the same customer first
+        raise HTTPException(status_code=400, detail="Customer already booked")
+    finally:
+        if not recorded:
+            # Whatever stopped the booking being written, give back the reserved seat
+            await db.events.update_one({"id": payload.event_id}, {"$inc": {"booked_count": -1}})
+
+    if reserved["booked_count"] >= reserved["capacity"]:
+        await db.events.update_one(
+            {"id": payload.event_id, "status": "scheduled", "$expr": {"$gte": ["$booked_count", "$capacity"]}},
+            {"$set": {"status": "full", "updated_at": datetime.utcnow().isoformat()}},
+        )
 
     await maybe_send_whatsapp_notification(
         db,
@@ -162,6 +206,10 @@ async def cancel_event_booking(
         if result.modified_count == 0:
             raise HTTPException(status_code=404, detail="Booking not found")
 
+        await db.events.update_one(
+            {"id": payload.event_id, "booked_count": {"$gt": 0}},
+            {"$inc": {"booked_count": -1}},
+        )
         await db.events.update_one({"id": payload.event_id}, {"$set": {"status": "scheduled", "updated_at": now}})
         await log_audit(
             db, "EVENT", payload.event_id, "STATUS_UPDATED",
@@ -176,7 +224,7 @@ async def cancel_event_booking(
         )
         return {"success": True, "message": "Booking cancelled"}
 
-    await db.events.update_one({"id": payload.event_id}, {"$set": {"status": "cancelled", "updated_at": now}})
+    await db.events.update_one({"id": payload.event_id}, {"$set": {"status": "cancelled", "booked_count": 0, "updated_at": now}})
     await db.event_registrations.update_many(
         {"event_id": payload.event_id, "status": "booked"},
         {"$set": {"status": "cancelled", "updated_at": now, "cancelled_by": user.get("user_id")}},
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Response
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 from models.household import Household, HouseholdCreate, HouseholdUpdate, HouseholdResponse
 from middleware.auth import get_current_user
+from services.household_graph import householdGraph
+from utils.pagination import paginate
 
 router = APIRouter(prefix="/households", tags=["Households"])
 
@@ -13,8 +15,6 @@ def get_db():
     return db
 
 
-
-
 def _ensure_list(value):
     return value if isinstance(value, list) else []
 
@@ -29,10 +29,16 @@ def _normalize_household_payload(payload: dict) -> dict:
 
 @router.get("", response_model=List[HouseholdResponse])
 async def list_households(
+    limit: int = 200,
+    cursor: Optional[str] = None,
+    response: Response = None,
     user: dict = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_db),
 ):
-    households = await db.households.find({}, {"_id": 0}).sort("created_at", -1).to_list(200)
+    households = await paginate(
+        db.households, {}, sort_field="created_at", id_field="household_id",
+        limit=limit, cursor=cursor, response=response,
+    )
     parsed = []
     for household in households:
         if isinstance(household.get("created_at"), str):
@@ -64,7 +70,7 @@ async def get_household(
     user: dict = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_db),
 ):
-    household = await db.households.find_one({"household_id": household_id}, {"_id": 0})
+    household = await householdGraph.household(db, household_id)
     if not household:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Household not found")
 
@@ -93,6 +99,7 @@ async def update_household(
     if update_data:
         update_data["updated_at"] = datetime.utcnow().isoformat()
         await db.households.update_one({"household_id": household_id}, {"$set": update_data})
+        householdGraph.invalidate_household(household_id)
 
     updated = await db.households.find_one({"household_id": household_id}, {"_id": 0})
     if isinstance(updated.get("created_at"), str):
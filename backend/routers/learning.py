@@ -1,8 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from middleware.auth import require_role
+from services import child_progress
+from services.household_graph import householdGraph
+from services.parent_feed import parentFeed
+from utils.pagination import paginate
 from datetime import datetime, timezone
 import uuid
 
@@ -51,6 +55,10 @@ class ObservationCreate(BaseModel):
     daily_report_id: Optional[str] = None
 
 
+class ObservationBulkCreate(BaseModel):
+    observations: List[ObservationCreate] = Field(..., min_length=1, max_length=200)
+
+
 class ObservationResponse(BaseModel):
     observation_id: str
     teacher_id: str
@@ -65,6 +73,24 @@ class ObservationResponse(BaseModel):
     created_at: str
 
 
+class CategoryProgress(BaseModel):
+    observations: int = 0
+    milestones: int = 0
+    last_observed_at: Optional[str] = None
+    last_milestone_at: Optional[str] = None
+
+
+class ChildProgressResponse(BaseModel):
+    child_id: str
+    school_year: str
+    child_name: Optional[str] = None
+    total_observations: int = 0
+    total_milestones: int = 0
+    first_observed_at: Optional[str] = None
+    last_observed_at: Optional[str] = None
+    categories: dict[str, CategoryProgress] = {}
+
+
 # ── Lesson Endpoints ──
 
 @router.post("/lessons", response_model=LessonResponse, status_code=201)
@@ -83,6 +109,7 @@ async def create_lesson(
         age_group=body.age_group,
         duration_minutes=body.duration_minutes,
         objectives=body.objectives,
+        db=db,
     )
 
     lesson_id = str(uuid.uuid4())
@@ -137,6 +164,69 @@ async def get_lesson(
 
 # ── Observation Endpoints ──
 
+def _child_name(child: Optional[dict]) -> Optional[str]:
+    return (child or {}).get("full_name") or (child or {}).get("name")
+
+
+async def _record_observations(db: AsyncIOMotorDatabase, bodies: List[ObservationCreate], user: dict) -> List[dict]:
+    """
+    Insert observations, update the child progress rollups and publish feed items.
+
+    Children (names and guardians) and active sessions are resolved for the whole
+    batch with one `$in` query each.
+    """
+    child_ids = list({body.child_id for body in bodies})
+    children = await db.children.find(
+        {"child_id": {"$in": child_ids}},
+        {"_id": 0, "child_id": 1, "full_name": 1, "name": 1, "guardian_id": 1},
+    ).to_list(len(child_ids))
+    children = {c["child_id"]: c for c in children}
+
+    # Auto-link to the latest active session where one was not provided
+    unlinked = list({body.child_id for body in bodies if not body.session_id})
+    sessions = {}
+    if unlinked:
+        active = await db.sessions.find(
+            {"child_id": {"$in": unlinked}, "state": {"$in": ["CHECKED_IN", "ACTIVE", "OVERDUE"]}},
+            {"_id": 0, "child_id": 1, "session_id": 1},
+        ).sort("checkin_at", -1).to_list(len(unlinked) * 4)
+        for sess in active:
+            sessions.setdefault(sess["child_id"], sess["session_id"])
+
+    now = datetime.now(timezone.utc).isoformat()
+    docs = []
+    for body in bodies:
+        docs.append({
+            "observation_id": str(uuid.uuid4()),
+            "teacher_id": user.get("user_id", ""),
+            "teacher_name": user.get("display_name") or user.get("email", "Teacher"),
+            "child_id": body.child_id,
+            "child_name": body.child_name or _child_name(children.get(body.child_id)) or f"Child {body.child_id}",
+            "category": body.category if body.category in OBSERVATION_CATEGORIES else "general",
+            "notes": body.notes,
+            "milestone": body.milestone,
+            "session_id": body.session_id or sessions.get(body.child_id),
+            "daily_report_id": body.daily_report_id,
+            "created_at": now,
+        })
+
+    await db.observations.insert_many([dict(doc) for doc in docs])
+    await child_progress.record_observations(db, docs)
+
+    await parentFeed.publish_many(db, [
+        ({
+            "id": f"observation-{doc['observation_id']}",
+            "child_id": doc["child_id"],
+            "type": "observation",
+            "title": "ملاحظة جديدة",
+            "description": doc["notes"][:200],
+            "created_at": now,
+        }, [(children.get(doc["child_id"]) or {}).get("guardian_id")])
+        for doc in docs
+    ])
+    return docs
+
+
 @router.post("/observations", response_model=ObservationResponse, status_code=201)
 async def create_observation(
     body: ObservationCreate,
@@ -147,47 +237,28 @@ async def create_observation(
     if db is None:
         raise HTTPException(status_code=503, detail="Database not available")
 
-    child_name = body.child_name
-    if not child_name:
-        child_doc = await db.children.find_one({"child_id": body.child_id}, {"_id": 0, "full_name": 1, "name": 1})
-        child_name = (child_doc or {}).get("full_name") or (child_doc or {}).get("name") or f"Child {body.child_id}"
-
-    # Auto-link to active session if not provided
-    session_id = body.session_id
-    if not session_id:
-        active = await db.sessions.find_one(
-            {"child_id": body.child_id, "state": {"$in": ["CHECKED_IN", "ACTIVE", "OVERDUE"]}},
-            {"_id": 0, "session_id": 1},
-            sort=[("checkin_at", -1)],
-        )
-        if active:
-            session_id = active.get("session_id")
-
-    observation_id = str(uuid.uuid4())
-    now = datetime.now(timezone.utc).isoformat()
+    docs = await _record_observations(db, [body], user)
+    return docs[0]
 
-    category = body.category if body.category in OBSERVATION_CATEGORIES else "general"
 
-    doc = {
-        "observation_id": observation_id,
-        "teacher_id": user.get("user_id", ""),
-        "teacher_name": user.get("display_name") or user.get("email", "Teacher"),
-        "child_id": body.child_id,
-        "child_name": child_name,
-        "category": category,
-        "notes": body.notes,
-        "milestone": body.milestone,
-        "session_id": session_id,
-        "daily_report_id": body.daily_report_id,
-        "created_at": now,
-    }
+@router.post("/observations/bulk", response_model=List[ObservationResponse], status_code=201)
+async def create_observations_bulk(
+    body: ObservationBulkCreate,
+    user: dict = Depends(require_role("ADMIN", "STAFF")),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+):
+    """Record a batch of observations (e.g. a whole activity group) in one request."""
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database not available")
 
-    await db.observations.insert_one(doc)
-    return doc
+    return await _record_observations(db, body.observations, user)
 
 
 @router.get("/observations", response_model=List[ObservationResponse])
 async def list_observations(
+    limit: int = 200,
+    cursor: Optional[str] = None,
+    response: Response = None,
     user: dict = Depends(require_role("ADMIN", "STAFF")),
     db: AsyncIOMotorDatabase = Depends(get_db),
 ):
@@ -197,20 +268,65 @@ async def list_observations(
     role = user.get("role", "").upper()
     query = {} if role == "ADMIN" else {"teacher_id": user.get("user_id", "")}
 
-    observations = await db.observations.find(query, {"_id": 0}).sort("created_at", -1).to_list(200)
+    observations = await paginate(
+        db.observations, query, sort_field="created_at", id_field="observation_id",
+        limit=limit, cursor=cursor, response=response,
+    )
     return observations
 
 
 @router.get("/observations/child/{child_id}", response_model=List[ObservationResponse])
 async def get_child_observations(
     child_id: str,
+    limit: int = 200,
+    cursor: Optional[str] = None,
+    response: Response = None,
     user: dict = Depends(require_role("ADMIN", "STAFF", "PARENT")),
     db: AsyncIOMotorDatabase = Depends(get_db),
 ):
     if db is None:
         return []
 
-    observations = await db.observations.find(
-        {"child_id": child_id}, {"_id": 0}
-    ).sort("created_at", -1).to_list(200)
+    observations = await paginate(
+        db.observations, {"child_id": child_id}, sort_field="created_at", id_field="observation_id",
+        limit=limit, cursor=cursor, response=response,
+    )
     return observations
+
+
+# ── Progress Endpoints ──
+
+@router.get("/progress/{child_id}", response_model=ChildProgressResponse)
+async def get_child_progress(
+    child_id: str,
+    school_year: Optional[str] = None,
+    user: dict = Depends(require_role("ADMIN", "STAFF", "PARENT")),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+):
+    """Per-category observation and milestone counts for one school year (default: current)."""
+    school_year = school_year or child_progress.current_school_year()
+    if db is None:
+        return ChildProgressResponse(child_id=child_id, school_year=school_year)
+
+    # Parents only see their own children; others' children look like they do not exist
+    if user.get("role", "").upper() == "PARENT":
+        if child_id not in await householdGraph.child_ids_for_guardian(db, user.get("user_id")):
+            raise HTTPException(status_code=404, detail="Child not found")
+
+    progress = await child_progress.get_progress(db, child_id, school_year)
+    if not progress:
+        return ChildProgressResponse(child_id=child_id, school_year=school_year)
+    return progress
+
+
+@router.post("/progress/rebuild")
+async def rebuild_child_progress(
+    user: dict = Depends(require_role("ADMIN")),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+):
+    """Recompute all progress rollups from the observations collection."""
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database not available")
+
+    rebuilt = await child_progress.rebuild(db)
+    return {"rebuilt": rebuilt}
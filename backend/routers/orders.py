@@ -1,11 +1,15 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Response
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from typing import List, Optional
 from models.order import Order, OrderCreate, OrderItem, OrderResponse, PaymentCreate, Payment
 from models.session import Session
 from middleware.auth import get_current_user, require_role
+from utils.pagination import DEFAULT_PAGE_SIZE, paginate
+from utils.concurrency import gather_lookups
+from utils.lookups import fetch_by_ids
 from utils.audit import log_audit
 from services.event_logger import eventLogger
+from services.parent_feed import parentFeed
 from datetime import datetime, timezone, timedelta
 import random
 
@@ -76,7 +80,9 @@ async def activate_play_session_for_order(order: dict, user: dict, db: AsyncIOMo
 async def list_orders(
     guardian_id: Optional[str] = None,
     status_filter: Optional[str] = None,
-    limit: int = 50,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    response: Response = None,
     user: dict = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
@@ -90,7 +96,14 @@ async def list_orders(
     if status_filter:
         query["status"] = status_filter
 
-    orders = await db.orders.find(query, {"_id": 0}).sort("created_at", -1).limit(limit).to_list(limit)
+    orders = await paginate(
+        db.orders, query, sort_field="created_at", id_field="order_id",
+        limit=limit, cursor=cursor, response=response,
+    )
+    guardians, children = await gather_lookups(
+        fetch_by_ids(db.users, "user_id", (o.get("guardian_id") for o in orders), {"_id": 0, "user_id": 1, "display_name": 1}),
+        fetch_by_ids(db.children, "child_id", (o.get("child_id") for o in orders), {"_id": 0, "child_id": 1, "full_name": 1}),
+    )
 
     result = []
     for order in orders:
@@ -99,23 +112,19 @@ async def list_orders(
         if isinstance(order.get("paid_at"), str):
             order["paid_at"] = datetime.fromisoformat(order["paid_at"])
 
-        if order.get("guardian_id"):
-            guardian = await db.users.find_one({"user_id": order["guardian_id"]}, {"_id": 0})
-            if guardian:
-                order["guardian_name"] = guardian.get("display_name")
+        guardian = guardians.get(order.get("guardian_id"))
+        if guardian:
+            order["guardian_name"] = guardian.get("display_name")
 
-        if order.get("child_id"):
-            child = await db.children.find_one({"child_id": order["child_id"]}, {"_id": 0})
-            if child:
-                order["child_name"] = child.get("full_name")
+        child = children.get(order.get("child_id"))
+        if child:
+            order["child_name"] = child.get("full_name")
 
         result.append(OrderResponse(**order))
 
     return result
 
 
-
-
 @router.get("/notifications/recent", response_model=List[dict])
 async def list_recent_notifications(
     limit: int = 20,
@@ -307,6 +316,16 @@ async def _pay_order(order_id: str, payment: Optional[PaymentCreate], user: dict
         },
     )
     
+    if order.get("guardian_id"):
+        await parentFeed.publish(db, {
+            "id": f"payment-{payment_record.payment_id}",
+            "child_id": order.get("child_id"),
+            "type": "payment",
+            "title": "تم استلام الدفعة",
+            "description": f"{amount:.2f} JOD",
+            "created_at": now.isoformat(),
+        }, guardian_ids=[order["guardian_id"]])
+    
     # Get updated order
     updated = await db.orders.find_one({"order_id": order_id}, {"_id": 0})
     await activate_play_session_for_order(updated, user, db)
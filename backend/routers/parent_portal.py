@@ -1,11 +1,27 @@
+import asyncio
+import hashlib
+import json
+import os
 from datetime import datetime, timedelta, timezone
-from fastapi import APIRouter, Depends
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.responses import JSONResponse
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from middleware.auth import require_role
+from services.household_graph import householdGraph
+from services.parent_feed import parentFeed
+from utils.cache import MISSING, TTLCache
+from utils.pagination import DEFAULT_PAGE_SIZE
 
 router = APIRouter(prefix="/parent", tags=["Parent Portal"])
 
+PARENT_DASHBOARD_TTL_SECONDS = float(os.environ.get("PARENT_DASHBOARD_TTL_SECONDS", "30"))
+
+# guardian_id -> (etag, body); short TTL bounds staleness since writes do not invalidate it
+_dashboard_cache = TTLCache(PARENT_DASHBOARD_TTL_SECONDS, max_entries=5000)
+
 
 def get_db():
     from server import db
@@ -154,38 +170,15 @@ def _sample_bookings():
     }
 
 
-@router.get("/feed")
-async def get_parent_feed(
-    current_user: dict = Depends(require_role("PARENT", "ADMIN")),
-    db: AsyncIOMotorDatabase = Depends(get_db),
-):
-    if db is None:
-        return _sample_feed()
-
-    children = await db.children.find({"guardian_id": current_user.get("user_id")}, {"_id": 0, "child_id": 1}).to_list(length=20)
-    child_ids = [c.get("child_id") for c in children if c.get("child_id")]
-
-    if not child_ids:
-        return []
-
-    feed = await db.parent_feed.find(
-        {"child_id": {"$in": child_ids}},
-        {"_id": 0},
-    ).sort("created_at", -1).to_list(length=50)
+async def _guardian_child_ids(db: AsyncIOMotorDatabase, guardian_id: Optional[str]) -> List[str]:
+    return await householdGraph.child_ids_for_guardian(db, guardian_id)
 
-    return feed
 
+async def _load_feed(db: AsyncIOMotorDatabase, guardian_id: Optional[str]) -> list:
+    return await parentFeed.read(db, guardian_id, limit=DEFAULT_PAGE_SIZE)
 
-@router.get("/attendance")
-async def get_parent_attendance(
-    current_user: dict = Depends(require_role("PARENT", "ADMIN")),
-    db: AsyncIOMotorDatabase = Depends(get_db),
-):
-    if db is None:
-        return _sample_attendance()
 
-    children = await db.children.find({"guardian_id": current_user.get("user_id")}, {"_id": 0, "child_id": 1}).to_list(length=20)
-    child_ids = [c.get("child_id") for c in children if c.get("child_id")]
+async def _load_attendance(db: AsyncIOMotorDatabase, child_ids: List[str]) -> list:
     if not child_ids:
         return []
 
@@ -217,26 +210,37 @@ async def get_parent_attendance(
     return mapped
 
 
-@router.get("/payments")
-async def get_parent_payments(
-    current_user: dict = Depends(require_role("PARENT", "ADMIN")),
-    db: AsyncIOMotorDatabase = Depends(get_db),
-):
-    if db is None:
-        return _sample_payments()
-
-    children = await db.children.find({"guardian_id": current_user.get("user_id")}, {"_id": 0, "child_id": 1}).to_list(length=20)
-    child_ids = [c.get("child_id") for c in children if c.get("child_id")]
+async def _load_payments(db: AsyncIOMotorDatabase, child_ids: List[str]) -> dict:
+    if not child_ids:
+        return {
+            "subscription_status": "NONE",
+            "visit_pack": None,
+            "payment_history": [],
+            "recent_orders": [],
+        }
 
-    subscription = await db.subscriptions.find_one(
-        {"child_id": {"$in": child_ids}, "status": {"$in": ["ACTIVE", "PAUSED", "EXPIRED"]}},
-        {"_id": 0, "status": 1},
-        sort=[("created_at", -1)],
+    # The four lookups are independent, so run them concurrently
+    subscription, payments, visit_pack, recent_orders = await asyncio.gather(
+        db.subscriptions.find_one(
+            {"child_id": {"$in": child_ids}, "status": {"$in": ["ACTIVE", "PAUSED", "EXPIRED"]}},
+            {"_id": 0, "status": 1},
+            sort=[("created_at", -1)],
+        ),
+        db.payments.find({"child_id": {"$in": child_ids}}, {"_id": 0}).sort("created_at", -1).to_list(length=30),
+        db.entitlements.find_one(
+            {
+                "child_id": {"$in": child_ids},
+                "kind": {"$in": ["VISIT_PACK", "PACKAGE", "PACK"]},
+            },
+            {"_id": 0, "name": 1, "status": 1, "remaining_visits": 1, "visits_remaining": 1, "expires_at": 1, "expiry_date": 1},
+            sort=[("created_at", -1)],
+        ),
+        db.orders.find(
+            {"child_id": {"$in": child_ids}},
+            {"_id": 0, "order_id": 1, "total_amount": 1, "status": 1, "created_at": 1, "currency": 1},
+        ).sort("created_at", -1).to_list(length=5),
     )
 
-    payment_query = {"child_id": {"$in": child_ids}} if child_ids else {"_id": None}
-    payments = await db.payments.find(payment_query, {"_id": 0}).sort("created_at", -1).to_list(length=30)
-
     normalized = []
     for payment in payments:
         created_at = payment.get("created_at")
@@ -255,20 +259,6 @@ async def get_parent_payments(
             }
         )
 
-    visit_pack = await db.entitlements.find_one(
-        {
-            "child_id": {"$in": child_ids},
-            "kind": {"$in": ["VISIT_PACK", "PACKAGE", "PACK"]},
-        },
-        {"_id": 0, "name": 1, "status": 1, "remaining_visits": 1, "visits_remaining": 1, "expires_at": 1, "expiry_date": 1},
-        sort=[("created_at", -1)],
-    )
-
-    recent_orders = await db.orders.find(
-        {"child_id": {"$in": child_ids}},
-        {"_id": 0, "order_id": 1, "total_amount": 1, "status": 1, "created_at": 1, "currency": 1},
-    ).sort("created_at", -1).to_list(length=5)
-
     normalized_orders = []
     for order in recent_orders:
         created_at = order.get("created_at")
@@ -306,32 +296,16 @@ async def get_parent_payments(
     }
 
 
-@router.get("/messages")
-async def get_parent_messages(
-    current_user: dict = Depends(require_role("PARENT", "ADMIN")),
-    db: AsyncIOMotorDatabase = Depends(get_db),
-):
-    if db is None:
-        return _sample_messages()
-
-    messages = await db.parent_messages.find(
-        {"guardian_id": current_user.get("user_id")},
+async def _load_messages(db: AsyncIOMotorDatabase, guardian_id: Optional[str]) -> list:
+    return await db.parent_messages.find(
+        {"guardian_id": guardian_id},
         {"_id": 0},
     ).sort("created_at", -1).to_list(length=50)
 
-    return messages
-
-
-@router.get("/bookings")
-async def get_parent_bookings(
-    current_user: dict = Depends(require_role("PARENT", "ADMIN")),
-    db: AsyncIOMotorDatabase = Depends(get_db),
-):
-    if db is None:
-        return _sample_bookings()
 
+async def _load_bookings(db: AsyncIOMotorDatabase, guardian_id: Optional[str]) -> dict:
     bookings = await db.bookings.find(
-        {"guardian_id": current_user.get("user_id")},
+        {"guardian_id": guardian_id},
         {"_id": 0},
     ).sort("date", 1).to_list(length=30)
 
@@ -353,3 +327,141 @@ async def get_parent_bookings(
         "session_visits": bookings,
         "upcoming_event": upcoming_event,
     }
+
+
+def _dashboard_etag(body: dict) -> str:
+    payload = json.dumps(body, sort_keys=True, default=str, ensure_ascii=False).encode("utf-8")
+    return f'"{hashlib.sha256(payload).hexdigest()[:32]}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates or "*" in candidates
+
+
+@router.get("/dashboard")
+async def get_parent_dashboard(
+    request: Request,
+    current_user: dict = Depends(require_role("PARENT", "ADMIN")),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+):
+    """
+    Everything the parent app shows on open, in one round trip.
+
+    The child-id set is resolved once and the sections load concurrently.
+    Responses are cached per guardian for PARENT_DASHBOARD_TTL_SECONDS and
+    carry an ETag, so a reopen with If-None-Match gets 304 when nothing changed.
+    """
+    guardian_id = current_user.get("user_id")
+    headers = {"Cache-Control": "private, no-cache"}
+
+    cached = _dashboard_cache.get(guardian_id) if db is not None else MISSING
+    if cached is not MISSING:
+        etag, body = cached
+    else:
+        if db is None:
+            body = {
+                "feed": _sample_feed(),
+                "attendance": _sample_attendance(),
+                "payments": _sample_payments(),
+                "messages": _sample_messages(),
+                "bookings": _sample_bookings(),
+            }
+        else:
+            child_ids = await _guardian_child_ids(db, guardian_id)
+            feed, attendance, payments, messages, bookings = await asyncio.gather(
+                _load_feed(db, guardian_id),
+                _load_attendance(db, child_ids),
+                _load_payments(db, child_ids),
+                _load_messages(db, guardian_id),
+                _load_bookings(db, guardian_id),
+            )
+            body = {
+                "feed": feed,
+                "attendance": attendance,
+                "payments": payments,
+                "messages": messages,
+                "bookings": bookings,
+            }
+        body = json.loads(json.dumps(body, default=str))
+        etag = _dashboard_etag(body)
+        if db is not None:
+            _dashboard_cache.set(guardian_id, (etag, body))
+
+    headers["ETag"] = etag
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=body, headers=headers)
+
+
+@router.get("/feed")
+async def get_parent_feed(
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    response: Response = None,
+    current_user: dict = Depends(require_role("PARENT", "ADMIN")),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+):
+    if db is None:
+        return _sample_feed()
+
+    return await parentFeed.read(db, current_user.get("user_id"), limit=limit, cursor=cursor, response=response)
+
+
+@router.post("/feed/backfill")
+async def backfill_parent_feed(
+    current_user: dict = Depends(require_role("ADMIN")),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+):
+    """Copy legacy child-keyed parent_feed items into per-guardian timelines."""
+    copied = await parentFeed.backfill(db)
+    return {"success": True, "copied": copied}
+
+
+@router.get("/attendance")
+async def get_parent_attendance(
+    current_user: dict = Depends(require_role("PARENT", "ADMIN")),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+):
+    if db is None:
+        return _sample_attendance()
+
+    child_ids = await _guardian_child_ids(db, current_user.get("user_id"))
+    return await _load_attendance(db, child_ids)
+
+
+@router.get("/payments")
+async def get_parent_payments(
+    current_user: dict = Depends(require_role("PARENT", "ADMIN")),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+):
+    if db is None:
+        return _sample_payments()
+
+    child_ids = await _guardian_child_ids(db, current_user.get("user_id"))
+    return await _load_payments(db, child_ids)
+
+
+@router.get("/messages")
+async def get_parent_messages(
+    current_user: dict = Depends(require_role("PARENT", "ADMIN")),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+):
+    if db is None:
+        return _sample_messages()
+
+    return await _load_messages(db, current_user.get("user_id"))
+
+
+@router.get("/bookings")
+async def get_parent_bookings(
+    current_user: dict = Depends(require_role("PARENT", "ADMIN")),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+):
+    if db is None:
+        return _sample_bookings()
+
+    return await _load_bookings(db, current_user.get("user_id"))
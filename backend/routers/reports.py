@@ -11,8 +11,8 @@ router = APIRouter(prefix="/reports", tags=["Reports"])
 
 
 def get_db():
-    from server import db
-    return db
+    from server import reports_db
+    return reports_db
 
 
 def _parse_iso_date(value: str, field_name: str) -> date:
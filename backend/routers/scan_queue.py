@@ -0,0 +1,167 @@
+from fastapi import APIRouter, HTTPException, status, Depends
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from typing import Optional
+from datetime import datetime, timezone
+from models.checkin import CheckInCreate
+from models.wristband import WristbandScanRequest
+from models.scan_queue import ScanTicket, ScanReconciliation
+from middleware.auth import require_role
+from constants.roles import FRONTDESK_ROLES
+from services.scan_queue import scanQueue
+
+router = APIRouter(prefix="/scan-queue", tags=["Scan Queue"])
+
+
+def get_db():
+    from server import db
+    return db
+
+
+async def _commit_checkin(db: AsyncIOMotorDatabase, payload: dict, user: dict) -> dict:
+    from routers.checkin import check_in
+
+    response = await check_in(
+        CheckInCreate(card_number=payload["card_number"], branch_id=payload["branch_id"]),
+        payload.get("use_subscription", False),
+        user,
+        db,
+    )
+    return response.model_dump()
+
+
+async def _commit_wristband(db: AsyncIOMotorDatabase, payload: dict, user: dict) -> dict:
+    from routers.wristbands import scan_wristband
+
+    response = await scan_wristband(WristbandScanRequest(**payload), user, db)
+    return response.model_dump()
+
+
+def _to_ticket(record: dict) -> ScanTicket:
+    ticket = dict(record)
+    for field in ["accepted_at", "committed_at"]:
+        if isinstance(ticket.get(field), str):
+            ticket[field] = datetime.fromisoformat(ticket[field])
+    return ScanTicket(**ticket)
+
+
+@router.post("/checkin", response_model=ScanTicket, status_code=status.HTTP_202_ACCEPTED)
+async def queue_checkin_scan(
+    scan_data: CheckInCreate,
+    use_subscription: bool = False,
+    user: dict = Depends(require_role(*FRONTDESK_ROLES)),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """
+    Accept a check-in scan without waiting on the database.
+    Returns a provisional result from the in-memory caches; the check-in itself
+    is committed asynchronously, in scan order.
+    """
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database not available")
+
+    record = await scanQueue.submit(
+        db,
+        "CHECKIN",
+        {**scan_data.model_dump(), "use_subscription": use_subscription},
+        user,
+        provisional=scanQueue.provisional_checkin(scan_data.card_number),
+        commit=_commit_checkin,
+        branch_id=scan_data.branch_id,
+    )
+    return _to_ticket(record)
+
+
+@router.post("/wristbands", response_model=ScanTicket, status_code=status.HTTP_202_ACCEPTED)
+async def queue_wristband_scan(
+    payload: WristbandScanRequest,
+    user: dict = Depends(require_role(*FRONTDESK_ROLES)),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Accept a wristband activation scan and commit it asynchronously."""
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database not available")
+
+    if not payload.wristband_id and not payload.code:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="wristband_id or code is required")
+
+    record = await scanQueue.submit(
+        db,
+        "WRISTBAND",
+        payload.model_dump(),
+        user,
+        provisional=scanQueue.provisional_wristband(payload.wristband_id, payload.code),
+        commit=_commit_wristband,
+        branch_id=user.get("branch_id"),
+    )
+    return _to_ticket(record)
+
+
+@router.get("/reconciliation", response_model=ScanReconciliation)
+async def get_reconciliation(
+    branch_id: Optional[str] = None,
+    include_reconciled: bool = False,
+    limit: int = 100,
+    user: dict = Depends(require_role(*FRONTDESK_ROLES)),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """
+    List scans that still need staff attention: failed on commit, or accepted
+    but never committed (the process that queued them stopped).
+    """
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database not available")
+
+    query = scanQueue.needs_attention_query()
+    if not include_reconciled:
+        query["reconciled"] = False
+    if branch_id:
+        query["branch_id"] = branch_id
+    elif user.get("role") not in ["ADMIN"] and user.get("branch_id"):
+        query["branch_id"] = user["branch_id"]
+
+    failed = await db.scan_queue.find(query, {"_id": 0}).sort("accepted_at", -1).limit(limit).to_list(limit)
+    return ScanReconciliation(
+        pending=scanQueue.pending_count(),
+        failed=[_to_ticket(record) for record in failed],
+    )
+
+
+@router.get("/{scan_id}", response_model=ScanTicket)
+async def get_scan(
+    scan_id: str,
+    user: dict = Depends(require_role(*FRONTDESK_ROLES)),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Get the current state of a queued scan."""
+    record = scanQueue.get_recent(scan_id)
+    if record is None and db is not None:
+        record = await db.scan_queue.find_one({"scan_id": scan_id}, {"_id": 0})
+    if not record:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Scan not found")
+    return _to_ticket(record)
+
+
+@router.post("/{scan_id}/reconcile", response_model=ScanTicket)
+async def mark_reconciled(
+    scan_id: str,
+    user: dict = Depends(require_role(*FRONTDESK_ROLES)),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Mark a failed or abandoned scan as handled by staff."""
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database not available")
+
+    now = datetime.now(timezone.utc).isoformat()
+    result = await db.scan_queue.update_one(
+        {"scan_id": scan_id, "status": {"$in": ["FAILED", "QUEUED"]}},
+        {"$set": {"reconciled": True, "reconciled_at": now, "reconciled_by": user.get("user_id")}},
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Failed scan not found")
+
+    record = scanQueue.get_recent(scan_id)
+    if record is not None:
+        record["reconciled"] = True
+
+    updated = await db.scan_queue.find_one({"scan_id": scan_id}, {"_id": 0})
+    return _to_ticket(updated)
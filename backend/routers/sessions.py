@@ -1,5 +1,6 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Response
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
 from typing import List, Optional
 from models.session import (
     Session, SessionCreate, SessionResponse, CheckInRequest, CheckOutRequest,
@@ -9,8 +10,14 @@ from models.subscription import PLAN_TIME_WINDOWS
 from models.order import Order, OrderItem
 from models.pricing_rule import PricingRule
 from middleware.auth import get_current_user, require_role
+from utils.pagination import DEFAULT_PAGE_SIZE, paginate
 from utils.audit import log_audit
+from utils.concurrency import gather_lookups
+from utils.lookups import fetch_by_ids
 from services.event_logger import eventLogger
+from services.entitlement_service import consume_visit_pack
+from services.parent_feed import parentFeed
+from services.pricing_service import calculateSessionPrice
 from datetime import datetime, timezone, timedelta, time
 import random
 import math
@@ -74,13 +81,38 @@ async def get_pricing_rule(db: AsyncIOMotorDatabase, branch_id: Optional[str]) -
     return default_rule.model_dump()
 
 
+CHILD_NAME_PROJECTION = {"_id": 0, "child_id": 1, "full_name": 1}
+GUARDIAN_CONTACT_PROJECTION = {"_id": 0, "user_id": 1, "display_name": 1, "phone": 1}
+
+
+async def _load_people(db: AsyncIOMotorDatabase, sessions: List[dict]) -> tuple[dict, dict]:
+    """Children and guardians for a page of sessions, one query each."""
+    return await gather_lookups(
+        fetch_by_ids(db.children, "child_id", (s.get("child_id") for s in sessions), CHILD_NAME_PROJECTION),
+        fetch_by_ids(db.users, "user_id", (s.get("guardian_id") for s in sessions), GUARDIAN_CONTACT_PROJECTION),
+    )
+
+
+def _apply_people(sess: dict, children: dict, guardians: dict) -> dict:
+    child = children.get(sess.get("child_id"))
+    if child:
+        sess["child_name"] = child.get("full_name")
+    guardian = guardians.get(sess.get("guardian_id"))
+    if guardian:
+        sess["guardian_name"] = guardian.get("display_name")
+        sess["guardian_phone"] = guardian.get("phone")
+    return sess
+
+
 @router.get("", response_model=List[SessionResponse])
 async def list_sessions(
     state: Optional[str] = None,
     child_id: Optional[str] = None,
     guardian_id: Optional[str] = None,
     active_only: bool = False,
-    limit: int = 50,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    response: Response = None,
     user: dict = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
@@ -101,7 +133,11 @@ async def list_sessions(
     if active_only:
         query["state"] = {"$in": ["CHECKED_IN", "ACTIVE", "OVERDUE"]}
     
-    sessions = await db.sessions.find(query, {"_id": 0}).sort("created_at", -1).limit(limit).to_list(limit)
+    sessions = await paginate(
+        db.sessions, query, sort_field="created_at", id_field="session_id",
+        limit=limit, cursor=cursor, response=response,
+    )
+    children, guardians = await _load_people(db, sessions)
     
     result = []
     now = datetime.now(timezone.utc)
@@ -122,18 +158,7 @@ async def list_sessions(
             sess["time_remaining_minutes"] = max(0, int(remaining))
             sess["is_overdue"] = remaining < 0
         
-        # Get child and guardian info
-        if sess.get("child_id"):
-            child = await db.children.find_one({"child_id": sess["child_id"]}, {"_id": 0})
-            if child:
-                sess["child_name"] = child.get("full_name")
-        
-        if sess.get("guardian_id"):
-            guardian = await db.users.find_one({"user_id": sess["guardian_id"]}, {"_id": 0})
-            if guardian:
-                sess["guardian_name"] = guardian.get("display_name")
-                sess["guardian_phone"] = guardian.get("phone")
-        
+        _apply_people(sess, children, guardians)
         result.append(SessionResponse(**sess))
     
     return result
@@ -148,9 +173,12 @@ async def get_active_sessions(
     query = {"state": {"$in": ["CHECKED_IN", "ACTIVE", "OVERDUE"]}}
     
     sessions = await db.sessions.find(query, {"_id": 0}).sort("checkin_at", 1).to_list(100)
+    children, guardians = await _load_people(db, sessions)
     
     result = []
     now = datetime.now(timezone.utc)
+    pricing_rules = {}
+    newly_overdue = []
     
     for sess in sessions:
         for field in ["created_at", "checkin_at", "started_at", "planned_end_at", "ended_at", "closed_at", "sessionStart", "sessionEnd"]:
@@ -159,7 +187,9 @@ async def get_active_sessions(
         
         # Calculate time remaining / overdue
         branch_id = sess.get("branchId") or user.get("branch_id")
-        pricing_rule = await get_pricing_rule(db, branch_id)
+        if branch_id not in pricing_rules:
+            pricing_rules[branch_id] = await get_pricing_rule(db, branch_id)
+        pricing_rule = pricing_rules[branch_id]
         duration_minutes, total_charge = calculateSessionPrice(
             {**sess, "sessionEnd": now},
             pricing_rule,
@@ -179,24 +209,16 @@ async def get_active_sessions(
             # Update state to OVERDUE if needed
             if remaining < 0 and sess.get("state") == "ACTIVE":
                 sess["state"] = "OVERDUE"
-                await db.sessions.update_one(
-                    {"session_id": sess["session_id"]},
-                    {"$set": {"state": "OVERDUE", "updated_at": now.isoformat()}}
-                )
-        
-        # Get child and guardian info
-        if sess.get("child_id"):
-            child = await db.children.find_one({"child_id": sess["child_id"]}, {"_id": 0})
-            if child:
-                sess["child_name"] = child.get("full_name")
-        
-        if sess.get("guardian_id"):
-            guardian = await db.users.find_one({"user_id": sess["guardian_id"]}, {"_id": 0})
-            if guardian:
-                sess["guardian_name"] = guardian.get("display_name")
-                sess["guardian_phone"] = guardian.get("phone")
+                newly_overdue.append(sess["session_id"])
         
+        _apply_people(sess, children, guardians)
         result.append(SessionResponse(**sess))
+
+    if newly_overdue:
+        await db.sessions.update_many(
+            {"session_id": {"$in": newly_overdue}, "state": "ACTIVE"},
+            {"$set": {"state": "OVERDUE", "updated_at": now.isoformat()}}
+        )
     
     return result
 
@@ -211,8 +233,27 @@ async def check_in(
     Check in a child.
     Supports: Walk-in (1h/2h), Subscription, Visit Pack
     """
+    now = datetime.now(timezone.utc)
+    
+    # Child, open session and subscription candidates are independent reads
+    child, existing, sub, pending_sub = await gather_lookups(
+        db.children.find_one({"child_id": request.child_id}, {"_id": 0}),
+        db.sessions.find_one({
+            "child_id": request.child_id,
+            "state": {"$in": ["CHECKED_IN", "ACTIVE", "OVERDUE"]}
+        }, {"_id": 0, "session_id": 1}),
+        db.subscriptions.find_one({
+            "child_id": request.child_id,
+            "status": "ACTIVE",
+            "expires_at": {"$gt": now.isoformat()}
+        }, {"_id": 0}) if request.use_subscription else None,
+        db.subscriptions.find_one({
+            "child_id": request.child_id,
+            "status": "PENDING"
+        }, {"_id": 0}) if request.use_subscription else None,
+    )
+    
     # Verify child exists
-    child = await db.children.find_one({"child_id": request.child_id}, {"_id": 0})
     if not child:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -220,17 +261,12 @@ async def check_in(
         )
     
     # Check no active session
-    existing = await db.sessions.find_one({
-        "child_id": request.child_id,
-        "state": {"$in": ["CHECKED_IN", "ACTIVE", "OVERDUE"]}
-    })
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="الطفل لديه جلسة نشطة بالفعل"
         )
     
-    now = datetime.now(timezone.utc)
     session_type = "WALK_IN"
     included_minutes = 120  # Default 2 hours
     subscription_id = None
@@ -239,19 +275,7 @@ async def check_in(
     
     # Handle subscription check-in
     if request.use_subscription:
-        sub = await db.subscriptions.find_one({
-            "child_id": request.child_id,
-            "status": "ACTIVE",
-            "expires_at": {"$gt": now.isoformat()}
-        }, {"_id": 0})
-        
         if not sub:
-            # Check for pending subscription to auto-activate
-            pending_sub = await db.subscriptions.find_one({
-                "child_id": request.child_id,
-                "status": "PENDING"
-            }, {"_id": 0})
-            
             if pending_sub:
                 # Auto-activate
                 expires_at = now + timedelta(days=30)
@@ -301,32 +325,15 @@ async def check_in(
     
     # Handle visit pack check-in
     elif request.use_visit_pack:
-        pack = await db.visit_packs.find_one({
-            "child_id": request.child_id,
-            "status": "ACTIVE",
-            "remaining_visits": {"$gt": 0}
-        }, {"_id": 0})
+        # Consume one visit
+        pack = await consume_visit_pack(db, {"child_id": request.child_id}, now.isoformat())
         
         if not pack:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="لا توجد باقة زيارات نشطة لهذا الطفل"
             )
-        
-        # Consume one visit
-        new_remaining = pack["remaining_visits"] - 1
-        new_status = "ACTIVE" if new_remaining > 0 else "EXHAUSTED"
-        
-        await db.visit_packs.update_one(
-            {"pack_id": pack["pack_id"]},
-            {
-                "$set": {
-                    "remaining_visits": new_remaining,
-                    "status": new_status,
-                    "updated_at": now.isoformat()
-                }
-            }
-        )
+        new_remaining = pack["remaining_visits"]
         
         session_type = "VISIT_PACK"
         visit_pack_id = pack["pack_id"]
@@ -460,6 +467,15 @@ async def check_in(
         },
     )
     
+    await parentFeed.publish(db, {
+        "id": f"checkin-{session.session_id}",
+        "child_id": request.child_id,
+        "type": "check_in",
+        "title": "تم تسجيل الدخول",
+        "description": child.get("full_name"),
+        "created_at": session_dict["checkin_at"],
+    }, guardian_ids=[request.guardian_id])
+    
     response = SessionResponse(**session.model_dump())
     response.child_name = child.get("full_name")
     response.time_remaining_minutes = included_minutes
@@ -553,7 +569,7 @@ async def check_out(
             overtime_order_id = order.order_id
     
     # Update session
-    await db.sessions.update_one(
+    updated = await db.sessions.find_one_and_update(
         {"session_id": request.session_id},
         {
             "$set": {
@@ -570,7 +586,9 @@ async def check_out(
                 "checked_out_by": user["user_id"],
                 "updated_at": now.isoformat()
             }
-        }
+        },
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER,
     )
     
     await log_audit(
@@ -583,8 +601,15 @@ async def check_out(
         }
     )
     
-    # Get updated session
-    updated = await db.sessions.find_one({"session_id": request.session_id}, {"_id": 0})
+    await parentFeed.publish(db, {
+        "id": f"checkout-{request.session_id}",
+        "child_id": session.get("child_id"),
+        "type": "check_out",
+        "title": "تم تسجيل الخروج",
+        "description": f"مدة الجلسة: {actual_minutes} دقيقة",
+        "created_at": now.isoformat(),
+    }, guardian_ids=[session.get("guardian_id")])
+    
     for field in ["created_at", "checkin_at", "started_at", "planned_end_at", "ended_at", "closed_at", "sessionStart", "sessionEnd"]:
         if isinstance(updated.get(field), str):
             updated[field] = datetime.fromisoformat(updated[field])
@@ -8,6 +8,10 @@ from models.subscription import (
 )
 from middleware.auth import get_current_user, require_role
 from utils.audit import log_audit
+from services.entitlement_service import consume_visit_pack
+from services.subscription_jobs import (
+    RENEWAL_REMINDER_DAYS, SUBSCRIPTION_JOB_INTERVAL_SECONDS, SUBSCRIPTION_JOBS_ENABLED, subscriptionJobs
+)
 from datetime import datetime, timezone, timedelta
 
 router = APIRouter(prefix="/subscriptions", tags=["Subscriptions"])
@@ -195,6 +199,30 @@ async def activate_subscription(
     return SubscriptionResponse(**updated)
 
 
+# Subscription Jobs
+@router.post("/jobs/run")
+async def run_subscription_jobs(
+    dry_run: bool = False,
+    days: int = RENEWAL_REMINDER_DAYS,
+    user: dict = Depends(require_role("ADMIN")),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Expire lapsed subscriptions and send renewal reminders now (dry_run only counts)"""
+    return await subscriptionJobs.run_once(db, days=days, dry_run=dry_run)
+
+
+@router.get("/jobs/status")
+async def get_subscription_jobs_status(
+    user: dict = Depends(require_role("ADMIN"))
+):
+    """Schedule and metrics of the last scheduled run on this instance"""
+    return {
+        "enabled": SUBSCRIPTION_JOBS_ENABLED,
+        "interval_seconds": SUBSCRIPTION_JOB_INTERVAL_SECONDS,
+        "last_run": subscriptionJobs.last_run,
+    }
+
+
 # Visit Packs
 @router.get("/visit-packs", response_model=List[VisitPackResponse])
 async def list_visit_packs(
@@ -290,48 +318,34 @@ async def consume_visit(
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """Consume one visit from a visit pack"""
-    pack = await db.visit_packs.find_one({"pack_id": pack_id}, {"_id": 0})
-    if not pack:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="الباقة غير موجودة"
-        )
-    
-    if pack.get("status") != "ACTIVE":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="الباقة غير نشطة"
-        )
-    
-    if pack.get("remaining_visits", 0) <= 0:
+    now = datetime.now(timezone.utc)
+    updated = await consume_visit_pack(db, {"pack_id": pack_id}, now.isoformat())
+
+    if not updated:
+        # Nothing matched the guarded update; find out why for a precise error
+        pack = await db.visit_packs.find_one({"pack_id": pack_id}, {"_id": 0, "status": 1})
+        if not pack:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="الباقة غير موجودة"
+            )
+        if pack.get("status") != "ACTIVE":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="الباقة غير نشطة"
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="لا توجد زيارات متبقية"
         )
-    
-    new_remaining = pack["remaining_visits"] - 1
-    new_status = "ACTIVE" if new_remaining > 0 else "EXHAUSTED"
-    
-    now = datetime.now(timezone.utc)
-    await db.visit_packs.update_one(
-        {"pack_id": pack_id},
-        {
-            "$set": {
-                "remaining_visits": new_remaining,
-                "status": new_status,
-                "updated_at": now.isoformat()
-            }
-        }
-    )
-    
+
     await log_audit(
         db, "VISIT_PACK", pack_id, "VISIT_CONSUMED",
         user["user_id"], user["role"],
-        before_state={"remaining": pack["remaining_visits"]},
-        after_state={"remaining": new_remaining}
+        before_state={"remaining": updated["remaining_visits"] + 1},
+        after_state={"remaining": updated["remaining_visits"]}
     )
     
-    updated = await db.visit_packs.find_one({"pack_id": pack_id}, {"_id": 0})
     if isinstance(updated.get("purchased_at"), str):
         updated["purchased_at"] = datetime.fromisoformat(updated["purchased_at"])
     
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Response
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from typing import List, Optional
 from models.user import User, UserCreate, UserResponse
 from middleware.auth import require_role
-from utils.auth import hash_password
+from utils.pagination import paginate
+from services.password_service import passwordService
+from services.user_directory import userDirectory
 from utils.audit import log_audit
 from datetime import datetime
 
@@ -20,6 +22,9 @@ async def list_users(
     role: Optional[str] = None,
     branch_id: Optional[str] = None,
     status_filter: Optional[str] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    response: Response = None,
     user: dict = Depends(require_role("ADMIN", "MANAGER")),
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
@@ -43,7 +48,11 @@ async def list_users(
     if status_filter:
         query["status"] = status_filter
     
-    users = await db.users.find(query, {"_id": 0, "password_hash": 0}).to_list(100)
+    users = await paginate(
+        db.users, query, sort_field="created_at", id_field="user_id",
+        limit=limit, cursor=cursor, response=response,
+        projection={"_id": 0, "password_hash": 0},
+    )
     
     # Parse datetime strings
     for u in users:
@@ -95,7 +104,7 @@ async def create_staff_user(
     # Create user
     new_user = User(
         email=user_data.email,
-        password_hash=hash_password(user_data.password),
+        password_hash=await passwordService.hash(user_data.password),
         name=user_data.name,
         phone=user_data.phone,
         role=user_data.role,
@@ -108,6 +117,7 @@ async def create_staff_user(
     user_dict["updated_at"] = user_dict["updated_at"].isoformat()
     
     await db.users.insert_one(user_dict)
+    userDirectory.invalidate(user_dict)
     
     # Audit log
     await log_audit(
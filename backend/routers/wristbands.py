@@ -9,6 +9,7 @@ from constants.roles import FRONTDESK_ROLES
 from middleware.auth import require_role
 from models.wristband import Wristband, WristbandAssignRequest, WristbandResponse, WristbandScanRequest
 from services.event_logger import eventLogger
+from services.scan_queue import scanQueue
 
 router = APIRouter(prefix="/wristbands", tags=["Wristbands"])
 
@@ -89,6 +90,7 @@ async def assign_wristband(
     wristband_doc["code_normalized"] = code
 
     await db.wristbands.insert_one(wristband_doc)
+    scanQueue.remember_wristband(wristband_doc)
     await db.checkin_sessions.update_one(
         {"session_id": payload.session_id},
         {
@@ -161,6 +163,7 @@ async def scan_wristband(
     update["activated_at"] = now_iso
 
     await db.wristbands.update_one({"id": wristband["id"]}, {"$set": update})
+    scanQueue.remember_wristband({**wristband, **update})
 
     session = await db.checkin_sessions.find_one({"session_id": wristband["session_id"]}, {"_id": 0})
     if not session:
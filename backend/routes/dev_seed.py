@@ -1,8 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
-from services.dev_seed_service import DevSeedService
-
 router = APIRouter(prefix="/dev", tags=["Development"])
 
 
@@ -19,6 +17,9 @@ async def seed_dev_data(db: AsyncIOMotorDatabase = Depends(get_db)):
             detail="Database is not available",
         )
 
+    # Only needed in development; keeps bcrypt and the seed models off the startup path
+    from services.dev_seed_service import DevSeedService
+
     result = await DevSeedService(db).seed()
     if not result["allowed"]:
         raise HTTPException(
@@ -1,181 +1,99 @@
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo.errors import OperationFailure
 from contextlib import asynccontextmanager
 import os
 from dotenv import load_dotenv
 
-# Load environment
+# Load environment before importing modules that read settings at import time
 load_dotenv()
 
+from utils.pagination import NEXT_CURSOR_HEADER
+from middleware.auth import require_metrics_access
+from middleware.metrics import MetricsMiddleware, dbCommandListener, dbPoolListener, metricsRegistry, slow_query_threshold_ms
+from utils.db_profiles import client_options, frontdesk_db, reports_db as reports_profile
+from utils.indexes import skip_index_creation
+
 # MongoDB connection
 MONGO_URL = os.environ.get("MONGO_URL")
 DB_NAME = os.environ.get("DB_NAME", "daycare_db")
 
 client = None
 db = None
+# Same database with the read-only reports profile (secondaryPreferred)
+reports_db = None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global client, db
+    global client, db, reports_db
 
     if not MONGO_URL:
         print("Warning: MONGO_URL is not configured; API will start without database connectivity")
         client = None
         db = None
+        reports_db = None
     else:
         try:
             # Startup
-            client = AsyncIOMotorClient(MONGO_URL, serverSelectionTimeoutMS=5000)
-            db = client[DB_NAME]
-
-            # Validate connection and create indexes
+            dbCommandListener.slow_query_ms = slow_query_threshold_ms()
+            client = AsyncIOMotorClient(
+                MONGO_URL,
+                serverSelectionTimeoutMS=5000,
+                event_listeners=[dbCommandListener, dbPoolListener],
+                **client_options(),
+            )
+            db = frontdesk_db(client[DB_NAME])
+            reports_db = reports_profile(client[DB_NAME])
+
+            # Validate connection, then apply pending index migrations (a no-op
+            # read of `migrations` once they are recorded)
             await client.admin.command("ping")
-            await create_indexes()
+            if skip_index_creation():
+                print("Startup migrations skipped (SKIP_INDEX_CREATION=true)")
+            else:
+                from migrations.runner import migrationRunner
+                try:
+                    await migrationRunner.up(db, startup=True)
+                except Exception as exc:
+                    print(f"Warning: startup migrations failed: {exc}")
+
+            from services.subscription_jobs import SUBSCRIPTION_JOBS_ENABLED, subscriptionJobs
+            if SUBSCRIPTION_JOBS_ENABLED:
+                subscriptionJobs.start(db)
+
+            from services.report_jobs import reportJobs
+            reportJobs.start(db)
 
             print(f"Connected to MongoDB: {DB_NAME}")
         except Exception as exc:
             print(f"Warning: MongoDB startup failed: {exc}")
             client = None
             db = None
+            reports_db = None
+
+    # Resolve the bcrypt cost (calibrating for BCRYPT_ROUNDS=auto) before the first login
+    from services.password_service import passwordService
+    await passwordService.startup()
 
     yield
 
     # Shutdown
+    from services.scan_queue import scanQueue
+    await scanQueue.drain()
+    from services.subscription_jobs import subscriptionJobs
+    await subscriptionJobs.stop()
+    from services.report_jobs import reportJobs
+    await reportJobs.stop()
+    from services.password_service import passwordService
+    passwordService.shutdown()
+
     if client is not None:
         client.close()
         print("MongoDB connection closed")
 
 
-async def create_indexes():
-    """Create required indexes for performance"""
-    # Users
-    await db.users.create_index("email", unique=True)
-    await db.users.create_index("user_id", unique=True)
-
-    # Children
-    await db.children.create_index("child_id", unique=True)
-    await db.children.create_index("guardian_id")
-    await db.children.create_index("household_id")
-
-    # Households
-    await db.households.create_index("household_id", unique=True)
-    await db.households.create_index("primary_guardian")
-
-    # Products
-    await db.products.create_index("product_id", unique=True)
-    await db.products.create_index("category")
-
-    # Orders
-    await db.orders.create_index("order_id", unique=True)
-    await db.orders.create_index("order_number", unique=True)
-    await db.orders.create_index("guardian_id")
-    await db.orders.create_index([("status", 1), ("created_at", -1)])
-
-    # Sessions - critical for active session queries
-    await db.sessions.create_index("session_id", unique=True)
-    await db.sessions.create_index("child_id")
-    await db.sessions.create_index("state")
-    await db.sessions.create_index([("state", 1), ("checkin_at", -1)])
-    await db.sessions.create_index([("child_id", 1), ("state", 1)])
-
-    # Check-in sessions (reception operations)
-    await db.checkin_sessions.create_index("session_id", unique=True)
-    await db.checkin_sessions.create_index([("status", 1), ("branch_id", 1), ("check_in_time", -1)])
-    await db.checkin_sessions.create_index([("customer_id", 1), ("status", 1)])
-    await db.checkin_sessions.create_index([("check_out_time", -1), ("status", 1)])
-    await db.checkin_sessions.create_index([("branch_id", 1), ("check_in_time", -1)])
-
-    # Wristbands
-    await db.wristbands.create_index("id", unique=True)
-    await db.wristbands.create_index("code", unique=True)
-    await db.wristbands.create_index([("session_id", 1), ("status", 1)])
-
-    # Domain events
-    await db.events.create_index("event_id", unique=True)
-    await db.events.create_index([("type", 1), ("created_at", -1)])
-
-    # Subscriptions
-    await db.subscriptions.create_index("subscription_id", unique=True)
-    await db.subscriptions.create_index("child_id")
-    await db.subscriptions.create_index([("child_id", 1), ("status", 1)])
-
-    # Visit Packs
-    await db.visit_packs.create_index("pack_id", unique=True)
-    await db.visit_packs.create_index("child_id")
-    await db.visit_packs.create_index([("child_id", 1), ("status", 1)])
-
-    # Entitlement Usage
-    await db.entitlement_usage.create_index("usage_id", unique=True)
-    await db.entitlement_usage.create_index([("subscription_id", 1), ("usage_date", 1)])
-
-    # Audit logs: unique only when audit_id exists and is non-null string
-    try:
-        await db.audit_logs.create_index(
-            "audit_id",
-            unique=True,
-            partialFilterExpression={
-                "audit_id": {"$exists": True, "$type": "string", "$ne": None}
-            },
-        )
-    except OperationFailure as exc:
-        if exc.code in (85, 86):
-            try:
-                await db.audit_logs.drop_index("audit_id_1")
-            except Exception as drop_exc:
-                print(f"Warning: could not drop legacy audit_id index: {drop_exc}")
-            try:
-                await db.audit_logs.create_index(
-                    "audit_id",
-                    unique=True,
-                    partialFilterExpression={
-                        "audit_id": {"$exists": True, "$type": "string", "$ne": None}
-                    },
-                )
-            except Exception as recreate_exc:
-                print(f"Warning: could not create partial unique audit_id index: {recreate_exc}")
-        else:
-            print(f"Warning: audit_id index creation skipped: {exc}")
-    await db.audit_logs.create_index([("entity_type", 1), ("entity_id", 1), ("created_at", -1)])
-
-    # Event ledger
-    await db.event_ledger.create_index("id", unique=True)
-    await db.event_ledger.create_index([("eventType", 1), ("timestamp", -1)])
-    await db.event_ledger.create_index([("branchId", 1), ("timestamp", -1)])
-    await db.event_ledger.create_index([("actorType", 1), ("actorId", 1), ("timestamp", -1)])
-    await db.event_ledger.create_index([("sessionId", 1), ("timestamp", -1)])
-    await db.event_ledger.create_index([("orderId", 1), ("timestamp", -1)])
-
-    # Payments
-    await db.payments.create_index("payment_id", unique=True)
-    await db.payments.create_index("order_id")
-
-    # Customers
-    await db.customers.create_index("household_id")
-
-    # Daily Reports (AI-generated)
-    await db.daily_reports.create_index("report_id", unique=True)
-    await db.daily_reports.create_index([("child_id", 1), ("created_at", -1)])
-    await db.daily_reports.create_index([("teacher_id", 1), ("created_at", -1)])
-
-    # Billing
-    await db.fee_plans.create_index("plan_id", unique=True)
-    await db.fee_plans.create_index([("child_id", 1), ("active", 1)])
-    await db.invoices.create_index("invoice_id", unique=True)
-    await db.invoices.create_index([("child_id", 1), ("created_at", -1)])
-    await db.invoices.create_index([("guardian_id", 1), ("status", 1)])
-
-    # Learning & Assessment
-    await db.lessons.create_index("lesson_id", unique=True)
-    await db.lessons.create_index([("teacher_id", 1), ("created_at", -1)])
-    await db.observations.create_index("observation_id", unique=True)
-    await db.observations.create_index([("child_id", 1), ("created_at", -1)])
-    await db.observations.create_index([("teacher_id", 1), ("created_at", -1)])
-
-
 # Create FastAPI app
 app = FastAPI(
     title="Daycare Management System",
@@ -191,8 +109,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
+# Per-route latency and DB command counts, served at /api/metrics (METRICS_TOKEN or ADMIN)
+app.add_middleware(MetricsMiddleware)
+
 
 # Global exception handler
 @app.exception_handler(Exception)
@@ -229,6 +151,7 @@ from routers import (
     parent_portal,
     products,
     reports,
+    scan_queue,
     sessions,
     subscriptions,
     users,
@@ -254,6 +177,7 @@ api_router.include_router(sessions.router)
 api_router.include_router(checkin.router)
 api_router.include_router(devices.router)
 api_router.include_router(wristbands.router)
+api_router.include_router(scan_queue.router)
 api_router.include_router(entitlements.router)
 api_router.include_router(reports.router)
 api_router.include_router(billing.router)
@@ -284,3 +208,8 @@ async def health_check():
 @app.get("/api/health")
 async def health():
     return {"status": "healthy", "database": "connected" if db is not None else "disconnected"}
+
+
+@app.get("/api/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_access)])
+async def metrics():
+    return PlainTextResponse(metricsRegistry.render(), media_type="text/plain; version=0.0.4")
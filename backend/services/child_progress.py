@@ -0,0 +1,153 @@
+import os
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Iterable, Optional
+
+from pymongo import ReplaceOne, UpdateOne
+
+# School years run from this month to the month before it the following year
+SCHOOL_YEAR_START_MONTH = int(os.environ.get("SCHOOL_YEAR_START_MONTH", "9"))
+
+
+def school_year_for(observed_at: str) -> str:
+    """School year label ("2026-2027") for an ISO timestamp."""
+    when = datetime.fromisoformat(observed_at)
+    start = when.year if when.month >= SCHOOL_YEAR_START_MONTH else when.year - 1
+    return f"{start}-{start + 1}"
+
+
+def current_school_year() -> str:
+    return school_year_for(datetime.now(timezone.utc).isoformat())
+
+
+def progress_id(child_id: str, school_year: str) -> str:
+    return f"{child_id}:{school_year}"
+
+
+def _rollup(observations: Iterable[dict]) -> dict:
+    """Fold observations into per-(child, school year) counters."""
+    rollups: dict[tuple, dict] = {}
+    for obs in observations:
+        key = (obs["child_id"], school_year_for(obs["created_at"]))
+        rollup = rollups.setdefault(key, {
+            "child_name": obs.get("child_name"),
+            "observations": 0,
+            "milestones": 0,
+            "first_observed_at": obs["created_at"],
+            "last_observed_at": obs["created_at"],
+            "categories": defaultdict(lambda: {"observations": 0, "milestones": 0, "last_observed_at": None}),
+        })
+        rollup["child_name"] = obs.get("child_name") or rollup["child_name"]
+        rollup["observations"] += 1
+        rollup["first_observed_at"] = min(rollup["first_observed_at"], obs["created_at"])
+        rollup["last_observed_at"] = max(rollup["last_observed_at"], obs["created_at"])
+        category = rollup["categories"][obs.get("category") or "general"]
+        category["observations"] += 1
+        category["last_observed_at"] = max(category["last_observed_at"] or "", obs["created_at"])
+        if obs.get("milestone"):
+            rollup["milestones"] += 1
+            category["milestones"] += 1
+            category["last_milestone_at"] = max(category.get("last_milestone_at") or "", obs["created_at"])
+    return rollups
+
+
+def progress_updates(observations: Iterable[dict]) -> list[UpdateOne]:
+    """One upsert per child and school year applying the batch's increments."""
+    operations = []
+    now = datetime.now(timezone.utc).isoformat()
+    for (child_id, school_year), rollup in _rollup(observations).items():
+        inc = {"total_observations": rollup["observations"], "total_milestones": rollup["milestones"]}
+        latest = {"last_observed_at": rollup["last_observed_at"]}
+        for category, counts in rollup["categories"].items():
+            inc[f"categories.{category}.observations"] = counts["observations"]
+            inc[f"categories.{category}.milestones"] = counts["milestones"]
+            latest[f"categories.{category}.last_observed_at"] = counts["last_observed_at"]
+            if counts.get("last_milestone_at"):
+                latest[f"categories.{category}.last_milestone_at"] = counts["last_milestone_at"]
+        operations.append(UpdateOne(
+            {"_id": progress_id(child_id, school_year)},
+            {
+                "$setOnInsert": {"child_id": child_id, "school_year": school_year},
+                "$set": {"child_name": rollup["child_name"], "updated_at": now},
+                "$inc": inc,
+                "$max": latest,
+                "$min": {"first_observed_at": rollup["first_observed_at"]},
+            },
+            upsert=True,
+        ))
+    return operations
+
+
+async def record_observations(db, observations: list[dict]) -> None:
+    """Apply new observations to the child_progress rollups; failures are logged, not raised."""
+    operations = progress_updates(observations)
+    if not operations:
+        return
+    try:
+        await db.child_progress.bulk_write(operations, ordered=False)
+    except Exception as exc:
+        print(f"Warning: child progress update failed: {exc}")
+
+
+async def get_progress(db, child_id: str, school_year: Optional[str] = None) -> Optional[dict]:
+    return await db.child_progress.find_one({"_id": progress_id(child_id, school_year or current_school_year())})
+
+
+def _replacements(observations: Iterable[dict], now: str) -> list[ReplaceOne]:
+    return [
+        ReplaceOne(
+            {"_id": progress_id(child_id, school_year)},
+            {
+                "child_id": child_id,
+                "school_year": school_year,
+                "child_name": rollup["child_name"],
+                "total_observations": rollup["observations"],
+                "total_milestones": rollup["milestones"],
+                "first_observed_at": rollup["first_observed_at"],
+                "last_observed_at": rollup["last_observed_at"],
+                "categories": {name: dict(counts) for name, counts in rollup["categories"].items()},
+                "updated_at": now,
+            },
+            upsert=True,
+        )
+        for (child_id, school_year), rollup in _rollup(observations).items()
+    ]
+
+
+async def rebuild(db, batch_size: int = 1000, on_batch: Optional[Callable[[], Awaitable[None]]] = None) -> int:
+    """
+    Recompute every rollup from the observations collection (backfill / repair).
+
+    Observations stream in child_id order (served by the child_id index), so
+    only one child's observations and one batch of rollups are held at a time.
+    `on_batch` runs after each write, e.g. to renew the migration lease.
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    rebuilt = 0
+    operations = []
+    child_id, child_observations = None, []
+
+    async def write():
+        await db.child_progress.bulk_write(operations, ordered=False)
+        if on_batch is not None:
+            await on_batch()
+        return len(operations)
+
+    async for obs in db.observations.find(
+        {}, {"_id": 0, "child_id": 1, "child_name": 1, "category": 1, "milestone": 1, "created_at": 1},
+        batch_size=batch_size,
+    ).sort("child_id", 1):
+        if not (obs.get("child_id") and obs.get("created_at")):
+            continue
+        if obs["child_id"] != child_id:
+            operations.extend(_replacements(child_observations, now))
+            child_id, child_observations = obs["child_id"], []
+            if len(operations) >= batch_size:
+                rebuilt += await write()
+                operations = []
+        child_observations.append(obs)
+
+    operations.extend(_replacements(child_observations, now))
+    if operations:
+        rebuilt += await write()
+    return rebuilt
@@ -0,0 +1,73 @@
+import copy
+import os
+from typing import Optional
+
+from utils.cache import MISSING, TTLCache
+
+CUSTOMER_CACHE_TTL_SECONDS = float(os.environ.get("CUSTOMER_CACHE_TTL_SECONDS", "14400"))
+CUSTOMER_CACHE_MAX_ENTRIES = int(os.environ.get("CUSTOMER_CACHE_MAX_ENTRIES", "20000"))
+
+# Waiver signatures are base64 images and never needed on the scan path
+CUSTOMER_SUMMARY_PROJECTION = {"_id": 0, "guardian_signature": 0}
+
+
+class CustomerCardCache:
+    """
+    Read-through cache from card number to customer summary.
+
+    Entries are invalidated by card number on customer writes in this process
+    (every write path already has the stored document) and expire after
+    CUSTOMER_CACHE_TTL_SECONDS to bound staleness across replicas. Customers who
+    have not accepted the waiver are never cached, so a waiver accepted through
+    another replica is seen on the next tap.
+    """
+
+    def __init__(self, ttl_seconds: float = CUSTOMER_CACHE_TTL_SECONDS, max_entries: int = CUSTOMER_CACHE_MAX_ENTRIES):
+        self._by_card = TTLCache(ttl_seconds, max_entries)
+
+    def store(self, customer: Optional[dict]) -> None:
+        if not customer or not customer.get("card_number"):
+            return
+        if not customer.get("waiver_accepted"):
+            self.invalidate_card(customer["card_number"])
+            return
+
+        summary = {k: v for k, v in customer.items() if k not in ("_id", "guardian_signature")}
+        self._by_card.set(summary["card_number"], summary)
+
+    def peek(self, card_number: str) -> Optional[dict]:
+        """Cached summary without touching the database (None on miss)."""
+        cached = self._by_card.get(card_number)
+        return None if cached is MISSING else copy.deepcopy(cached)
+
+    async def get_by_card(self, db, card_number: str) -> Optional[dict]:
+        cached = self._by_card.get(card_number)
+        if cached is not MISSING:
+            return copy.deepcopy(cached)
+
+        customer = await db.customers.find_one({"card_number": card_number}, CUSTOMER_SUMMARY_PROJECTION)
+        if customer:
+            self.store(customer)
+        return customer
+
+    def apply_visit(self, card_number: str, visited_at: str) -> None:
+        """Mirror the visit counters written by check-in so the cached entry stays current."""
+        cached = self._by_card.get(card_number)
+        if cached is MISSING:
+            return
+        cached["total_visits"] = cached.get("total_visits", 0) + 1
+        cached["last_visit"] = visited_at
+        cached["updated_at"] = visited_at
+
+    def invalidate_card(self, card_number: Optional[str]) -> None:
+        if card_number:
+            self._by_card.pop(card_number)
+
+    def clear(self) -> None:
+        self._by_card.clear()
+
+    def stats(self) -> dict:
+        return self._by_card.stats()
+
+
+customerCardCache = CustomerCardCache()
@@ -0,0 +1,197 @@
+import os
+import re
+import time
+import unicodedata
+from typing import Iterable, Optional
+
+from pymongo import UpdateOne
+
+# Arabic harakat, superscript alef and Quranic marks
+_ARABIC_MARKS = re.compile("[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED]")
+_TATWEEL = "\u0640"
+_ARABIC_LETTER_MAP = str.maketrans({
+    "أ": "ا",
+    "إ": "ا",
+    "آ": "ا",
+    "ٱ": "ا",
+    "ى": "ي",
+    "ئ": "ي",
+    "ؤ": "و",
+    "ة": "ه",
+})
+_EASTERN_DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹", "01234567890123456789")
+_TOKEN_SPLIT = re.compile(r"[^\w]+", re.UNICODE)
+
+MIN_PHONE_SUFFIX_DIGITS = 3
+TYPEAHEAD_MAX_TIME_MS = 200
+
+# Migration that backfills the search fields; until it is applied, rows it has
+# not reached are matched by the old substring scan. "off" skips that fallback.
+SEARCH_BACKFILL_MIGRATION = "0003"
+SEARCH_REGEX_FALLBACK = os.environ.get("SEARCH_REGEX_FALLBACK", "auto").lower()
+SEARCH_BACKFILL_RECHECK_SECONDS = float(os.environ.get("SEARCH_BACKFILL_RECHECK_SECONDS", "60"))
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Fold case, Latin accents and Arabic letter variants so both scripts compare consistently."""
+    if not value:
+        return ""
+    text = value.translate(_EASTERN_DIGITS)
+    text = _ARABIC_MARKS.sub("", text).replace(_TATWEEL, "")
+    text = text.translate(_ARABIC_LETTER_MAP)
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return text.casefold().strip()
+
+
+def name_tokens(*values: Optional[str]) -> list[str]:
+    tokens = set()
+    for value in values:
+        for token in _TOKEN_SPLIT.split(normalize_text(value)):
+            if token:
+                tokens.add(token)
+    return sorted(tokens)
+
+
+def phone_digits(value: Optional[str]) -> str:
+    if not value:
+        return ""
+    return re.sub(r"\D", "", value.translate(_EASTERN_DIGITS))
+
+
+def normalize_card(value: Optional[str]) -> str:
+    return re.sub(r"\s+", "", normalize_text(value))
+
+
+def build_search_fields(customer: dict) -> dict:
+    """Denormalized keys stored on each customer and served by prefix indexes."""
+    guardian = customer.get("guardian") or {}
+    phones = {
+        phone_digits(guardian.get(field))
+        for field in ("phone", "mobile", "whatsapp")
+    }
+    return {
+        "search_tokens": name_tokens(customer.get("child_name"), guardian.get("name")),
+        # Reversed so "ends with" phone lookups become anchored prefix scans
+        "search_phone_rev": sorted(p[::-1] for p in phones if p),
+        "search_card": normalize_card(customer.get("card_number")),
+    }
+
+
+def build_search_filter(search: str) -> Optional[dict]:
+    """
+    Translate a search box value into anchored-prefix clauses:
+    every name token must prefix-match, or the digits match a phone suffix,
+    or the value prefix-matches the card number.
+    """
+    clauses = []
+
+    tokens = name_tokens(search)
+    if tokens:
+        token_clauses = [{"search_tokens": {"$regex": f"^{re.escape(token)}"}} for token in tokens]
+        clauses.append(token_clauses[0] if len(token_clauses) == 1 else {"$and": token_clauses})
+
+    # Local numbers are typed with a trunk zero that international numbers drop
+    digits = phone_digits(search).lstrip("0")
+    if len(digits) >= MIN_PHONE_SUFFIX_DIGITS:
+        clauses.append({"search_phone_rev": {"$regex": f"^{re.escape(digits[::-1])}"}})
+
+    card = normalize_card(search)
+    if card:
+        clauses.append({"search_card": {"$regex": f"^{re.escape(card)}"}})
+
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+# Matched by substring, as before search fields existed, on customers still missing them
+UNINDEXED_SEARCH_FIELDS = ("child_name", "card_number", "guardian.name", "guardian.phone")
+
+
+def build_search_filter_with_fallback(search: str) -> Optional[dict]:
+    """
+    build_search_filter plus the old case-insensitive substring match, limited to
+    customers the search-field backfill (migration 0003) has not reached yet, so
+    they stay findable in the meantime. Only used while searchBackfill reports the
+    backfill as incomplete, since the substring branch cannot use an index.
+    """
+    search_filter = build_search_filter(search)
+    if search_filter is None:
+        return None
+    pattern = {"$regex": re.escape(search.strip()), "$options": "i"}
+    unindexed = {
+        "search_card": {"$exists": False},
+        "$or": [{field: pattern} for field in UNINDEXED_SEARCH_FIELDS],
+    }
+    return {"$or": [search_filter, unindexed]}
+
+
+class SearchBackfillStatus:
+    """
+    Whether every customer carries search fields, read from the migration record.
+
+    Checked at most every `recheck_seconds` until the migration is applied; after
+    that the answer cannot change, so searches stop paying for it.
+    """
+
+    def __init__(self, mode: str = SEARCH_REGEX_FALLBACK, recheck_seconds: float = SEARCH_BACKFILL_RECHECK_SECONDS):
+        self.mode = mode
+        self.recheck_seconds = recheck_seconds
+        self.clear()
+
+    def clear(self) -> None:
+        self._complete = False
+        self._checked_at: Optional[float] = None
+
+    def mark_complete(self) -> None:
+        self._complete = True
+
+    async def complete(self, db) -> bool:
+        if self.mode == "off" or self._complete:
+            return True
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.recheck_seconds:
+            self._checked_at = now
+            record = await db.migrations.find_one(
+                {"_id": SEARCH_BACKFILL_MIGRATION, "state": "applied"}, {"_id": 1}
+            )
+            self._complete = record is not None
+        return self._complete
+
+
+searchBackfill = SearchBackfillStatus()
+
+
+async def customer_search_filter(db, search: str) -> Optional[dict]:
+    """Indexed search filter, plus the substring fallback only while the backfill is incomplete."""
+    if await searchBackfill.complete(db):
+        return build_search_filter(search)
+    return build_search_filter_with_fallback(search)
+
+
+async def backfill_search_fields(db, batch_size: int = 500, only_missing: bool = True) -> int:
+    """Populate search fields on existing customers in batches; returns documents updated."""
+    query = {"search_card": {"$exists": False}} if only_missing else {}
+    projection = {"_id": 1, "child_name": 1, "card_number": 1, "guardian": 1}
+    updated = 0
+    last_id = None
+
+    while True:
+        page_query = dict(query)
+        if last_id is not None:
+            page_query["_id"] = {"$gt": last_id}
+        batch = await db.customers.find(page_query, projection).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not batch:
+            return updated
+
+        await db.customers.bulk_write(_search_field_updates(batch), ordered=False)
+        updated += len(batch)
+        last_id = batch[-1]["_id"]
+
+
+def _search_field_updates(customers: Iterable[dict]) -> list[UpdateOne]:
+    return [
+        UpdateOne({"_id": customer["_id"]}, {"$set": build_search_fields(customer)})
+        for customer in customers
+    ]
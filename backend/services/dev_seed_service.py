@@ -10,6 +10,7 @@ from models.customer import Customer, GuardianInfo
 from models.product import Product
 from models.user import User
 from models.zone import Zone
+from services.user_directory import userDirectory
 
 
 class DevSeedService:
@@ -20,6 +21,34 @@ class DevSeedService:
     def _is_dev_mode_enabled() -> bool:
         return os.environ.get("DEV_MODE", "").lower() == "true"
 
+    async def seed_load(self, profile, log=print) -> dict:
+        """
+        Load mode: insert a production-sized dataset (see services.load_data).
+
+        Idempotent per database: if the first load customer already exists nothing
+        is inserted.
+        """
+        if not self._is_dev_mode_enabled():
+            return {
+                "allowed": False,
+                "message": "DEV_MODE is not enabled",
+            }
+
+        from services.load_data import generate
+
+        if await self.db.customers.find_one({"card_number": "LD-0000000"}, {"_id": 1}):
+            return {
+                "allowed": True,
+                "message": "Load data already present",
+                "created": {},
+            }
+
+        return {
+            "allowed": True,
+            "message": "Load data inserted",
+            "created": await generate(self.db, profile, log=log),
+        }
+
     async def seed(self) -> dict:
         if not self._is_dev_mode_enabled():
             return {
@@ -77,6 +106,7 @@ class DevSeedService:
                 user_doc["created_at"] = user_doc["created_at"].isoformat()
                 user_doc["updated_at"] = user_doc["updated_at"].isoformat()
                 await self.db.users.insert_one(user_doc)
+                userDirectory.invalidate(user_doc)
                 created[account["key"]] = True
             users_by_key[account["key"]] = user_doc
 
@@ -0,0 +1,28 @@
+from typing import Optional
+
+from pymongo import ReturnDocument
+
+
+async def consume_visit_pack(db, pack_filter: dict, updated_at: str) -> Optional[dict]:
+    """
+    Atomically take one visit from the oldest matching ACTIVE pack with visits left.
+
+    The decrement and the ACTIVE -> EXHAUSTED flip run as one update pipeline, so
+    concurrent scanners can neither double-spend the last visit nor leave an
+    empty pack ACTIVE. Returns the pack after the update, or None if none matched.
+    """
+    return await db.visit_packs.find_one_and_update(
+        {**pack_filter, "status": "ACTIVE", "remaining_visits": {"$gt": 0}},
+        [
+            {"$set": {
+                "remaining_visits": {"$subtract": ["$remaining_visits", 1]},
+                "updated_at": updated_at,
+            }},
+            {"$set": {
+                "status": {"$cond": [{"$gt": ["$remaining_visits", 0]}, "ACTIVE", "EXHAUSTED"]},
+            }},
+        ],
+        projection={"_id": 0},
+        sort=[("purchased_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
@@ -1,10 +1,8 @@
-import os
-import uuid
 from dotenv import load_dotenv
 
 load_dotenv()
 
-GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
+from services.llm_service import llmService
 
 SYSTEM_PROMPT = """You are a warm, professional daycare teacher assistant. Your job is to transform raw teacher notes about a child's day into a polished, parent-friendly daily report.
 
@@ -21,52 +19,36 @@ Example output:
 {"report_ar": "قضى طفلكم يوماً رائعاً...", "report_en": "Your child had a wonderful day..."}"""
 
 
-async def generate_daily_report(child_name: str, teacher_notes: str, photo_url: str = None) -> dict:
-    """Generate a bilingual daily report using Gemini via emergentintegrations."""
-    if not GEMINI_API_KEY:
-        return {
-            "report_ar": f"تقرير يومي عن {child_name}: {teacher_notes}",
-            "report_en": f"Daily report for {child_name}: {teacher_notes}",
-        }
-
-    try:
-        from emergentintegrations.llm.chat import LlmChat, UserMessage
-
-        session_id = f"daily-report-{uuid.uuid4().hex[:8]}"
+def daily_report_fallback(child_name: str, teacher_notes: str) -> dict:
+    return {
+        "report_ar": f"تقرير يومي عن {child_name}: {teacher_notes}",
+        "report_en": f"Daily report for {child_name}: {teacher_notes}",
+    }
 
-        chat = LlmChat(
-            api_key=GEMINI_API_KEY,
-            session_id=session_id,
-            system_message=SYSTEM_PROMPT,
-        ).with_model("gemini", "gemini-2.5-flash")
 
-        prompt = f"Child name: {child_name}\nTeacher notes: {teacher_notes}"
-        if photo_url:
-            prompt += f"\nPhoto was attached (URL: {photo_url}). Mention that a photo update was shared."
+async def render_daily_report(child_name: str, teacher_notes: str, photo_url: str = None, db=None) -> dict:
+    """Like generate_daily_report, but generation errors propagate so callers can retry."""
+    if llmService.provider is None:
+        return daily_report_fallback(child_name, teacher_notes)
 
-        user_message = UserMessage(text=prompt)
-        response = await chat.send_message(user_message)
+    prompt = f"Child name: {child_name}\nTeacher notes: {teacher_notes}"
+    if photo_url:
+        prompt += f"\nPhoto was attached (URL: {photo_url}). Mention that a photo update was shared."
 
-        # Parse JSON from response
-        import json
-        response_text = response.strip()
-        # Handle markdown code blocks if present
-        if response_text.startswith("```"):
-            lines = response_text.split("\n")
-            response_text = "\n".join(lines[1:-1]) if len(lines) > 2 else response_text
+    parsed = await llmService.complete_json("daily-report", SYSTEM_PROMPT, prompt, db=db)
+    return {
+        "report_ar": parsed.get("report_ar", f"تقرير عن {child_name}"),
+        "report_en": parsed.get("report_en", f"Report for {child_name}"),
+    }
 
-        parsed = json.loads(response_text)
-        return {
-            "report_ar": parsed.get("report_ar", f"تقرير عن {child_name}"),
-            "report_en": parsed.get("report_en", f"Report for {child_name}"),
-        }
 
+async def generate_daily_report(child_name: str, teacher_notes: str, photo_url: str = None, db=None) -> dict:
+    """Generate a bilingual daily report, reusing cached output for an identical prompt."""
+    try:
+        return await render_daily_report(child_name, teacher_notes, photo_url, db=db)
     except Exception as exc:
         print(f"Gemini generation error: {exc}")
-        return {
-            "report_ar": f"تقرير يومي عن {child_name}: {teacher_notes}",
-            "report_en": f"Daily report for {child_name}: {teacher_notes}",
-        }
+        return daily_report_fallback(child_name, teacher_notes)
 
 
 LESSON_PLAN_PROMPT = """You are an expert early childhood education curriculum designer. Generate a structured, age-appropriate lesson plan for a daycare/preschool setting.
@@ -84,39 +66,21 @@ Example output:
 {"plan_ar": "الهدف: ... المواد: ... المقدمة: ...", "plan_en": "Objective: ... Materials: ... Introduction: ..."}"""
 
 
-async def generate_lesson_plan(topic: str, age_group: str, duration_minutes: int = 30, objectives: str = "") -> dict:
-    """Generate a bilingual lesson plan using Gemini."""
-    if not GEMINI_API_KEY:
-        return {
-            "plan_ar": f"خطة درس عن: {topic} — الفئة العمرية: {age_group}",
-            "plan_en": f"Lesson plan about: {topic} — Age group: {age_group}",
-        }
+async def generate_lesson_plan(topic: str, age_group: str, duration_minutes: int = 30, objectives: str = "", db=None) -> dict:
+    """Generate a bilingual lesson plan; identical topic/age-group requests share one generation."""
+    fallback = {
+        "plan_ar": f"خطة درس عن: {topic} — الفئة العمرية: {age_group}",
+        "plan_en": f"Lesson plan about: {topic} — Age group: {age_group}",
+    }
+    if llmService.provider is None:
+        return fallback
 
     try:
-        from emergentintegrations.llm.chat import LlmChat, UserMessage
-
-        session_id = f"lesson-plan-{uuid.uuid4().hex[:8]}"
-
-        chat = LlmChat(
-            api_key=GEMINI_API_KEY,
-            session_id=session_id,
-            system_message=LESSON_PLAN_PROMPT,
-        ).with_model("gemini", "gemini-2.5-flash")
-
         prompt = f"Topic: {topic}\nAge group: {age_group}\nDuration: {duration_minutes} minutes"
         if objectives:
             prompt += f"\nLearning objectives: {objectives}"
 
-        user_message = UserMessage(text=prompt)
-        response = await chat.send_message(user_message)
-
-        import json
-        response_text = response.strip()
-        if response_text.startswith("```"):
-            lines = response_text.split("\n")
-            response_text = "\n".join(lines[1:-1]) if len(lines) > 2 else response_text
-
-        parsed = json.loads(response_text)
+        parsed = await llmService.complete_json("lesson-plan", LESSON_PLAN_PROMPT, prompt, db=db)
         return {
             "plan_ar": parsed.get("plan_ar", f"خطة درس عن {topic}"),
             "plan_en": parsed.get("plan_en", f"Lesson plan about {topic}"),
@@ -124,7 +88,4 @@ async def generate_lesson_plan(topic: str, age_group: str, duration_minutes: int
 
     except Exception as exc:
         print(f"Gemini lesson plan error: {exc}")
-        return {
-            "plan_ar": f"خطة درس عن: {topic} — الفئة العمرية: {age_group}",
-            "plan_en": f"Lesson plan about: {topic} — Age group: {age_group}",
-        }
+        return fallback
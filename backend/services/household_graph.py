@@ -0,0 +1,133 @@
+import copy
+import os
+from typing import Iterable, Optional
+
+from utils.cache import MISSING, TTLCache
+
+HOUSEHOLD_GRAPH_TTL_SECONDS = float(os.environ.get("HOUSEHOLD_GRAPH_TTL_SECONDS", "300"))
+HOUSEHOLD_GRAPH_MAX_ENTRIES = int(os.environ.get("HOUSEHOLD_GRAPH_MAX_ENTRIES", "20000"))
+
+
+class HouseholdGraph:
+    """
+    Lazily built map of guardians, children, households and linked customers.
+
+    Nodes are loaded on first use and kept for HOUSEHOLD_GRAPH_TTL_SECONDS:
+    guardian -> child ids, child -> guardian, and household -> household document
+    plus the ids of customers linked to it. Writes in this process invalidate the
+    affected nodes; the TTL bounds how long another replica's write goes unseen.
+    Guardians without children and unknown households are never cached, so a
+    first child or a new household is visible immediately everywhere.
+    """
+
+    def __init__(self, ttl_seconds: float = HOUSEHOLD_GRAPH_TTL_SECONDS, max_entries: int = HOUSEHOLD_GRAPH_MAX_ENTRIES):
+        self._children_by_guardian = TTLCache(ttl_seconds, max_entries)
+        self._guardian_by_child = TTLCache(ttl_seconds, max_entries)
+        self._households = TTLCache(ttl_seconds, max_entries)
+
+    async def child_ids_for_guardian(self, db, guardian_id: Optional[str]) -> list[str]:
+        if not guardian_id:
+            return []
+        cached = self._children_by_guardian.get(guardian_id)
+        if cached is not MISSING:
+            return list(cached)
+
+        children = await db.children.find(
+            {"guardian_id": guardian_id}, {"_id": 0, "child_id": 1},
+        ).to_list(None)
+        child_ids = tuple(c["child_id"] for c in children if c.get("child_id"))
+        if child_ids:
+            self._children_by_guardian.set(guardian_id, child_ids)
+            for child_id in child_ids:
+                self._guardian_by_child.set(child_id, guardian_id)
+        return list(child_ids)
+
+    async def guardians_for_children(self, db, child_ids: Iterable[str]) -> dict:
+        """child_id -> guardian_id for the given children; one query for the uncached ones."""
+        result = {}
+        missing = []
+        for child_id in {c for c in child_ids if c}:
+            cached = self._guardian_by_child.get(child_id)
+            if cached is MISSING:
+                missing.append(child_id)
+            else:
+                result[child_id] = cached
+
+        if missing:
+            children = await db.children.find(
+                {"child_id": {"$in": missing}}, {"_id": 0, "child_id": 1, "guardian_id": 1},
+            ).to_list(len(missing))
+            for child in children:
+                if child.get("guardian_id"):
+                    self._guardian_by_child.set(child["child_id"], child["guardian_id"])
+                    result[child["child_id"]] = child["guardian_id"]
+        return result
+
+    async def households(self, db, household_ids: Iterable[str]) -> dict:
+        """
+        household_id -> household document with a `customer_ids` list.
+
+        Uncached households cost one `$in` on households and one on customers.
+        """
+        result = {}
+        missing = []
+        for household_id in {h for h in household_ids if h}:
+            cached = self._households.get(household_id)
+            if cached is MISSING:
+                missing.append(household_id)
+            else:
+                result[household_id] = copy.deepcopy(cached)
+
+        if missing:
+            households = await db.households.find(
+                {"household_id": {"$in": missing}}, {"_id": 0},
+            ).to_list(len(missing))
+            linked = {h["household_id"]: [] for h in households}
+            if linked:
+                customers = await db.customers.find(
+                    {"household_id": {"$in": list(linked)}}, {"_id": 0, "customer_id": 1, "household_id": 1},
+                ).to_list(None)
+                for customer in customers:
+                    linked[customer["household_id"]].append(customer["customer_id"])
+            for household in households:
+                household["customer_ids"] = linked[household["household_id"]]
+                self._households.set(household["household_id"], household)
+                result[household["household_id"]] = copy.deepcopy(household)
+        return result
+
+    async def household(self, db, household_id: Optional[str]) -> Optional[dict]:
+        if not household_id:
+            return None
+        return (await self.households(db, [household_id])).get(household_id)
+
+    def invalidate_child(self, child: Optional[dict]) -> None:
+        """Drop nodes touched by a child being created or changed."""
+        child = child or {}
+        if child.get("guardian_id"):
+            self._children_by_guardian.pop(child["guardian_id"])
+        if child.get("child_id"):
+            self._guardian_by_child.pop(child["child_id"])
+
+    def invalidate_household(self, *household_ids: Optional[str]) -> None:
+        for household_id in household_ids:
+            if household_id:
+                self._households.pop(household_id)
+
+    def invalidate_customer(self, *customers: Optional[dict]) -> None:
+        """Customers link to households; pass both the old and new document on a move."""
+        self.invalidate_household(*((c or {}).get("household_id") for c in customers))
+
+    def clear(self) -> None:
+        self._children_by_guardian.clear()
+        self._guardian_by_child.clear()
+        self._households.clear()
+
+    def stats(self) -> dict:
+        return {
+            "guardians": self._children_by_guardian.stats(),
+            "children": self._guardian_by_child.stats(),
+            "households": self._households.stats(),
+        }
+
+
+householdGraph = HouseholdGraph()
@@ -0,0 +1,163 @@
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+
+from utils.cache import MISSING, TTLCache
+
+LLM_PROVIDER = os.environ.get("LLM_PROVIDER", "gemini").lower()
+GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
+GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-2.5-flash")
+
+LLM_CACHE_TTL_SECONDS = float(os.environ.get("LLM_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "2000"))
+
+
+class GeminiProvider:
+    def __init__(self, api_key: str, model: str = GEMINI_MODEL):
+        self.api_key = api_key
+        self.model = model
+
+    async def complete(self, kind: str, system_prompt: str, prompt: str) -> str:
+        from emergentintegrations.llm.chat import LlmChat, UserMessage
+
+        # LlmChat keeps per-session history, so every generation gets its own session
+        chat = LlmChat(
+            api_key=self.api_key,
+            session_id=f"{kind}-{uuid.uuid4().hex[:8]}",
+            system_message=system_prompt,
+        ).with_model("gemini", self.model)
+        return await chat.send_message(UserMessage(text=prompt))
+
+
+class StubProvider:
+    """Deterministic local provider for tests and offline development (LLM_PROVIDER=stub)."""
+
+    model = "stub"
+
+    def __init__(self, delay_seconds: float = 0.0):
+        self.delay_seconds = delay_seconds
+        self.calls = 0
+
+    async def complete(self, kind: str, system_prompt: str, prompt: str) -> str:
+        self.calls += 1
+        if self.delay_seconds:
+            await asyncio.sleep(self.delay_seconds)
+        summary = " | ".join(line.strip() for line in prompt.splitlines() if line.strip())
+        return json.dumps({
+            "report_ar": f"[stub] {summary}",
+            "report_en": f"[stub] {summary}",
+            "plan_ar": f"[stub] {summary}",
+            "plan_en": f"[stub] {summary}",
+        }, ensure_ascii=False)
+
+
+def default_provider():
+    if LLM_PROVIDER == "stub":
+        return StubProvider()
+    if LLM_PROVIDER == "gemini" and GEMINI_API_KEY:
+        return GeminiProvider(GEMINI_API_KEY)
+    return None
+
+
+def normalize_prompt(prompt: str) -> str:
+    # Whitespace only: case is part of names and notes the reply echoes back
+    return " ".join(prompt.split())
+
+
+def cache_key(kind: str, model: str, system_prompt: str, prompt: str) -> str:
+    """Content address of one generation: same kind, model, instructions and normalized prompt."""
+    raw = json.dumps([kind, model, system_prompt, normalize_prompt(prompt)], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def parse_json_response(text: str) -> dict:
+    response_text = text.strip()
+    # Handle markdown code blocks if present
+    if response_text.startswith("```"):
+        lines = response_text.split("\n")
+        response_text = "\n".join(lines[1:-1]) if len(lines) > 2 else response_text
+    return json.loads(response_text)
+
+
+class LLMService:
+    """
+    Cached, coalesced JSON generations.
+
+    Outputs are content-addressed by (kind, model, system prompt, normalized
+    prompt). They are kept in memory and, when a database is passed, in the
+    `llm_cache` collection so every worker shares them. Concurrent identical
+    requests share one provider call. Failed or unparseable generations are
+    never cached.
+    """
+
+    def __init__(self, provider=MISSING, ttl_seconds: float = LLM_CACHE_TTL_SECONDS, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self._provider = provider
+        self._memory = TTLCache(ttl_seconds, max_entries)
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self.provider_calls = 0
+        self.coalesced = 0
+
+    @property
+    def provider(self):
+        if self._provider is MISSING:
+            self._provider = default_provider()
+        return self._provider
+
+    async def complete_json(self, kind: str, system_prompt: str, prompt: str, db=None) -> dict:
+        provider = self.provider
+        if provider is None:
+            raise RuntimeError("No LLM provider configured")
+
+        key = cache_key(kind, provider.model, system_prompt, prompt)
+        cached = self._memory.get(key)
+        if cached is not MISSING:
+            return copy.deepcopy(cached)
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._generate(key, kind, provider, system_prompt, prompt, db))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+        # Shielded so one caller disconnecting does not cancel the shared generation
+        return copy.deepcopy(await asyncio.shield(task))
+
+    def _finish(self, key: str, task: asyncio.Future) -> None:
+        self._in_flight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # Mark retrieved even if every waiter went away
+
+    async def _generate(self, key: str, kind: str, provider, system_prompt: str, prompt: str, db) -> dict:
+        if db is not None:
+            stored = await db.llm_cache.find_one({"_id": key}, {"_id": 0, "output": 1})
+            if stored:
+                self._memory.set(key, stored["output"])
+                return stored["output"]
+
+        self.provider_calls += 1
+        output = parse_json_response(await provider.complete(kind, system_prompt, prompt))
+        self._memory.set(key, output)
+
+        if db is not None:
+            try:
+                await db.llm_cache.update_one(
+                    {"_id": key},
+                    # BSON date so the TTL index can expire it
+                    {"$setOnInsert": {"kind": kind, "model": provider.model, "output": output,
+                                      "created_at": datetime.now(timezone.utc)}},
+                    upsert=True,
+                )
+            except Exception as exc:
+                print(f"Warning: failed to store LLM cache entry: {exc}")
+        return output
+
+    def stats(self) -> dict:
+        return {**self._memory.stats(), "provider_calls": self.provider_calls, "coalesced": self.coalesced}
+
+
+llmService = LLMService()
@@ -0,0 +1,437 @@
+import asyncio
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional
+
+from models.branch import Branch
+from models.product import Product
+from models.user import User
+from services.customer_search import build_search_fields
+
+FIRST_NAMES = [
+    "Omar", "Layla", "Yousef", "Lina", "Adam", "Sara", "Zaid", "Jana", "Hamza", "Mira",
+    "Karim", "Noor", "Ali", "Salma", "Tamer", "Dana", "Faris", "Rama", "Hasan", "Yara",
+    "عمر", "ليلى", "يوسف", "لينا", "آدم", "سارة", "زيد", "جنى", "حمزة", "ميرا",
+]
+FAMILY_NAMES = [
+    "Haddad", "Khalil", "Nasser", "Saleh", "Mansour", "Qasem", "Barakat", "Odeh", "Khoury", "Hijazi",
+    "حداد", "خليل", "ناصر", "صالح", "منصور", "قاسم", "بركات", "عودة", "خوري", "حجازي",
+]
+CITIES = ["Amman", "Irbid", "Zarqa", "Aqaba", "Salt"]
+
+# (name_en, name_ar, category, price, weight) - play time, snack bar and retail
+PRODUCTS = [
+    ("1 hour play", "ساعة لعب", "WALK_IN", 7.0, 30),
+    ("2 hour play", "ساعتان لعب", "WALK_IN", 10.0, 20),
+    ("Juice", "عصير", "FOOD_DRINK", 1.5, 25),
+    ("Water", "ماء", "FOOD_DRINK", 0.5, 25),
+    ("Snack box", "وجبة خفيفة", "FOOD_DRINK", 3.0, 15),
+    ("Socks", "جوارب", "RETAIL", 2.0, 10),
+    ("Day pass", "تذكرة يومية", "PLAY_PASS", 25.0, 3),
+]
+EVENT_TYPES = ["birthday", "school_trip", "private_event", "workshop"]
+
+# Relative check-in volume by hour of day (opening 9:00 to 21:00) and weekday
+HOUR_WEIGHTS = {9: 2, 10: 6, 11: 8, 12: 6, 13: 4, 14: 4, 15: 6, 16: 9, 17: 10, 18: 8, 19: 5, 20: 2}
+# Friday/Saturday are the Jordanian weekend
+WEEKDAY_WEIGHTS = [1.0, 1.0, 1.0, 1.1, 1.9, 1.8, 1.0]
+
+
+@dataclass
+class LoadProfile:
+    """How much data to generate; defaults are roughly one busy year across a chain."""
+
+    branches: int = 3
+    customers: int = 100_000
+    sessions: int = 2_000_000
+    days: int = 365
+    order_rate: float = 0.6
+    events_per_branch_week: float = 4.0
+    staff_per_branch: int = 8
+    seed: int = 42
+    anchor: Optional[datetime] = None
+    batch_size: int = 1000
+    concurrency: int = 8
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _iso(moment: datetime) -> str:
+    return moment.isoformat()
+
+
+def _dump(model) -> dict:
+    doc = model.model_dump()
+    return {k: _iso(v) if isinstance(v, datetime) else v for k, v in doc.items()}
+
+
+class LoadDataGenerator:
+    """
+    Deterministic production-sized dataset.
+
+    Every customer gets its own Random seeded from (seed, index), so the same
+    profile always produces the same documents regardless of batch size or
+    concurrency. Visit counts are heavy-tailed (a few regulars, many one-off
+    visitors), check-ins follow opening-hour and weekend peaks, and each visit
+    carries its orders and ledger events. High-volume documents are built as
+    plain dicts in the shape the routers write (pydantic per document would
+    dominate generation time); the few branches, staff and products go through
+    their models.
+    """
+
+    def __init__(self, profile: LoadProfile):
+        self.profile = profile
+        self.anchor = profile.anchor or datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        rng = random.Random(f"{profile.seed}:shared")
+        self.branches = [self._branch(rng, i) for i in range(profile.branches)]
+        self.staff = [self._staff(rng, branch, i) for branch in self.branches for i in range(profile.staff_per_branch)]
+        self.products = [self._product(rng, *spec) for spec in PRODUCTS]
+        self._product_weights = [spec[-1] for spec in PRODUCTS]
+        self._hours = list(HOUR_WEIGHTS)
+        self._hour_weights = list(HOUR_WEIGHTS.values())
+        # Heavy-tailed (Lomax) visit weights scaled so the expected total roughly
+        # matches profile.sessions: many occasional visitors, a few near-daily regulars
+        weight_rng = random.Random(f"{profile.seed}:visits")
+        self._visit_weights = [weight_rng.paretovariate(2.0) - 1 for _ in range(profile.customers)]
+        self._visit_scale = profile.sessions / max(sum(self._visit_weights), 1e-9)
+
+    def _branch(self, rng, i: int) -> dict:
+        created = self.anchor - timedelta(days=self.profile.days + 30)
+        return _dump(Branch(
+            branch_id=_uuid(rng),
+            name=f"Load Branch {i + 1}",
+            name_ar=f"فرع {i + 1}",
+            address=f"{i + 1} Load Street",
+            city=CITIES[i % len(CITIES)],
+            phone=f"+96279{i:07d}",
+            email=f"branch{i + 1}@load.local",
+            created_at=created,
+            updated_at=created,
+        ))
+
+    def _staff(self, rng, branch: dict, i: int) -> dict:
+        created = self.anchor - timedelta(days=self.profile.days + 30)
+        staff = _dump(User(
+            user_id=_uuid(rng),
+            email=f"staff{i}.{branch['branch_id'][:8]}@load.local",
+            # Not a bcrypt hash: load data staff cannot log in
+            password_hash="!",
+            display_name=f"{rng.choice(FIRST_NAMES)} {rng.choice(FAMILY_NAMES)}",
+            role=rng.choice(["RECEPTION", "RECEPTION", "STAFF"]),
+            created_at=created,
+            updated_at=created,
+        ))
+        staff["branch_id"] = branch["branch_id"]
+        return staff
+
+    def _product(self, rng, name_en: str, name_ar: str, category: str, price: float, _weight: int) -> dict:
+        created = self.anchor - timedelta(days=self.profile.days + 30)
+        return _dump(Product(
+            product_id=_uuid(rng),
+            name_en=f"{name_en} (load)",
+            name_ar=name_ar,
+            category=category,
+            price=price,
+            created_at=created,
+            updated_at=created,
+        ))
+
+    def _visit_time(self, rng, first_day: int) -> datetime:
+        while True:
+            day = rng.randint(first_day, self.profile.days - 1)
+            moment = self.anchor - timedelta(days=self.profile.days - day)
+            if rng.random() * max(WEEKDAY_WEIGHTS) <= WEEKDAY_WEIGHTS[moment.weekday()]:
+                break
+        hour = rng.choices(self._hours, self._hour_weights)[0]
+        return moment + timedelta(hours=hour, minutes=rng.randint(0, 59), seconds=rng.randint(0, 59))
+
+    def customer(self, index: int) -> dict:
+        """One customer with all of its visits: {collection: [docs]}."""
+        rng = random.Random(f"{self.profile.seed}:customer:{index}")
+        branch = self.branches[index % len(self.branches)] if rng.random() < 0.85 else rng.choice(self.branches)
+        # Customers join throughout the period; regulars tend to be older accounts
+        joined_day = int(rng.random() ** 2 * self.profile.days * 0.9)
+        joined = self.anchor - timedelta(days=self.profile.days - joined_day, hours=rng.randint(0, 12))
+        family = rng.choice(FAMILY_NAMES)
+        guardian_phone = f"+9627{rng.choice('789')}{rng.randint(0, 9_999_999):07d}"
+        child_dob = joined.date() - timedelta(days=rng.randint(200, 4 * 365))
+
+        visits = sorted(
+            self._visit_time(rng, joined_day)
+            for _ in range(self._visit_count(rng, index))
+        )
+        last_visit = _iso(visits[-1]) if visits else None
+
+        customer = {
+            "customer_id": self.customer_id(index),
+            "card_number": f"LD-{index:07d}",
+            "child_name": f"{rng.choice(FIRST_NAMES)} {family}",
+            "child_dob": child_dob.isoformat(),
+            "child_gender": rng.choice(["male", "female"]),
+            "child_allergies": "nuts" if rng.random() < 0.04 else None,
+            "child_notes": None,
+            "guardian": {
+                "name": f"{rng.choice(FIRST_NAMES)} {family}",
+                "mobile": guardian_phone,
+                "phone": guardian_phone,
+                "email": f"guardian{index}@load.local" if rng.random() < 0.6 else None,
+            },
+            "branch_id": branch["branch_id"],
+            "household_id": None,
+            "waiver_accepted": True,
+            "waiver_accepted_at": _iso(joined),
+            "notes": None,
+            "status": "active" if rng.random() < 0.97 else "inactive",
+            "total_visits": len(visits),
+            "last_visit": last_visit,
+            "created_at": _iso(joined),
+            "updated_at": last_visit or _iso(joined),
+        }
+        customer.update(build_search_fields(customer))
+
+        docs = {"customers": [customer], "checkin_sessions": [], "orders": [], "event_ledger": []}
+        for check_in in visits:
+            self._visit(rng, customer, check_in, docs)
+        return docs
+
+    def _visit_count(self, rng, index: int) -> int:
+        expected = min(self._visit_weights[index] * self._visit_scale, self.profile.days * 0.8)
+        count = int(expected)
+        return count + (1 if rng.random() < expected - count else 0)
+
+    def _visit(self, rng, customer: dict, check_in: datetime, docs: dict) -> None:
+        branch_id = customer["branch_id"]
+        staff = rng.choice(self.staff)
+        minutes = max(15, min(int(rng.lognormvariate(4.5, 0.4)), 360))
+        check_out = check_in + timedelta(minutes=minutes)
+        still_inside = check_out > datetime.now(timezone.utc)
+        overdue = max(0, minutes - 120)
+        session_id = _uuid(rng)
+
+        order = None
+        if rng.random() < self.profile.order_rate:
+            order = self._order(rng, customer, staff, check_in + timedelta(minutes=rng.randint(0, minutes)))
+            docs["orders"].append(order)
+
+        docs["checkin_sessions"].append({
+            "session_id": session_id,
+            "customer_id": customer["customer_id"],
+            "card_number": customer["card_number"],
+            "branch_id": branch_id,
+            "check_in_time": _iso(check_in),
+            "check_out_time": None if still_inside else _iso(check_out),
+            "duration_minutes": None if still_inside else minutes,
+            "included_minutes": 120,
+            "overdue_minutes": 0 if still_inside else overdue,
+            "overdue_amount": 0.0 if still_inside else round(-(-overdue // 60) * 3.0, 2),
+            "payment_type": "SUBSCRIPTION" if rng.random() < 0.2 else "HOURLY",
+            "subscription_id": None,
+            "order_id": order["order_id"] if order else None,
+            "amount_charged": order["total_amount"] if order else 0.0,
+            "status": "CHECKED_IN" if still_inside else ("OVERDUE" if overdue else "CHECKED_OUT"),
+            "wristband_id": None,
+            "wristband_status": "not_assigned",
+            "session_active": still_inside,
+            "session_started_at": _iso(check_in),
+            "notes": None,
+            "created_by": staff["user_id"],
+            "created_at": _iso(check_in),
+            "updated_at": _iso(check_in if still_inside else check_out),
+        })
+
+        ledger = docs["event_ledger"]
+        ledger.append(self._ledger(rng, "CHECK_IN", check_in, staff, branch_id, session_id=session_id))
+        if order:
+            ledger.append(self._ledger(rng, "ORDER_CREATED", order["created_at"], staff, branch_id,
+                                       order_id=order["order_id"]))
+            if order["status"] == "PAID":
+                ledger.append(self._ledger(rng, "PAYMENT_CAPTURED", order["paid_at"], staff, branch_id,
+                                           order_id=order["order_id"]))
+        if not still_inside:
+            ledger.append(self._ledger(rng, "CHECK_OUT", check_out, staff, branch_id, session_id=session_id))
+
+    def _order(self, rng, customer: dict, staff: dict, created: datetime) -> dict:
+        items = []
+        for product in rng.choices(self.products, self._product_weights, k=rng.choice([1, 1, 1, 2, 2, 3])):
+            quantity = rng.randint(1, 3) if product["category"] == "FOOD_DRINK" else 1
+            items.append({
+                "item_id": _uuid(rng),
+                "product_id": product["product_id"],
+                "product_name_ar": product["name_ar"],
+                "product_name_en": product["name_en"],
+                "quantity": quantity,
+                "unit_price": product["price"],
+                "line_total": round(product["price"] * quantity, 2),
+                "notes": None,
+            })
+        subtotal = round(sum(item["line_total"] for item in items), 2)
+        tax = round(subtotal * 0.16, 2)
+        status = rng.choices(["PAID", "OPEN", "CANCELLED", "REFUNDED"], [90, 4, 4, 2])[0]
+        paid_at = created + timedelta(minutes=rng.randint(0, 5)) if status in ("PAID", "REFUNDED") else None
+        order_id = _uuid(rng)
+        return {
+            "order_id": order_id,
+            "order_number": f"ORD-{created:%Y%m%d}-{order_id[:8].upper()}",
+            "guardian_id": None,
+            "child_id": customer["customer_id"],
+            "items": items,
+            "subtotal": subtotal,
+            "tax_amount": tax,
+            "tax_rate": 0.16,
+            "total_amount": round(subtotal + tax, 2),
+            "status": status,
+            "payment_method": rng.choices(["CASH", "CARD"], [60, 40])[0],
+            "order_source": "POS",
+            "paid_at": _iso(paid_at) if paid_at else None,
+            "notes": None,
+            "created_by": staff["user_id"],
+            "created_at": _iso(created),
+            "updated_at": _iso(paid_at or created),
+        }
+
+    def _ledger(self, rng, event_type: str, when, staff: dict, branch_id: str,
+                session_id: Optional[str] = None, order_id: Optional[str] = None) -> dict:
+        return {
+            "id": _uuid(rng),
+            "eventType": event_type,
+            "timestamp": when if isinstance(when, str) else _iso(when),
+            "actorType": "staff",
+            "actorId": staff["user_id"],
+            "sessionId": session_id,
+            "orderId": order_id,
+            "deviceId": None,
+            "branchId": branch_id,
+            "metadata": {"load": True},
+        }
+
+    def events(self) -> Iterator[dict]:
+        """Bookable events per branch and their registrations: {collection: [docs]} per event."""
+        weeks = self.profile.days / 7
+        for b, branch in enumerate(self.branches):
+            rng = random.Random(f"{self.profile.seed}:events:{b}")
+            members = [i for i in range(b, self.profile.customers, len(self.branches))]
+            for _ in range(int(weeks * self.profile.events_per_branch_week)):
+                day = self.anchor - timedelta(days=rng.randint(-30, self.profile.days))
+                capacity = rng.randint(10, 30)
+                event_id = _uuid(rng)
+                status = "cancelled" if rng.random() < 0.05 else "scheduled"
+                booked = 0 if status == "cancelled" else int(capacity * rng.uniform(0.4, 1.0))
+                start = rng.choice([10, 12, 15, 17])
+                created = _iso(day - timedelta(days=rng.randint(3, 30)))
+                registrations = [
+                    {
+                        "id": _uuid(rng),
+                        "event_id": event_id,
+                        "customer_id": self.customer_id(index),
+                        "status": "booked",
+                        "created_at": created,
+                        "updated_at": created,
+                        "created_by": rng.choice(self.staff)["user_id"],
+                    }
+                    for index in rng.sample(members, min(booked, len(members)))
+                ]
+                yield {
+                    "events": [{
+                        "id": event_id,
+                        "title": f"{rng.choice(EVENT_TYPES).replace('_', ' ').title()} {day:%d/%m}",
+                        "type": rng.choice(EVENT_TYPES),
+                        "branch_id": branch["branch_id"],
+                        "date": day.date().isoformat(),
+                        "start_time": f"{start:02d}:00",
+                        "end_time": f"{start + 2:02d}:00",
+                        "capacity": capacity,
+                        "price": float(rng.choice([5, 10, 15, 20])),
+                        "customer_id": None,
+                        "status": "full" if booked >= capacity else status,
+                        "notes": None,
+                        "booked_count": len(registrations),
+                        "created_at": created,
+                        "updated_at": created,
+                    }],
+                    "event_registrations": registrations,
+                }
+
+    def customer_id(self, index: int) -> str:
+        # Own stream so registrations can reference customers without regenerating them
+        return _uuid(random.Random(f"{self.profile.seed}:customer-id:{index}"))
+
+
+class LoadDataWriter:
+    """
+    Buffers generated docs per collection and flushes them with parallel insert_many calls.
+
+    A failed batch is logged when it happens and re-raised from close(), so a
+    partial dataset is never reported as complete.
+    """
+
+    def __init__(self, db, batch_size: int, concurrency: int, log=print):
+        self.db = db
+        self.batch_size = batch_size
+        self._slots = asyncio.Semaphore(concurrency)
+        self._buffers: dict[str, list] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self.counts: dict[str, int] = {}
+        self.errors: list[Exception] = []
+        self.log = log
+
+    async def add(self, docs_by_collection: dict) -> None:
+        for collection, docs in docs_by_collection.items():
+            buffer = self._buffers.setdefault(collection, [])
+            buffer.extend(docs)
+            while len(buffer) >= self.batch_size:
+                await self._flush(collection, buffer[:self.batch_size])
+                del buffer[:self.batch_size]
+
+    async def _flush(self, collection: str, batch: list) -> None:
+        # Waiting for a free slot here is the backpressure on the generator
+        await self._slots.acquire()
+        task = asyncio.create_task(self._insert(collection, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _insert(self, collection: str, batch: list) -> None:
+        try:
+            await self.db[collection].insert_many(batch, ordered=False)
+            self.counts[collection] = self.counts.get(collection, 0) + len(batch)
+        except Exception as exc:
+            # Kept here rather than raised: finished tasks leave _tasks before close() gathers
+            self.errors.append(exc)
+            self.log(f"Warning: inserting {len(batch)} {collection} failed: {exc}")
+        finally:
+            self._slots.release()
+
+    async def close(self) -> dict:
+        for collection, buffer in self._buffers.items():
+            if buffer:
+                await self._flush(collection, list(buffer))
+                buffer.clear()
+        await asyncio.gather(*list(self._tasks))
+        if self.errors:
+            raise RuntimeError(f"{len(self.errors)} load-data batches failed") from self.errors[0]
+        return dict(self.counts)
+
+
+async def generate(db, profile: LoadProfile, log=print) -> dict:
+    """Insert a full load dataset; returns documents inserted per collection."""
+    generator = LoadDataGenerator(profile)
+    writer = LoadDataWriter(db, profile.batch_size, profile.concurrency, log=log)
+    started = time.perf_counter()
+
+    await writer.add({"branches": generator.branches, "users": generator.staff, "products": generator.products})
+    for index in range(profile.customers):
+        await writer.add(generator.customer(index))
+        if (index + 1) % 10_000 == 0:
+            elapsed = time.perf_counter() - started
+            log(f"  {index + 1}/{profile.customers} customers, "
+                f"{sum(writer.counts.values())} documents ({sum(writer.counts.values()) / elapsed:.0f}/s)")
+    for event in generator.events():
+        await writer.add(event)
+
+    counts = await writer.close()
+    log(f"Inserted {sum(counts.values())} documents in {time.perf_counter() - started:.1f}s")
+    return counts
@@ -1,6 +1,8 @@
 from datetime import datetime, timezone
 from typing import Optional
 
+from services.user_directory import userDirectory
+
 
 TEMPLATES = {
     "CHECKIN": "✅ {child_name} checked in at {time}{branch_suffix}.",
@@ -147,17 +149,14 @@ async def _resolve_recipient_user_id(db, entity_type: str, entity_id: str, after
         if session:
             customer = await _safe_find_one(db, "customers", {"customer_id": session.get("customer_id")}, {"_id": 0})
             if customer:
-                guardian = customer.get("guardian") or {}
-                guardian_email = guardian.get("email")
-                guardian_phone = guardian.get("whatsapp") or guardian.get("phone")
-                if guardian_email:
-                    user = await _safe_find_one(db, "users", {"email": guardian_email}, {"_id": 0, "user_id": 1})
-                    if user:
-                        return user.get("user_id")
-                if guardian_phone:
-                    user = await _safe_find_one(db, "users", {"phone": guardian_phone}, {"_id": 0, "user_id": 1})
-                    if user:
-                        return user.get("user_id")
+                try:
+                    user_id = await userDirectory.resolve_guardian_id(
+                        db, customer.get("guardian"), phone_fields=("whatsapp", "phone")
+                    )
+                except Exception:
+                    user_id = None
+                if user_id:
+                    return user_id
 
     if entity_type == "SESSION":
         session = await _safe_find_one(db, "sessions", {"session_id": entity_id}, {"_id": 0, "guardian_id": 1})
@@ -308,3 +307,38 @@ async def maybe_send_whatsapp_notification(
     }
     await _safe_insert_notification_log(db, notification_event)
     return notification_event
+
+
+async def send_bulk_notifications(db, entity_type: str, action: str, notifications: list[dict]) -> int:
+    """
+    Batch variant of maybe_send_whatsapp_notification for scheduled jobs.
+
+    Each item carries entity_id, recipient_user_id and optional after_state/notes,
+    so no per-item context lookups are needed; logs are written with one insert_many.
+    """
+    template_key = TRIGGER_TO_TEMPLATE.get((entity_type, action))
+    if not template_key or not notifications:
+        return 0
+
+    created_at = datetime.now(timezone.utc).isoformat()
+    logs = []
+    for item in notifications:
+        after_state = item.get("after_state") or {}
+        message = _format_message(template_key, entity_type, item["entity_id"], action, after_state, item.get("notes"))
+        await sendWhatsAppMessage(item["recipient_user_id"], message)
+        logs.append({
+            "event_type": entity_type,
+            "event_id": item["entity_id"],
+            "action": action,
+            "template": template_key,
+            "recipient_user_id": item["recipient_user_id"],
+            "message": message,
+            "status": "SENT",
+            "created_at": created_at,
+        })
+
+    try:
+        await db.notification_logs.insert_many(logs, ordered=False)
+    except Exception as exc:
+        print(f"Warning: could not persist {len(logs)} notification logs: {exc}")
+    return len(logs)
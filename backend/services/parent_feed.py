@@ -0,0 +1,161 @@
+import os
+from typing import Iterable, List, Optional
+
+from pymongo import UpdateOne
+
+from services.household_graph import householdGraph
+from utils.pagination import paginate
+
+PARENT_TIMELINE_CAP = int(os.environ.get("PARENT_TIMELINE_CAP", "300"))
+PARENT_TIMELINE_TRIM_EVERY = int(os.environ.get("PARENT_TIMELINE_TRIM_EVERY", "25"))
+
+TIMELINE_PROJECTION = {"_id": 0, "guardian_id": 0}
+
+
+class ParentFeedService:
+    """
+    Fan-out-on-write parent timeline.
+
+    Feed items (daily reports, observations, check-in/out, payments) are copied
+    into `parent_timeline` once per guardian when they are created, so reading a
+    feed is one (guardian_id, created_at) index range scan however many children
+    a family has. Each timeline is trimmed back to PARENT_TIMELINE_CAP items
+    every PARENT_TIMELINE_TRIM_EVERY writes for that guardian.
+    """
+
+    def __init__(self, cap: int = PARENT_TIMELINE_CAP, trim_every: int = PARENT_TIMELINE_TRIM_EVERY):
+        self.cap = cap
+        self.trim_every = max(1, trim_every)
+        self._writes_since_trim: dict[str, int] = {}
+
+    async def guardians_for_children(self, db, child_ids: Iterable[str]) -> dict:
+        return await householdGraph.guardians_for_children(db, child_ids)
+
+    async def publish(
+        self,
+        db,
+        item: dict,
+        child_id: Optional[str] = None,
+        guardian_ids: Optional[List[str]] = None,
+    ) -> int:
+        """
+        Copy one feed item into each guardian's timeline.
+
+        Guardians are taken from guardian_ids, or resolved from child_id. Items are
+        upserted on (guardian_id, id) so retries do not duplicate them. A failed
+        feed write is logged and swallowed so it never fails the originating action.
+        """
+        try:
+            if guardian_ids is None:
+                guardian_ids = list((await self.guardians_for_children(db, [child_id])).values())
+            guardian_ids = [g for g in dict.fromkeys(guardian_ids) if g]
+            if not guardian_ids:
+                return 0
+
+            doc = {**item, "child_id": item.get("child_id", child_id)}
+            await db.parent_timeline.bulk_write(
+                [_upsert(guardian_id, doc) for guardian_id in guardian_ids],
+                ordered=False,
+            )
+            for guardian_id in guardian_ids:
+                await self._maybe_trim(db, guardian_id)
+            return len(guardian_ids)
+        except Exception as exc:
+            print(f"Warning: parent feed publish failed for {item.get('id')}: {exc}")
+            return 0
+
+    async def publish_many(self, db, items: List[tuple]) -> int:
+        """Publish several (item, guardian_ids) pairs with a single bulk write."""
+        operations = []
+        guardians = []
+        for item, guardian_ids in items:
+            for guardian_id in dict.fromkeys(g for g in guardian_ids if g):
+                operations.append(_upsert(guardian_id, item))
+                guardians.append(guardian_id)
+        if not operations:
+            return 0
+        try:
+            await db.parent_timeline.bulk_write(operations, ordered=False)
+            for guardian_id in guardians:
+                await self._maybe_trim(db, guardian_id)
+            return len(operations)
+        except Exception as exc:
+            print(f"Warning: parent feed publish failed for {len(items)} items: {exc}")
+            return 0
+
+    async def update_item(self, db, item_id: str, fields: dict) -> int:
+        """Update an already published item in every timeline it was copied to."""
+        try:
+            result = await db.parent_timeline.update_many({"id": item_id}, {"$set": fields})
+            return result.modified_count
+        except Exception as exc:
+            print(f"Warning: parent feed update failed for {item_id}: {exc}")
+            return 0
+
+    async def _maybe_trim(self, db, guardian_id: str) -> None:
+        writes = self._writes_since_trim.get(guardian_id, 0) + 1
+        if writes < self.trim_every:
+            self._writes_since_trim[guardian_id] = writes
+            return
+        self._writes_since_trim.pop(guardian_id, None)
+        await self.trim(db, guardian_id)
+
+    async def trim(self, db, guardian_id: str) -> int:
+        """Delete everything older than the newest `cap` items of one timeline."""
+        boundary = await db.parent_timeline.find(
+            {"guardian_id": guardian_id},
+            {"_id": 0, "created_at": 1},
+        ).sort("created_at", -1).skip(self.cap - 1).limit(1).to_list(1)
+        if not boundary:
+            return 0
+        result = await db.parent_timeline.delete_many(
+            {"guardian_id": guardian_id, "created_at": {"$lt": boundary[0]["created_at"]}}
+        )
+        return result.deleted_count
+
+    async def read(self, db, guardian_id: str, limit: int = 50, cursor: Optional[str] = None, response=None) -> list:
+        return await paginate(
+            db.parent_timeline,
+            {"guardian_id": guardian_id},
+            sort_field="created_at",
+            id_field="id",
+            limit=limit,
+            cursor=cursor,
+            projection=TIMELINE_PROJECTION,
+            response=response,
+        )
+
+    async def backfill(self, db, batch_size: int = 500) -> int:
+        """Materialize timelines from the legacy child-keyed `parent_feed` collection."""
+        copied = 0
+        last_id = None
+        while True:
+            query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+            batch = await db.parent_feed.find(query).sort("_id", 1).limit(batch_size).to_list(batch_size)
+            if not batch:
+                return copied
+            last_id = batch[-1]["_id"]
+            copied += await self.copy_legacy_items(db, batch)
+
+    async def copy_legacy_items(self, db, batch: list) -> int:
+        """Copy one batch of legacy `parent_feed` items into their guardians' timelines."""
+        guardians = await self.guardians_for_children(db, (item.get("child_id") for item in batch))
+        operations = []
+        for item in batch:
+            guardian_id = guardians.get(item.get("child_id"))
+            if guardian_id and item.get("id"):
+                operations.append(_upsert(guardian_id, {k: v for k, v in item.items() if k != "_id"}))
+        if operations:
+            await db.parent_timeline.bulk_write(operations, ordered=False)
+        return len(operations)
+
+
+def _upsert(guardian_id: str, item: dict) -> UpdateOne:
+    return UpdateOne(
+        {"guardian_id": guardian_id, "id": item["id"]},
+        {"$setOnInsert": {**item, "guardian_id": guardian_id}},
+        upsert=True,
+    )
+
+
+parentFeed = ParentFeedService()
@@ -0,0 +1,176 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import bcrypt
+from fastapi import HTTPException, status
+
+# "auto" calibrates the cost so one hash takes about BCRYPT_TARGET_MS on this host
+BCRYPT_ROUNDS = os.environ.get("BCRYPT_ROUNDS", "12")
+BCRYPT_TARGET_MS = float(os.environ.get("BCRYPT_TARGET_MS", "250"))
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 15
+
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", "64"))
+# Sized for a branch NAT, where every front desk shares one public address
+LOGIN_MAX_CONCURRENT_PER_IP = int(os.environ.get("LOGIN_MAX_CONCURRENT_PER_IP", "8"))
+LOGIN_MAX_CONCURRENT_PER_EMAIL = int(os.environ.get("LOGIN_MAX_CONCURRENT_PER_EMAIL", "2"))
+# Proxies in front of the app that append to X-Forwarded-For. 0 uses the socket
+# peer; set it only when that many proxies are guaranteed to sit in front.
+TRUSTED_PROXY_HOPS = int(os.environ.get("TRUSTED_PROXY_HOPS", "0"))
+
+
+def hash_rounds(password_hash: str) -> Optional[int]:
+    """Cost factor of a "$2b$12$..." hash, or None if it is not a bcrypt hash."""
+    parts = str(password_hash).split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def calibrate_rounds(target_ms: float = BCRYPT_TARGET_MS) -> int:
+    """Highest cost whose hash time stays at or under target_ms, within the allowed range."""
+    started = time.perf_counter()
+    bcrypt.hashpw(b"calibration", bcrypt.gensalt(BCRYPT_MIN_ROUNDS))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    rounds = BCRYPT_MIN_ROUNDS
+    # Each extra round doubles the work
+    while rounds < BCRYPT_MAX_ROUNDS and elapsed_ms * 2 <= target_ms:
+        rounds += 1
+        elapsed_ms *= 2
+    return rounds
+
+
+def client_address(request, trusted_hops: int = TRUSTED_PROXY_HOPS) -> Optional[str]:
+    """
+    Address of the client behind `trusted_hops` proxies.
+
+    Each trusted proxy appends the peer it saw to X-Forwarded-For, so the entry
+    `trusted_hops` from the right was written by our own outermost proxy; entries
+    further left come from the client and could be forged. A header with fewer
+    entries than that did not pass through every proxy, so none of it is trusted.
+    """
+    peer = request.client.host if request.client else None
+    if trusted_hops <= 0:
+        return peer
+    forwarded = [part.strip() for part in request.headers.get("x-forwarded-for", "").split(",") if part.strip()]
+    if len(forwarded) < trusted_hops:
+        return peer
+    return forwarded[-trusted_hops]
+
+
+class PasswordService:
+    """
+    bcrypt hashing and verification off the event loop.
+
+    Hashes run on a dedicated, bounded thread pool (bcrypt releases the GIL), so
+    a burst of logins queues behind PASSWORD_HASH_WORKERS threads instead of
+    stalling every other request on the worker. Work beyond
+    PASSWORD_HASH_MAX_PENDING is rejected with 429, and `limit()` caps in-flight
+    logins per client address and per email. The address comes from
+    `client_address()`, not the load balancer's socket peer.
+
+    With BCRYPT_ROUNDS=auto the cost is calibrated on the pool by `startup()`
+    (or by the first hash if startup was skipped), never on the event loop.
+    """
+
+    def __init__(
+        self,
+        rounds: str = BCRYPT_ROUNDS,
+        workers: int = PASSWORD_HASH_WORKERS,
+        max_pending: int = PASSWORD_HASH_MAX_PENDING,
+        per_ip: int = LOGIN_MAX_CONCURRENT_PER_IP,
+        per_email: int = LOGIN_MAX_CONCURRENT_PER_EMAIL,
+    ):
+        self._configured_rounds = rounds
+        self._rounds: Optional[int] = None
+        self.workers = workers
+        self.max_pending = max_pending
+        self.per_ip = per_ip
+        self.per_email = per_email
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._in_flight: dict[str, int] = {}
+
+    def _resolve_rounds(self) -> int:
+        if str(self._configured_rounds).lower() == "auto":
+            return calibrate_rounds()
+        return min(BCRYPT_MAX_ROUNDS, max(4, int(self._configured_rounds)))
+
+    async def rounds(self) -> int:
+        """Configured cost factor; "auto" is calibrated once, on the hash pool."""
+        if self._rounds is None:
+            self._rounds = await self._run(self._resolve_rounds)
+        return self._rounds
+
+    async def startup(self) -> None:
+        """Resolve the cost before the first login instead of inside it."""
+        await self.rounds()
+
+    async def _run(self, fn, *args):
+        if self._pending >= self.max_pending:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="الخادم مشغول، حاول مرة أخرى بعد قليل",  # Server busy, retry shortly
+                headers={"Retry-After": "1"},
+            )
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        salt = bcrypt.gensalt(await self.rounds())
+        hashed = await self._run(bcrypt.hashpw, password.encode(), salt)
+        return hashed.decode()
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        try:
+            return await self._run(bcrypt.checkpw, password.encode(), str(password_hash).encode())
+        except ValueError:
+            # Malformed stored hash
+            return False
+
+    async def needs_rehash(self, password_hash: str) -> bool:
+        """Only strengthen stored hashes; a lower configured cost never downgrades them."""
+        rounds = hash_rounds(password_hash)
+        return rounds is not None and rounds < await self.rounds()
+
+    @asynccontextmanager
+    async def limit(self, client_ip: Optional[str], email: str):
+        """Reject a login with 429 while the same address or email already has too many in flight."""
+        keys = [(f"email:{email}", self.per_email)]
+        if client_ip:
+            keys.append((f"ip:{client_ip}", self.per_ip))
+        if any(self._in_flight.get(key, 0) >= cap for key, cap in keys):
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="محاولات دخول كثيرة، حاول مرة أخرى بعد قليل",  # Too many login attempts
+                headers={"Retry-After": "1"},
+            )
+        for key, _ in keys:
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            for key, _ in keys:
+                remaining = self._in_flight[key] - 1
+                if remaining:
+                    self._in_flight[key] = remaining
+                else:
+                    del self._in_flight[key]
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+passwordService = PasswordService()
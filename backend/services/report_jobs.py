@@ -0,0 +1,190 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import uuid4
+
+from pymongo import ReturnDocument
+
+from services.gemini_service import daily_report_fallback, render_daily_report
+from services.parent_feed import parentFeed
+
+REPORT_JOB_WORKERS = int(os.environ.get("REPORT_JOB_WORKERS", "4"))
+REPORT_JOB_RATE_PER_MINUTE = float(os.environ.get("REPORT_JOB_RATE_PER_MINUTE", "60"))
+REPORT_JOB_MAX_ATTEMPTS = int(os.environ.get("REPORT_JOB_MAX_ATTEMPTS", "3"))
+REPORT_JOB_RETRY_SECONDS = float(os.environ.get("REPORT_JOB_RETRY_SECONDS", "10"))
+REPORT_JOB_POLL_SECONDS = float(os.environ.get("REPORT_JOB_POLL_SECONDS", "5"))
+# A GENERATING report whose worker died is picked up again after this long
+REPORT_JOB_LEASE_SECONDS = float(os.environ.get("REPORT_JOB_LEASE_SECONDS", "120"))
+
+PENDING_DESCRIPTION = "جاري إعداد التقرير..."  # Report is being prepared
+PENDING_DESCRIPTION_EN = "Your report is being prepared..."
+
+
+def report_feed_id(report_id: str) -> str:
+    return f"report-{report_id}"
+
+
+class RateLimiter:
+    """Spaces calls at least 60 / rate_per_minute seconds apart across all workers."""
+
+    def __init__(self, rate_per_minute: float, clock=time.monotonic):
+        self.interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0.0
+        self._clock = clock
+        self._next_slot = 0.0
+
+    async def acquire(self) -> None:
+        now = self._clock()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class ReportJobService:
+    """
+    Background generation of daily report text.
+
+    Reports are inserted as PENDING and returned to the teacher straight away.
+    Workers claim them from `daily_reports` with find_one_and_update (so several
+    app instances can share the backlog), generate the bilingual text under a
+    shared rate limit, and fill in the report and its parent feed item. Failed
+    generations are retried with backoff; after REPORT_JOB_MAX_ATTEMPTS the
+    plain-notes fallback is stored and the report is marked FAILED.
+    """
+
+    def __init__(
+        self,
+        workers: int = REPORT_JOB_WORKERS,
+        rate_per_minute: float = REPORT_JOB_RATE_PER_MINUTE,
+        max_attempts: int = REPORT_JOB_MAX_ATTEMPTS,
+        retry_seconds: float = REPORT_JOB_RETRY_SECONDS,
+        poll_seconds: float = REPORT_JOB_POLL_SECONDS,
+        lease_seconds: float = REPORT_JOB_LEASE_SECONDS,
+    ):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.owner = str(uuid4())
+        self._limiter = RateLimiter(rate_per_minute)
+        self._wake: Optional[asyncio.Event] = None
+        self._tasks: list[asyncio.Task] = []
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+
+    def notify(self) -> None:
+        """Wake idle workers after new PENDING reports were inserted."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def claim(self, db) -> Optional[dict]:
+        now = datetime.now(timezone.utc)
+        return await db.daily_reports.find_one_and_update(
+            {"$or": [
+                {"status": "PENDING", "next_attempt_at": {"$lte": now.isoformat()}},
+                {"status": "GENERATING",
+                 "claimed_at": {"$lte": (now - timedelta(seconds=self.lease_seconds)).isoformat()}},
+            ]},
+            {"$set": {"status": "GENERATING", "claimed_at": now.isoformat(), "claimed_by": self.owner},
+             "$inc": {"attempts": 1}},
+            projection={"_id": 0, "replies": 0},
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def process(self, db, report: dict) -> str:
+        """Generate one claimed report; returns its resulting status."""
+        await self._limiter.acquire()
+        try:
+            generated = await render_daily_report(
+                report["child_name"], report["notes"], report.get("photo_url"), db=db,
+            )
+        except Exception as exc:
+            if report.get("attempts", 1) < self.max_attempts:
+                self.retried += 1
+                delay = self.retry_seconds * 2 ** (report.get("attempts", 1) - 1)
+                await db.daily_reports.update_one(
+                    {"report_id": report["report_id"], "claimed_by": self.owner},
+                    {"$set": {
+                        "status": "PENDING",
+                        "next_attempt_at": (datetime.now(timezone.utc) + timedelta(seconds=delay)).isoformat(),
+                        "last_error": str(exc)[:500],
+                    }},
+                )
+                return "PENDING"
+            print(f"Warning: daily report {report['report_id']} generation failed: {exc}")
+            self.failed += 1
+            return await self._finish(db, report, daily_report_fallback(report["child_name"], report["notes"]), "FAILED")
+
+        self.completed += 1
+        return await self._finish(db, report, generated, "READY")
+
+    async def _finish(self, db, report: dict, generated: dict, final_status: str) -> str:
+        now = datetime.now(timezone.utc).isoformat()
+        await db.daily_reports.update_one(
+            {"report_id": report["report_id"], "claimed_by": self.owner},
+            {"$set": {
+                "status": final_status,
+                "report_ar": generated["report_ar"],
+                "report_en": generated["report_en"],
+                "generated_at": now,
+            }, "$unset": {"claimed_at": "", "claimed_by": "", "next_attempt_at": ""}},
+        )
+        await parentFeed.update_item(db, report_feed_id(report["report_id"]), {
+            "description": generated["report_ar"][:200],
+            "status": final_status,
+        })
+        return final_status
+
+    async def run_pending(self, db) -> int:
+        """Process everything currently claimable (used by tests and one-off drains)."""
+        processed = 0
+        while (report := await self.claim(db)) is not None:
+            await self.process(db, report)
+            processed += 1
+        return processed
+
+    async def _worker(self, db) -> None:
+        while True:
+            try:
+                self._wake.clear()
+                report = await self.claim(db)
+                if report is not None:
+                    await self.process(db, report)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                print(f"Warning: report job worker error: {exc}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self, db) -> None:
+        if self._tasks:
+            return
+        self._wake = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(db)) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._wake = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._tasks),
+            "completed": self.completed,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
+
+
+reportJobs = ReportJobService()
@@ -0,0 +1,335 @@
+import asyncio
+import os
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+from uuid import uuid4
+
+from fastapi import HTTPException
+
+from services.customer_cache import CUSTOMER_SUMMARY_PROJECTION, CustomerCardCache, customerCardCache
+
+CommitHandler = Callable[[Any, dict, dict], Awaitable[dict]]
+
+SCAN_QUEUE_MAX_PENDING = int(os.environ.get("SCAN_QUEUE_MAX_PENDING", "1000"))
+# QUEUED records older than this were lost with the process that accepted them
+SCAN_QUEUE_STALE_SECONDS = int(os.environ.get("SCAN_QUEUE_STALE_SECONDS", "120"))
+SCAN_QUEUE_RECENT_LIMIT = 2000
+SCAN_QUEUE_JOURNAL_BATCH = 100
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _normalize_code(code: Optional[str]) -> Optional[str]:
+    if code is None:
+        return None
+    normalized = code.strip().upper()
+    return normalized or None
+
+
+class ScanQueueService:
+    """
+    Accept-then-process queue for front-desk scans.
+
+    Scans are acknowledged straight away with a provisional result computed
+    from the card-number cache and in-memory session/wristband caches, without a
+    database round trip. A journal task records them as QUEUED in `scan_queue`
+    in batches, while a single worker commits them one at a time, in arrival
+    order, and then records the outcome. Failed scans, and QUEUED ones left
+    behind by a crash, are listed for reconciliation by reception staff.
+
+    On shutdown, `drain()` records every scan it could not commit as FAILED, so
+    those are reconciled too. A scan only exists in memory between its
+    acknowledgement and the next journal batch (normally milliseconds); a hard
+    kill in that window loses it without a trace.
+    """
+
+    def __init__(self, card_cache: Optional[CustomerCardCache] = None):
+        self._cards = card_cache or customerCardCache
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._journal: Optional[asyncio.Queue] = None
+        self._journal_writer: Optional[asyncio.Task] = None
+        # scan_id -> (record, db) for scans whose outcome is not stored yet
+        self._unsettled: Dict[str, tuple] = {}
+        self._warm_task: Optional[asyncio.Task] = None
+        self._warmed = False
+        self._recent: "OrderedDict[str, dict]" = OrderedDict()
+        self._active_session_by_customer: Dict[str, str] = {}
+        self._wristbands_by_code: Dict[str, dict] = {}
+        self._wristbands_by_id: Dict[str, dict] = {}
+
+    # ── Cache maintenance ──
+
+    def remember_active_session(self, customer_id: Optional[str], session_id: Optional[str]) -> None:
+        if customer_id and session_id:
+            self._active_session_by_customer[customer_id] = session_id
+
+    def forget_active_session(self, customer_id: Optional[str]) -> None:
+        if customer_id:
+            self._active_session_by_customer.pop(customer_id, None)
+
+    def remember_wristband(self, wristband: Optional[dict]) -> None:
+        if not wristband or not wristband.get("id"):
+            return
+        summary = {
+            "id": wristband.get("id"),
+            "code": wristband.get("code"),
+            "session_id": wristband.get("session_id"),
+            "branch_id": wristband.get("branch_id"),
+            "status": wristband.get("status"),
+        }
+        self._wristbands_by_id[summary["id"]] = summary
+        code = _normalize_code(wristband.get("code_normalized") or wristband.get("code"))
+        if code:
+            self._wristbands_by_code[code] = summary
+
+    async def warm(self, db) -> None:
+        """Preload currently checked-in customers and live wristbands (three queries)."""
+        sessions = await db.checkin_sessions.find(
+            {"status": "CHECKED_IN"},
+            {"_id": 0, "session_id": 1, "customer_id": 1},
+        ).to_list(1000)
+        for session in sessions:
+            self.remember_active_session(session.get("customer_id"), session.get("session_id"))
+
+        customer_ids = [s["customer_id"] for s in sessions if s.get("customer_id")]
+        if customer_ids:
+            customers = await db.customers.find(
+                {"customer_id": {"$in": customer_ids}},
+                CUSTOMER_SUMMARY_PROJECTION,
+            ).to_list(len(customer_ids))
+            for customer in customers:
+                self._cards.store(customer)
+
+        wristbands = await db.wristbands.find(
+            {"status": {"$in": ["issued", "active"]}},
+            {"_id": 0, "id": 1, "code": 1, "code_normalized": 1, "session_id": 1, "branch_id": 1, "status": 1},
+        ).to_list(1000)
+        for wristband in wristbands:
+            self.remember_wristband(wristband)
+        self._warmed = True
+
+    def _ensure_warm(self, db) -> None:
+        if self._warmed or (self._warm_task and not self._warm_task.done()):
+            return
+
+        async def _warm():
+            try:
+                await self.warm(db)
+            except Exception as exc:
+                print(f"Warning: scan queue cache warm-up failed: {exc}")
+
+        self._warm_task = asyncio.create_task(_warm())
+
+    # ── Provisional results ──
+
+    def provisional_checkin(self, card_number: str) -> dict:
+        # Only waiver-accepted customers are cached, so a miss also covers WAIVER_REQUIRED
+        customer = self._cards.peek(card_number)
+        if not customer:
+            return {
+                "status": "PENDING_LOOKUP",
+                "message": "جاري التحقق من البطاقة",
+                "card_number": card_number,
+            }
+
+        base = {
+            "card_number": card_number,
+            "customer_id": customer.get("customer_id"),
+            "child_name": customer.get("child_name"),
+        }
+        if customer.get("customer_id") in self._active_session_by_customer:
+            return {
+                **base,
+                "status": "ALREADY_CHECKED_IN",
+                "message": "الطفل مسجل دخول بالفعل",
+                "session_id": self._active_session_by_customer[customer["customer_id"]],
+            }
+        return {**base, "status": "CHECKED_IN", "message": "تم قبول تسجيل الدخول"}
+
+    def provisional_wristband(self, wristband_id: Optional[str], code: Optional[str]) -> dict:
+        wristband = None
+        if wristband_id:
+            wristband = self._wristbands_by_id.get(wristband_id)
+        elif code:
+            wristband = self._wristbands_by_code.get(_normalize_code(code) or "")
+
+        if not wristband:
+            return {"status": "PENDING_LOOKUP", "wristband_id": wristband_id, "code": code}
+
+        base = {"wristband_id": wristband["id"], "session_id": wristband.get("session_id")}
+        if wristband.get("status") == "expired":
+            return {**base, "status": "REJECTED", "reason": "Wristband is expired"}
+        if wristband.get("status") == "active":
+            return {**base, "status": "REJECTED", "reason": "Wristband already active"}
+        return {**base, "status": "ACTIVATED"}
+
+    # ── Queue ──
+
+    def _ensure_worker(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=SCAN_QUEUE_MAX_PENDING)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        if self._journal is None:
+            self._journal = asyncio.Queue()
+        if self._journal_writer is None or self._journal_writer.done():
+            self._journal_writer = asyncio.create_task(self._write_journal())
+
+    def pending_count(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(
+        self,
+        db,
+        kind: str,
+        payload: dict,
+        user: dict,
+        provisional: dict,
+        commit: CommitHandler,
+        branch_id: Optional[str] = None,
+    ) -> dict:
+        self._ensure_warm(db)
+        self._ensure_worker()
+        if self._queue.full():
+            raise HTTPException(status_code=503, detail="Scan queue is full, retry shortly")
+
+        record = {
+            "scan_id": str(uuid4()),
+            "kind": kind,
+            "status": "QUEUED",
+            "payload": payload,
+            "user_id": user.get("user_id"),
+            "branch_id": branch_id,
+            "provisional_status": provisional.get("status"),
+            "provisional": provisional,
+            "result": None,
+            "error": None,
+            "error_status_code": None,
+            "accepted_at": _now_iso(),
+            "committed_at": None,
+            "reconciled": False,
+        }
+
+        # Acknowledged without waiting on the database; the journal records it
+        # as QUEUED shortly after and the worker records the outcome
+        journaled = asyncio.Event()
+        try:
+            self._queue.put_nowait((record, db, user, commit, journaled))
+        except asyncio.QueueFull:
+            raise HTTPException(status_code=503, detail="Scan queue is full, retry shortly")
+        self._journal.put_nowait((dict(record), db, journaled))
+        self._unsettled[record["scan_id"]] = (record, db)
+
+        self._remember_record(record)
+        return {**record, "queue_position": self._queue.qsize()}
+
+    def _remember_record(self, record: dict) -> None:
+        self._recent[record["scan_id"]] = record
+        while len(self._recent) > SCAN_QUEUE_RECENT_LIMIT:
+            self._recent.popitem(last=False)
+
+    def get_recent(self, scan_id: str) -> Optional[dict]:
+        return self._recent.get(scan_id)
+
+    def needs_attention_query(self) -> dict:
+        """Scans that failed on commit or were accepted but never committed."""
+        stale_before = (datetime.now(timezone.utc) - timedelta(seconds=SCAN_QUEUE_STALE_SECONDS)).isoformat()
+        return {"$or": [
+            {"status": "FAILED"},
+            {"status": "QUEUED", "accepted_at": {"$lt": stale_before}},
+        ]}
+
+    async def _write_journal(self) -> None:
+        """Insert accepted scans as QUEUED, batching whatever arrived meanwhile."""
+        while True:
+            batch = [await self._journal.get()]
+            while len(batch) < SCAN_QUEUE_JOURNAL_BATCH and not self._journal.empty():
+                batch.append(self._journal.get_nowait())
+            try:
+                by_db: Dict[int, list] = {}
+                for record, db, _ in batch:
+                    by_db.setdefault(id(db), [db, []])[1].append(record)
+                for db, docs in by_db.values():
+                    try:
+                        await db.scan_queue.insert_many(docs, ordered=False)
+                    except Exception as exc:
+                        # The worker upserts the outcome, so the scan is still recorded once committed
+                        print(f"Warning: could not journal {len(docs)} queued scans: {exc}")
+            finally:
+                for _, _, journaled in batch:
+                    journaled.set()
+                    self._journal.task_done()
+
+    async def _run(self) -> None:
+        while True:
+            record, db, user, commit, journaled = await self._queue.get()
+            try:
+                result = await commit(db, record["payload"], user)
+                record["status"] = "COMMITTED"
+                record["result"] = result
+            except HTTPException as exc:
+                record["status"] = "FAILED"
+                record["error"] = str(exc.detail)
+                record["error_status_code"] = exc.status_code
+            except Exception as exc:
+                record["status"] = "FAILED"
+                record["error"] = str(exc)
+                record["error_status_code"] = 500
+            finally:
+                record["committed_at"] = _now_iso()
+                # The outcome must land after the QUEUED insert, not be overwritten by it
+                await journaled.wait()
+                await self._persist(db, record)
+                self._unsettled.pop(record["scan_id"], None)
+                self._queue.task_done()
+
+    async def _persist(self, db, record: dict) -> None:
+        outcome = ("status", "result", "error", "error_status_code", "committed_at")
+        try:
+            await db.scan_queue.update_one(
+                {"scan_id": record["scan_id"]},
+                {"$set": {field: record[field] for field in outcome},
+                 "$setOnInsert": {field: value for field, value in record.items() if field not in outcome}},
+                upsert=True,
+            )
+        except Exception as exc:
+            print(f"Warning: could not persist scan {record['scan_id']}: {exc}")
+
+    async def drain(self, timeout: float = 10.0) -> None:
+        """
+        Wait for queued scans to be journaled and committed, then stop the tasks
+        (used on shutdown). Scans still uncommitted on timeout or cancellation
+        are recorded as FAILED for reconciliation.
+        """
+        try:
+            if self._queue is not None:
+                try:
+                    await asyncio.wait_for(
+                        asyncio.gather(self._journal.join(), self._queue.join()), timeout=timeout
+                    )
+                except asyncio.TimeoutError:
+                    print(f"Warning: scan queue shut down with {len(self._unsettled)} uncommitted scans")
+        finally:
+            for task in (self._worker, self._journal_writer):
+                if task is not None:
+                    task.cancel()
+            self._worker = None
+            self._journal_writer = None
+            self._queue = None
+            self._journal = None
+            await self._settle_abandoned()
+
+    async def _settle_abandoned(self) -> None:
+        abandoned, self._unsettled = list(self._unsettled.values()), {}
+        for record, db in abandoned:
+            if record["status"] == "QUEUED":
+                # The commit may have been cut off half way, so staff check it by hand
+                record.update(status="FAILED", error="Scan was not committed before shutdown",
+                              error_status_code=503, committed_at=_now_iso())
+            await self._persist(db, record)
+
+scanQueue = ScanQueueService()
@@ -0,0 +1,165 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import uuid4
+
+from pymongo.errors import DuplicateKeyError
+
+from services.notification_service import send_bulk_notifications
+
+SUBSCRIPTION_JOBS_ENABLED = os.environ.get("SUBSCRIPTION_JOBS_ENABLED", "false").lower() == "true"
+SUBSCRIPTION_JOB_INTERVAL_SECONDS = float(os.environ.get("SUBSCRIPTION_JOB_INTERVAL_SECONDS", "900"))
+RENEWAL_REMINDER_DAYS = int(os.environ.get("RENEWAL_REMINDER_DAYS", "3"))
+REMINDER_BATCH_SIZE = 500
+
+
+def _metrics(job: str, dry_run: bool, started: float, **counts) -> dict:
+    elapsed = time.perf_counter() - started
+    processed = counts.get("matched", 0)
+    return {
+        "job": job,
+        "dry_run": dry_run,
+        **counts,
+        "duration_ms": round(elapsed * 1000, 1),
+        "per_second": round(processed / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+async def expire_subscriptions(db, now: Optional[datetime] = None, dry_run: bool = False) -> dict:
+    """Flip every ACTIVE subscription past expires_at to EXPIRED with one update_many."""
+    started = time.perf_counter()
+    now_iso = (now or datetime.now(timezone.utc)).isoformat()
+    query = {"status": "ACTIVE", "expires_at": {"$lte": now_iso}}
+
+    if dry_run:
+        matched = await db.subscriptions.count_documents(query)
+        return _metrics("expire_subscriptions", dry_run, started, matched=matched, modified=0)
+
+    result = await db.subscriptions.update_many(
+        query,
+        {"$set": {"status": "EXPIRED", "expired_at": now_iso, "updated_at": now_iso}},
+    )
+    return _metrics(
+        "expire_subscriptions", dry_run, started,
+        matched=result.matched_count, modified=result.modified_count,
+    )
+
+
+async def send_renewal_reminders(
+    db,
+    days: int = RENEWAL_REMINDER_DAYS,
+    now: Optional[datetime] = None,
+    dry_run: bool = False,
+    batch_size: int = REMINDER_BATCH_SIZE,
+) -> dict:
+    """
+    Send RENEWAL_REMINDER notifications for ACTIVE subscriptions expiring within `days`.
+
+    Each subscription is reminded once per term: `renewal_reminder_for` records the
+    expires_at value that was reminded, so a renewal (new expires_at) re-arms it.
+    """
+    started = time.perf_counter()
+    now = now or datetime.now(timezone.utc)
+    query = {
+        "status": "ACTIVE",
+        "expires_at": {"$gt": now.isoformat(), "$lte": (now + timedelta(days=days)).isoformat()},
+        "$expr": {"$ne": ["$renewal_reminder_for", "$expires_at"]},
+    }
+    projection = {"_id": 0, "subscription_id": 1, "guardian_id": 1, "child_id": 1, "plan_type": 1, "expires_at": 1}
+
+    matched = 0
+    sent = 0
+    last_id = None
+    while True:
+        page_query = {**query, "subscription_id": {"$gt": last_id}} if last_id else query
+        batch = await db.subscriptions.find(page_query, projection).sort("subscription_id", 1).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+        last_id = batch[-1]["subscription_id"]
+        matched += len(batch)
+        if dry_run:
+            continue
+
+        sent += await send_bulk_notifications(db, "SUBSCRIPTION", "RENEWAL_REMINDER", [
+            {
+                "entity_id": sub["subscription_id"],
+                "recipient_user_id": sub["guardian_id"],
+                "notes": f"Subscription expires on {str(sub.get('expires_at'))[:10]}. Renew to keep access.",
+            }
+            for sub in batch if sub.get("guardian_id")
+        ])
+        await db.subscriptions.update_many(
+            {"subscription_id": {"$in": [sub["subscription_id"] for sub in batch]}},
+            [{"$set": {"renewal_reminder_for": "$expires_at"}}],
+        )
+
+    return _metrics("send_renewal_reminders", dry_run, started, matched=matched, sent=sent, days=days)
+
+
+class SubscriptionJobRunner:
+    """
+    Periodic runner for the expiry and reminder jobs.
+
+    Every instance runs the loop, but each pass first takes a lease in
+    `job_leases`, so only one instance does the work per interval.
+    """
+
+    LEASE_NAME = "subscription_jobs"
+
+    def __init__(self, interval_seconds: float = SUBSCRIPTION_JOB_INTERVAL_SECONDS):
+        self.interval_seconds = interval_seconds
+        self.owner = str(uuid4())
+        self.last_run: Optional[dict] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self, db, days: int = RENEWAL_REMINDER_DAYS, dry_run: bool = False) -> dict:
+        now = datetime.now(timezone.utc)
+        expiry = await expire_subscriptions(db, now=now, dry_run=dry_run)
+        reminders = await send_renewal_reminders(db, days=days, now=now, dry_run=dry_run)
+        run = {"ran_at": now.isoformat(), "expiry": expiry, "reminders": reminders}
+        if not dry_run:
+            self.last_run = run
+        return run
+
+    async def _acquire_lease(self, db) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            await db.job_leases.update_one(
+                {"_id": self.LEASE_NAME, "$or": [{"owner": self.owner}, {"expires_at": {"$lte": now.isoformat()}}]},
+                {"$set": {
+                    "owner": self.owner,
+                    "expires_at": (now + timedelta(seconds=self.interval_seconds * 0.9)).isoformat(),
+                }},
+                upsert=True,
+            )
+            return True
+        except DuplicateKeyError:
+            # Another instance holds an unexpired lease
+            return False
+
+    async def _loop(self, db) -> None:
+        while True:
+            try:
+                if await self._acquire_lease(db):
+                    await self.run_once(db)
+            except Exception as exc:
+                print(f"Warning: subscription jobs failed: {exc}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self, db) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop(db))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+subscriptionJobs = SubscriptionJobRunner()
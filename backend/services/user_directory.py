@@ -0,0 +1,75 @@
+import os
+from typing import Iterable, Optional
+
+from utils.cache import MISSING, TTLCache
+
+USER_DIRECTORY_TTL_SECONDS = float(os.environ.get("USER_DIRECTORY_TTL_SECONDS", "900"))
+USER_DIRECTORY_MISS_TTL_SECONDS = float(os.environ.get("USER_DIRECTORY_MISS_TTL_SECONDS", "60"))
+USER_DIRECTORY_MAX_ENTRIES = int(os.environ.get("USER_DIRECTORY_MAX_ENTRIES", "20000"))
+
+CONTACT_FIELDS = ("email", "phone")
+
+
+class UserDirectory:
+    """
+    Read-through cache from a contact (email or phone) to a user_id.
+
+    Guardian resolution runs on every check-in and notification, usually for the
+    same few hundred families. Misses are cached too, for the shorter
+    USER_DIRECTORY_MISS_TTL_SECONDS, because most walk-in guardians never
+    register. User writes in this process call invalidate(); the TTLs bound how
+    long another replica's write can go unseen.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = USER_DIRECTORY_TTL_SECONDS,
+        miss_ttl_seconds: float = USER_DIRECTORY_MISS_TTL_SECONDS,
+        max_entries: int = USER_DIRECTORY_MAX_ENTRIES,
+    ):
+        self._by_contact = TTLCache(ttl_seconds, max_entries)
+        self.miss_ttl_seconds = miss_ttl_seconds
+
+    async def user_id_for(self, db, field: str, value: Optional[str]) -> Optional[str]:
+        if field not in CONTACT_FIELDS:
+            raise ValueError(f"Unsupported contact field: {field}")
+        if not value:
+            return None
+
+        key = (field, value)
+        cached = self._by_contact.get(key)
+        if cached is not MISSING:
+            return cached
+
+        user = await db.users.find_one({field: value}, {"_id": 0, "user_id": 1})
+        user_id = user.get("user_id") if user else None
+        self._by_contact.set(key, user_id, None if user_id else self.miss_ttl_seconds)
+        return user_id
+
+    async def resolve_guardian_id(
+        self, db, guardian: Optional[dict], phone_fields: Iterable[str] = ("phone",)
+    ) -> Optional[str]:
+        """User account for a customer's guardian block: by email, then by the first phone present."""
+        guardian = guardian or {}
+        user_id = await self.user_id_for(db, "email", guardian.get("email"))
+        if user_id:
+            return user_id
+
+        phone = next((guardian[f] for f in phone_fields if guardian.get(f)), None)
+        return await self.user_id_for(db, "phone", phone)
+
+    def invalidate(self, user: Optional[dict]) -> None:
+        """Drop cached lookups for a user's contacts after it is created or changed."""
+        for field in CONTACT_FIELDS:
+            value = (user or {}).get(field)
+            if value:
+                self._by_contact.pop((field, value))
+
+    def clear(self) -> None:
+        self._by_contact.clear()
+
+    def stats(self) -> dict:
+        return self._by_contact.stats()
+
+
+userDirectory = UserDirectory()
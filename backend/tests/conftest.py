@@ -0,0 +1,132 @@
+import sys
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+# Collection methods that cost one round trip each. Cursors returned by find()
+# and aggregate() are counted once, when they are materialized.
+ROUND_TRIP_METHODS = {
+    "find_one", "find_one_and_update", "find_one_and_delete", "find_one_and_replace",
+    "insert_one", "insert_many", "update_one", "update_many", "replace_one",
+    "delete_one", "delete_many", "count_documents", "distinct", "bulk_write",
+}
+CURSOR_METHODS = {"find", "aggregate"}
+
+
+class QueryCounter:
+    def __init__(self):
+        self.calls = Counter()
+
+    @property
+    def total(self) -> int:
+        return sum(self.calls.values())
+
+    def record(self, collection: str, method: str) -> None:
+        self.calls[f"{collection}.{method}"] += 1
+
+    def wrap(self, db):
+        """Wrap a database (fake or Motor) so every round trip is counted."""
+        return CountingDB(db, self)
+
+
+class CountingDB:
+    def __init__(self, db, counter: QueryCounter):
+        self._db = db
+        self._counter = counter
+
+    def __getattr__(self, name):
+        return CountingCollection(getattr(self._db, name), name, self._counter)
+
+    def __getitem__(self, name):
+        return CountingCollection(self._db[name], name, self._counter)
+
+
+class CountingCollection:
+    def __init__(self, collection, name: str, counter: QueryCounter):
+        self._collection = collection
+        self._name = name
+        self._counter = counter
+
+    def __getattr__(self, method):
+        attr = getattr(self._collection, method)
+        if method in ROUND_TRIP_METHODS:
+            async def counted(*args, **kwargs):
+                self._counter.record(self._name, method)
+                return await attr(*args, **kwargs)
+            return counted
+        if method in CURSOR_METHODS:
+            def cursor(*args, **kwargs):
+                return CountingCursor(attr(*args, **kwargs), self._name, method, self._counter)
+            return cursor
+        return attr
+
+
+class CountingCursor:
+    def __init__(self, cursor, collection: str, method: str, counter: QueryCounter):
+        self._cursor = cursor
+        self._collection = collection
+        self._method = method
+        self._counter = counter
+
+    def __getattr__(self, name):
+        attr = getattr(self._cursor, name)
+        if not callable(attr):
+            return attr
+
+        def chained(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            # sort()/limit()/skip() return the cursor itself; keep wrapping it
+            if result is self._cursor:
+                return self
+            return result
+        return chained
+
+    async def to_list(self, length=None):
+        self._counter.record(self._collection, self._method)
+        return await self._cursor.to_list(length)
+
+    def __aiter__(self):
+        self._counter.record(self._collection, self._method)
+        return self._cursor.__aiter__()
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "query_budget(max_queries): fail the test if the databases wrapped with the "
+        "query_counter fixture see more than max_queries round trips",
+    )
+
+
+@pytest.fixture
+def query_counter():
+    return QueryCounter()
+
+
+@pytest.fixture(autouse=True)
+def _empty_process_caches():
+    """Process-wide read-through caches must not carry documents between tests' fake databases."""
+    from services.customer_search import searchBackfill
+    from services.household_graph import householdGraph
+    from services.user_directory import userDirectory
+
+    householdGraph.clear()
+    userDirectory.clear()
+    searchBackfill.clear()
+    yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    outcome = yield
+    marker = item.get_closest_marker("query_budget")
+    counter = getattr(item, "funcargs", {}).get("query_counter")
+    if marker is None or counter is None or outcome.excinfo is not None:
+        return
+    budget = marker.args[0]
+    if counter.total > budget:
+        breakdown = ", ".join(f"{key}={count}" for key, count in counter.calls.most_common())
+        pytest.fail(f"query budget exceeded: {counter.total} round trips > {budget} ({breakdown})", pytrace=False)
@@ -0,0 +1,532 @@
+"""
+In-memory stand-in for the slice of the Motor API the services and routers use.
+
+Collections keep plain dicts in `docs` and are created on first access, so a
+test seeds only what it needs: FakeDB(children=[...]).children.docs. Queries,
+updates (operator documents and pipelines), projections, sorts, upserts and
+bulk writes follow MongoDB semantics closely enough for unit tests; anything
+unsupported raises NotImplementedError rather than silently matching. Extend
+this module instead of writing another fake in a test file.
+
+Round trips are counted with the query_counter fixture from conftest.py.
+"""
+import asyncio
+import copy
+import random
+import re
+from types import SimpleNamespace
+
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+MISSING = object()
+
+
+def get_path(doc, path: str):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return MISSING
+        value = value[part]
+    return value
+
+
+def set_path(doc, path: str, value) -> None:
+    *parents, leaf = path.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[leaf] = value
+
+
+def unset_path(doc, path: str) -> None:
+    *parents, leaf = path.split(".")
+    for part in parents:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(leaf, None)
+
+
+def _sort_key(value):
+    # MongoDB orders missing and null before every other value
+    return (0, 0) if value is MISSING or value is None else (1, value)
+
+
+def _compare(value, op: str, target) -> bool:
+    candidates = value if isinstance(value, list) else [value]
+    for candidate in candidates:
+        if candidate is MISSING or candidate is None:
+            continue
+        try:
+            if {"$lt": candidate < target, "$lte": candidate <= target,
+                    "$gt": candidate > target, "$gte": candidate >= target}[op]:
+                return True
+        except TypeError:
+            continue
+    return False
+
+
+def _equals(value, target) -> bool:
+    if value is MISSING:
+        return target is None
+    if isinstance(value, list) and not isinstance(target, list):
+        return target in value
+    return value == target
+
+
+def _regex(cond: dict, pattern):
+    if isinstance(pattern, re.Pattern):
+        return pattern
+    flags = re.IGNORECASE if "i" in cond.get("$options", "") else 0
+    return re.compile(pattern, flags)
+
+
+def _field_matches(value, cond) -> bool:
+    if isinstance(cond, re.Pattern):
+        cond = {"$regex": cond}
+    if not (isinstance(cond, dict) and cond and all(key.startswith("$") for key in cond)):
+        return _equals(value, cond)
+
+    for op, arg in cond.items():
+        if op == "$options":
+            continue
+        if op == "$eq":
+            ok = _equals(value, arg)
+        elif op == "$ne":
+            ok = not _equals(value, arg)
+        elif op == "$in":
+            ok = any(_equals(value, target) for target in arg)
+        elif op == "$nin":
+            ok = not any(_equals(value, target) for target in arg)
+        elif op == "$exists":
+            ok = (value is not MISSING) == bool(arg)
+        elif op in ("$lt", "$lte", "$gt", "$gte"):
+            ok = _compare(value, op, arg)
+        elif op == "$regex":
+            pattern = _regex(cond, arg)
+            candidates = value if isinstance(value, list) else [value]
+            ok = any(isinstance(c, str) and pattern.search(c) for c in candidates)
+        elif op == "$not":
+            ok = not _field_matches(value, arg)
+        elif op == "$size":
+            ok = isinstance(value, list) and len(value) == arg
+        elif op == "$elemMatch":
+            ok = isinstance(value, list) and any(
+                matches(item, arg) if isinstance(item, dict) else _field_matches(item, arg) for item in value
+            )
+        else:
+            raise NotImplementedError(f"fake query operator {op}")
+        if not ok:
+            return False
+    return True
+
+
+def matches(doc: dict, query) -> bool:
+    """Whether `doc` satisfies a MongoDB filter document."""
+    for key, cond in (query or {}).items():
+        if key == "$and":
+            ok = all(matches(doc, sub) for sub in cond)
+        elif key == "$or":
+            ok = any(matches(doc, sub) for sub in cond)
+        elif key == "$nor":
+            ok = not any(matches(doc, sub) for sub in cond)
+        elif key == "$expr":
+            ok = bool(evaluate(cond, doc))
+        elif key.startswith("$"):
+            raise NotImplementedError(f"fake query operator {key}")
+        else:
+            ok = _field_matches(get_path(doc, key), cond)
+        if not ok:
+            return False
+    return True
+
+
+def evaluate(expr, doc):
+    """Aggregation expression, as used by $expr and pipeline updates."""
+    if isinstance(expr, str) and expr.startswith("$"):
+        value = get_path(doc, expr[1:])
+        return None if value is MISSING else value
+    if isinstance(expr, list):
+        return [evaluate(item, doc) for item in expr]
+    if not isinstance(expr, dict):
+        return expr
+    if len(expr) != 1 or not next(iter(expr)).startswith("$"):
+        return {key: evaluate(value, doc) for key, value in expr.items()}
+
+    op, args = next(iter(expr.items()))
+    if op == "$literal":
+        return args
+    if op == "$cond":
+        if isinstance(args, dict):
+            args = [args["if"], args["then"], args["else"]]
+        return evaluate(args[1], doc) if evaluate(args[0], doc) else evaluate(args[2], doc)
+
+    values = evaluate(args if isinstance(args, list) else [args], doc)
+    if op in ("$eq", "$ne", "$lt", "$lte", "$gt", "$gte"):
+        left, right = (_sort_key(v) for v in values)
+        return {"$eq": left == right, "$ne": left != right, "$lt": left < right,
+                "$lte": left <= right, "$gt": left > right, "$gte": left >= right}[op]
+    if op == "$add":
+        return sum(values)
+    if op == "$subtract":
+        return values[0] - values[1]
+    if op == "$multiply":
+        result = 1
+        for value in values:
+            result *= value
+        return result
+    if op == "$max":
+        return max((v for v in values if v is not None), default=None)
+    if op == "$min":
+        return min((v for v in values if v is not None), default=None)
+    if op == "$ifNull":
+        return next((v for v in values if v is not None), None)
+    if op == "$and":
+        return all(values)
+    if op == "$or":
+        return any(values)
+    if op == "$not":
+        return not values[0]
+    raise NotImplementedError(f"fake expression operator {op}")
+
+
+def apply_update(doc: dict, update, inserting: bool = False) -> None:
+    """Apply an update document or pipeline to `doc` in place."""
+    if isinstance(update, list):
+        for stage in update:
+            for op, spec in stage.items():
+                if op in ("$set", "$addFields"):
+                    # Every expression in a stage sees the document as it was before the stage
+                    values = {path: evaluate(expr, doc) for path, expr in spec.items()}
+                    for path, value in values.items():
+                        set_path(doc, path, value)
+                elif op == "$unset":
+                    for path in [spec] if isinstance(spec, str) else spec:
+                        unset_path(doc, path)
+                else:
+                    raise NotImplementedError(f"fake pipeline stage {op}")
+        return
+
+    for op, spec in update.items():
+        if op == "$setOnInsert" and not inserting:
+            continue
+        for path, value in spec.items():
+            current = get_path(doc, path)
+            if op in ("$set", "$setOnInsert"):
+                set_path(doc, path, copy.deepcopy(value))
+            elif op == "$unset":
+                unset_path(doc, path)
+            elif op == "$inc":
+                set_path(doc, path, (0 if current is MISSING else current) + value)
+            elif op == "$max":
+                if current in (MISSING, None) or value > current:
+                    set_path(doc, path, value)
+            elif op == "$min":
+                if current in (MISSING, None) or value < current:
+                    set_path(doc, path, value)
+            elif op in ("$push", "$addToSet"):
+                items = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+                array = [] if current is MISSING else list(current)
+                for item in items:
+                    if op == "$push" or item not in array:
+                        array.append(copy.deepcopy(item))
+                if isinstance(value, dict) and "$slice" in value:
+                    limit = value["$slice"]
+                    array = array[limit:] if limit < 0 else array[:limit]
+                set_path(doc, path, array)
+            elif op == "$pull":
+                if isinstance(current, list):
+                    set_path(doc, path, [item for item in current if not _field_matches(item, value)])
+            else:
+                raise NotImplementedError(f"fake update operator {op}")
+
+
+def project(doc: dict, projection) -> dict:
+    """Copy of `doc` shaped by an inclusion or exclusion projection."""
+    doc = copy.deepcopy(doc)
+    if not projection:
+        return doc
+    fields = {path: keep for path, keep in projection.items() if path != "_id"}
+    if any(fields.values()):
+        result = {}
+        if projection.get("_id", 1) and "_id" in doc:
+            result["_id"] = doc["_id"]
+        for path, keep in fields.items():
+            value = get_path(doc, path)
+            if keep and value is not MISSING:
+                set_path(result, path, value)
+        return result
+    for path in fields:
+        unset_path(doc, path)
+    if not projection.get("_id", 1):
+        doc.pop("_id", None)
+    return doc
+
+
+def sort_documents(docs: list, keys) -> list:
+    docs = list(docs)
+    for field, direction in reversed(keys):
+        docs.sort(key=lambda d: _sort_key(get_path(d, field)), reverse=direction < 0)
+    return docs
+
+
+def _sort_keys(key, direction=None) -> list:
+    if key is None:
+        return []
+    if isinstance(key, str):
+        return [(key, 1 if direction is None else direction)]
+    return list(key)
+
+
+def _upsert_seed(query: dict) -> dict:
+    """The equality conditions of a filter become the fields of an upserted document."""
+    doc = {}
+    for key, cond in query.items():
+        if key.startswith("$"):
+            continue
+        if isinstance(cond, dict) and cond and all(k.startswith("$") for k in cond):
+            if "$eq" not in cond:
+                continue
+            cond = cond["$eq"]
+        set_path(doc, key, copy.deepcopy(cond))
+    return doc
+
+
+class FakeCursor:
+    def __init__(self, collection, query, projection=None):
+        self._collection = collection
+        self._query = query or {}
+        self._projection = projection
+        self._sort = []
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key, direction=None):
+        self._sort = _sort_keys(key, direction)
+        return self
+
+    def skip(self, count: int):
+        self._skip = count
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def batch_size(self, size: int):
+        return self
+
+    def max_time_ms(self, ms: int):
+        return self
+
+    def _results(self) -> list:
+        docs = sort_documents(self._collection._find(self._query), self._sort)[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        return [project(doc, self._projection) for doc in docs]
+
+    async def to_list(self, length=None):
+        await self._collection._io()
+        docs = self._results()
+        return docs if length is None else docs[:length]
+
+    async def __aiter__(self):
+        await self._collection._io()
+        for doc in self._results():
+            yield doc
+
+
+class FakeCollection:
+    """
+    One collection. Set `interleave = True` to yield to the event loop a random
+    number of times before each operation, so concurrent callers interleave the
+    way they would against a real server; each operation itself stays atomic.
+    """
+
+    def __init__(self, name: str = "", docs=()):
+        self.name = name
+        self.docs = [copy.deepcopy(d) for d in docs]
+        self.interleave = False
+        self._unique = []
+
+    def add_unique_index(self, *fields: str, partial: dict = None) -> None:
+        """Enforce uniqueness of `fields` on inserts, optionally only for documents matching `partial`."""
+        self._unique.append((fields, partial))
+
+    async def _io(self) -> None:
+        if self.interleave:
+            for _ in range(random.randint(0, 3)):
+                await asyncio.sleep(0)
+
+    def _find(self, query) -> list:
+        return [d for d in self.docs if matches(d, query)]
+
+    def _first(self, query, sort=None):
+        found = sort_documents(self._find(query), _sort_keys(sort))
+        return found[0] if found else None
+
+    def _insert(self, doc: dict) -> None:
+        if "_id" in doc and any(d.get("_id") == doc["_id"] for d in self.docs):
+            raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: _id_")
+        for fields, partial in self._unique:
+            if partial is not None and not matches(doc, partial):
+                continue
+            key = [get_path(doc, f) for f in fields]
+            for other in self.docs:
+                if (partial is None or matches(other, partial)) and [get_path(other, f) for f in fields] == key:
+                    raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: {'_'.join(fields)}")
+        self.docs.append(doc)
+
+    def _update(self, query, update, upsert: bool, many: bool) -> SimpleNamespace:
+        matched = self._find(query)
+        if not many:
+            matched = matched[:1]
+        modified = 0
+        for doc in matched:
+            before = copy.deepcopy(doc)
+            apply_update(doc, update)
+            modified += doc != before
+        upserted_id = None
+        if not matched and upsert:
+            doc = _upsert_seed(query)
+            apply_update(doc, update, inserting=True)
+            self._insert(doc)
+            upserted_id = doc.get("_id")
+        return SimpleNamespace(matched_count=len(matched), modified_count=modified, upserted_id=upserted_id)
+
+    def _replace(self, query, replacement, upsert: bool) -> SimpleNamespace:
+        doc = self._first(query)
+        if doc is None:
+            if upsert:
+                new = {**_upsert_seed(query), **copy.deepcopy(replacement)}
+                self._insert(new)
+                return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=new.get("_id"))
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+        kept_id = {"_id": doc["_id"]} if "_id" in doc else {}
+        before = copy.deepcopy(doc)
+        doc.clear()
+        doc.update({**kept_id, **copy.deepcopy(replacement)})
+        return SimpleNamespace(matched_count=1, modified_count=int(doc != before), upserted_id=None)
+
+    def _delete(self, query, many: bool) -> int:
+        doomed = self._find(query)
+        if not many:
+            doomed = doomed[:1]
+        self.docs = [d for d in self.docs if not any(d is gone for gone in doomed)]
+        return len(doomed)
+
+    def find(self, filter=None, projection=None, sort=None, skip=0, limit=0, **kwargs) -> FakeCursor:
+        cursor = FakeCursor(self, filter, projection)
+        if sort:
+            cursor.sort(sort)
+        return cursor.skip(skip).limit(limit)
+
+    async def find_one(self, filter=None, projection=None, sort=None, **kwargs):
+        await self._io()
+        doc = self._first(filter, sort)
+        return None if doc is None else project(doc, projection)
+
+    async def count_documents(self, filter, **kwargs) -> int:
+        await self._io()
+        return len(self._find(filter))
+
+    async def distinct(self, key: str, filter=None, **kwargs) -> list:
+        await self._io()
+        values = []
+        for doc in self._find(filter):
+            value = get_path(doc, key)
+            for item in value if isinstance(value, list) else [value]:
+                if item is not MISSING and item not in values:
+                    values.append(item)
+        return values
+
+    async def insert_one(self, document, **kwargs):
+        await self._io()
+        self._insert(copy.deepcopy(document))
+        return SimpleNamespace(inserted_id=document.get("_id"))
+
+    async def insert_many(self, documents, ordered=True, **kwargs):
+        await self._io()
+        documents = list(documents)
+        for document in documents:
+            self._insert(copy.deepcopy(document))
+        return SimpleNamespace(inserted_ids=[d.get("_id") for d in documents])
+
+    async def update_one(self, filter, update, upsert=False, **kwargs):
+        await self._io()
+        return self._update(filter, update, upsert, many=False)
+
+    async def update_many(self, filter, update, upsert=False, **kwargs):
+        await self._io()
+        return self._update(filter, update, upsert, many=True)
+
+    async def replace_one(self, filter, replacement, upsert=False, **kwargs):
+        await self._io()
+        return self._replace(filter, replacement, upsert)
+
+    async def find_one_and_update(self, filter, update, projection=None, sort=None, upsert=False,
+                                  return_document=False, **kwargs):
+        await self._io()
+        doc = self._first(filter, sort)
+        if doc is None:
+            if not upsert:
+                return None
+            doc = _upsert_seed(filter)
+            apply_update(doc, update, inserting=True)
+            self._insert(doc)
+            return project(doc, projection) if return_document else None
+        before = project(doc, projection)
+        apply_update(doc, update)
+        # ReturnDocument.AFTER is True, BEFORE is False
+        return project(doc, projection) if return_document else before
+
+    async def delete_one(self, filter, **kwargs):
+        await self._io()
+        return SimpleNamespace(deleted_count=self._delete(filter, many=False))
+
+    async def delete_many(self, filter, **kwargs):
+        await self._io()
+        return SimpleNamespace(deleted_count=self._delete(filter, many=True))
+
+    async def bulk_write(self, requests, ordered=True, **kwargs):
+        await self._io()
+        result = SimpleNamespace(inserted_count=0, matched_count=0, modified_count=0, upserted_count=0, deleted_count=0)
+        for request in requests:
+            if isinstance(request, InsertOne):
+                self._insert(copy.deepcopy(request._doc))
+                result.inserted_count += 1
+                continue
+            if isinstance(request, (DeleteOne, DeleteMany)):
+                result.deleted_count += self._delete(request._filter, many=isinstance(request, DeleteMany))
+                continue
+            if isinstance(request, ReplaceOne):
+                outcome = self._replace(request._filter, request._doc, request._upsert)
+            elif isinstance(request, (UpdateOne, UpdateMany)):
+                outcome = self._update(request._filter, request._doc, request._upsert, many=isinstance(request, UpdateMany))
+            else:
+                raise NotImplementedError(f"fake bulk operation {type(request).__name__}")
+            result.matched_count += outcome.matched_count
+            result.modified_count += outcome.modified_count
+            result.upserted_count += int(not outcome.matched_count and request._upsert)
+        return result
+
+
+class FakeDB:
+    """A database whose collections are created on first access, like Motor's."""
+
+    def __init__(self, **collections):
+        for name, docs in collections.items():
+            setattr(self, name, self.new_collection(name, docs))
+
+    def new_collection(self, name: str, docs=()) -> FakeCollection:
+        return FakeCollection(name, docs)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        collection = self.new_collection(name)
+        setattr(self, name, collection)
+        return collection
+
+    def __getitem__(self, name):
+        return getattr(self, name)
@@ -0,0 +1,138 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fakes import FakeDB
+from routers.learning import ObservationBulkCreate, ObservationCreate, create_observations_bulk, get_child_progress
+from services import child_progress
+
+TEACHER = {"user_id": "t-1", "role": "STAFF", "display_name": "Teacher"}
+CHILDREN = 10
+
+
+def _db():
+    return FakeDB(
+        children=[
+            {"child_id": f"c-{i}", "full_name": f"Child {i}", "guardian_id": f"g-{i}"} for i in range(CHILDREN)
+        ],
+        sessions=[
+            {"child_id": "c-1", "session_id": "s-old", "state": "ACTIVE", "checkin_at": "2026-10-19T08:00:00"},
+            {"child_id": "c-1", "session_id": "s-new", "state": "ACTIVE", "checkin_at": "2026-10-19T09:00:00"},
+        ],
+    )
+
+
+def _bulk(db, observations):
+    body = ObservationBulkCreate(observations=observations)
+    return asyncio.run(create_observations_bulk(body, user=TEACHER, db=db))
+
+
+def test_school_year_boundaries():
+    assert child_progress.school_year_for("2026-08-31T23:00:00+00:00") == "2025-2026"
+    assert child_progress.school_year_for("2026-09-01T07:00:00+00:00") == "2026-2027"
+
+
+def test_progress_updates_fold_a_batch_into_one_upsert_per_child_and_year():
+    observations = [
+        {"child_id": "c-1", "category": "language", "milestone": True, "created_at": "2026-10-01T09:00:00+00:00"},
+        {"child_id": "c-1", "category": "language", "milestone": False, "created_at": "2026-10-03T09:00:00+00:00"},
+        {"child_id": "c-1", "category": "physical", "milestone": False, "created_at": "2026-10-02T09:00:00+00:00"},
+        {"child_id": "c-1", "category": "physical", "milestone": False, "created_at": "2026-06-02T09:00:00+00:00"},
+    ]
+
+    operations = child_progress.progress_updates(observations)
+
+    assert sorted(op._filter["_id"] for op in operations) == ["c-1:2025-2026", "c-1:2026-2027"]
+    current = next(op._doc for op in operations if op._filter["_id"] == "c-1:2026-2027")
+    assert current["$inc"] == {
+        "total_observations": 3,
+        "total_milestones": 1,
+        "categories.language.observations": 2,
+        "categories.language.milestones": 1,
+        "categories.physical.observations": 1,
+        "categories.physical.milestones": 0,
+    }
+    assert current["$max"]["categories.language.last_milestone_at"] == "2026-10-01T09:00:00+00:00"
+    assert current["$max"]["last_observed_at"] == "2026-10-03T09:00:00+00:00"
+    assert current["$min"] == {"first_observed_at": "2026-10-01T09:00:00+00:00"}
+
+
+@pytest.mark.query_budget(5)
+def test_bulk_import_resolves_children_and_sessions_once(query_counter):
+    db = _db()
+    counted = query_counter.wrap(db)
+
+    created = _bulk(counted, [
+        ObservationCreate(child_id=f"c-{i % CHILDREN}", notes=f"Note {i}", category="language", milestone=i < 3)
+        for i in range(40)
+    ])
+
+    assert len(created) == 40
+    assert created[1]["child_name"] == "Child 1"
+    assert created[1]["session_id"] == "s-new"
+    assert created[0]["session_id"] is None
+    assert len(db.observations.docs) == 40
+    assert len(db.parent_timeline.docs) == 40
+    assert query_counter.calls["children.find"] == 1
+    assert query_counter.calls["sessions.find"] == 1
+
+
+def test_progress_is_one_document_read_after_incremental_imports(query_counter):
+    db = _db()
+    _bulk(db, [ObservationCreate(child_id="c-2", notes="Counted to ten", category="cognitive", milestone=True)])
+    _bulk(db, [
+        ObservationCreate(child_id="c-2", notes="Shared blocks", category="social"),
+        ObservationCreate(child_id="c-2", notes="Sorted shapes", category="cognitive"),
+        ObservationCreate(child_id="c-2", notes="Unknown category", category="juggling"),
+    ])
+
+    counted = query_counter.wrap(db)
+    progress = asyncio.run(get_child_progress("c-2", user=TEACHER, db=counted))
+
+    assert query_counter.total == 1
+    assert progress["total_observations"] == 4
+    assert progress["total_milestones"] == 1
+    assert progress["categories"]["cognitive"]["observations"] == 2
+    assert progress["categories"]["cognitive"]["milestones"] == 1
+    assert progress["categories"]["general"]["observations"] == 1
+    assert progress["child_name"] == "Child 2"
+
+
+def test_parents_only_read_progress_of_their_own_children():
+    db = _db()
+    _bulk(db, [ObservationCreate(child_id="c-2", category="language", notes="Named colours")])
+
+    own = asyncio.run(get_child_progress("c-2", user={"user_id": "g-2", "role": "PARENT"}, db=db))
+    assert own["total_observations"] == 1
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(get_child_progress("c-2", user={"user_id": "g-3", "role": "PARENT"}, db=db))
+    assert exc.value.status_code == 404
+
+
+def test_rebuild_streams_by_child_and_writes_in_batches(query_counter):
+    db = _db()
+    for i in range(7):
+        db.observations.docs.append({
+            "child_id": f"c-{i % 5}", "child_name": f"Child {i % 5}", "category": "language",
+            "milestone": i == 0, "created_at": f"2026-10-0{i + 1}T09:00:00+00:00",
+        })
+    db.observations.docs.append({"child_id": None, "created_at": "2026-10-01T09:00:00+00:00"})
+    renewals = []
+
+    async def renew():
+        renewals.append(len(db.child_progress.docs))
+
+    rebuilt = asyncio.run(child_progress.rebuild(query_counter.wrap(db), batch_size=2, on_batch=renew))
+
+    assert rebuilt == 5
+    assert query_counter.calls["child_progress.bulk_write"] == 3
+    assert renewals == [2, 4, 5]
+    first = next(d for d in db.child_progress.docs if d["_id"] == "c-0:2026-2027")
+    assert first["total_observations"] == 2
+    assert first["total_milestones"] == 1
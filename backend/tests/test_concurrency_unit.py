@@ -0,0 +1,47 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi import HTTPException
+
+from utils.concurrency import gather_lookups
+
+
+def test_results_keep_argument_order_and_skip_none():
+    async def value(v, delay):
+        await asyncio.sleep(delay)
+        return v
+
+    async def scenario():
+        started = asyncio.get_running_loop().time()
+        results = await gather_lookups(value("a", 0.03), None, value("c", 0.01))
+        return results, asyncio.get_running_loop().time() - started
+
+    results, elapsed = asyncio.run(scenario())
+    assert results == ["a", None, "c"]
+    assert elapsed < 0.035  # bounded by the slowest lookup, not the sum
+
+
+def test_failure_cancels_siblings_and_propagates_original_exception():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def failing():
+        await asyncio.sleep(0)
+        raise HTTPException(status_code=404, detail="الطفل غير موجود")
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(gather_lookups(slow(), failing()))
+
+    assert exc.value.status_code == 404
+    assert cancelled == [True]
@@ -0,0 +1,82 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fakes import FakeDB
+from services.customer_cache import CustomerCardCache
+from utils.cache import TTLCache
+
+
+CUSTOMER = {
+    "customer_id": "cust-1",
+    "card_number": "CARD-1",
+    "child_name": "Adam",
+    "waiver_accepted": True,
+    "total_visits": 3,
+    "guardian": {"name": "Sara", "phone": "+962790000000"},
+    "guardian_signature": "data:image/png;base64,AAAA",
+}
+
+
+def test_repeat_taps_are_served_from_cache(query_counter):
+    db = query_counter.wrap(FakeDB(customers=[CUSTOMER]))
+    cache = CustomerCardCache(ttl_seconds=60)
+
+    first = asyncio.run(cache.get_by_card(db, "CARD-1"))
+    second = asyncio.run(cache.get_by_card(db, "CARD-1"))
+
+    assert query_counter.calls["customers.find_one"] == 1
+    assert first["child_name"] == second["child_name"] == "Adam"
+    assert "guardian_signature" not in second
+
+    # Callers mutate returned customers in place; the cached entry must not change
+    second["child_name"] = "mutated"
+    assert asyncio.run(cache.get_by_card(db, "CARD-1"))["child_name"] == "Adam"
+
+
+def test_invalidation_by_card_and_visit_counters(query_counter):
+    db = query_counter.wrap(FakeDB(customers=[CUSTOMER]))
+    cache = CustomerCardCache(ttl_seconds=60)
+    asyncio.run(cache.get_by_card(db, "CARD-1"))
+
+    cache.apply_visit("CARD-1", "2026-10-19T08:00:00+00:00")
+    cached = cache.peek("CARD-1")
+    assert cached["total_visits"] == 4
+    assert cached["last_visit"] == "2026-10-19T08:00:00+00:00"
+
+    cache.invalidate_card("CARD-1")
+    assert cache.peek("CARD-1") is None
+    asyncio.run(cache.get_by_card(db, "CARD-1"))
+    assert query_counter.calls["customers.find_one"] == 2
+
+
+def test_customers_without_waiver_are_not_cached(query_counter):
+    db = query_counter.wrap(FakeDB(customers=[{**CUSTOMER, "waiver_accepted": False}]))
+    cache = CustomerCardCache(ttl_seconds=60)
+
+    asyncio.run(cache.get_by_card(db, "CARD-1"))
+    asyncio.run(cache.get_by_card(db, "CARD-1"))
+    assert query_counter.calls["customers.find_one"] == 2
+
+
+def test_ttl_cache_expiry_and_lru_bound():
+    now = [0.0]
+    cache = TTLCache(ttl_seconds=10, max_entries=2, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b", None) is None  # least recently used was evicted
+    now[0] = 11
+    assert cache.get("a", None) is None
+
+
+def test_cache_stays_within_max_entries():
+    cache = CustomerCardCache(ttl_seconds=60, max_entries=3)
+    for i in range(10):
+        cache.store({**CUSTOMER, "customer_id": f"cust-{i}", "card_number": f"CARD-{i}"})
+
+    assert cache.stats()["entries"] == 3
+    assert cache.peek("CARD-0") is None and cache.peek("CARD-9") is not None
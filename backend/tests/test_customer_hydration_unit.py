@@ -0,0 +1,39 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fakes import FakeDB
+from routers.customers import _hydrate_customers
+
+
+def test_page_hydration_uses_fixed_number_of_queries(query_counter):
+    customers = [
+        {"customer_id": f"cust-{i}", "household_id": "hh-1" if i < 3 else None}
+        for i in range(50)
+    ]
+    db = query_counter.wrap(FakeDB(
+        customers=customers,
+        subscriptions=[
+            {"customer_id": "cust-1", "status": "ACTIVE", "expires_at": "2099-01-01T00:00:00+00:00"},
+            {"customer_id": "cust-1", "status": "ACTIVE", "expires_at": "2099-06-01T00:00:00+00:00"},
+        ],
+        households=[{"household_id": "hh-1", "primary_guardian": "guardian-1", "children": ["c1", "c2"]}],
+    ))
+
+    page = asyncio.run(_hydrate_customers(db, [dict(c) for c in customers]))
+
+    # subscriptions, then households and their customers for the household graph
+    assert query_counter.calls == {"subscriptions.find": 1, "households.find": 1, "customers.find": 1}
+    assert page[1]["has_active_subscription"] is True
+    assert page[1]["subscription_expires_at"].month == 6
+    assert "has_active_subscription" not in page[0]
+    assert page[0]["household_primary_guardian"] == "guardian-1"
+    assert page[0]["household_children_count"] == 2
+    assert page[0]["household_customer_count"] == 3
+    assert page[10]["household_customer_count"] == 1
+
+    # Households are served from the graph on the next page
+    asyncio.run(_hydrate_customers(db, [dict(c) for c in customers]))
+    assert query_counter.calls == {"subscriptions.find": 2, "households.find": 1, "customers.find": 1}
@@ -0,0 +1,107 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from pymongo.errors import ExecutionTimeout
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fakes import FakeCursor, FakeDB
+from routers.customers import search_customers
+from services.customer_search import (
+    SEARCH_BACKFILL_MIGRATION, build_search_fields, build_search_filter, build_search_filter_with_fallback,
+    customer_search_filter, name_tokens, normalize_text, searchBackfill,
+)
+
+
+CUSTOMER = {
+    "child_name": "أَحْمَد مُحَمّـد",
+    "card_number": "CARD-00123",
+    "guardian": {"name": "Sara Ōmar", "phone": "+962 79 123 4567", "whatsapp": "0791234567"},
+}
+
+
+def test_normalize_folds_arabic_variants_and_latin_case():
+    assert normalize_text("أَحْمَد مُحَمّـد") == "احمد محمد"
+    assert normalize_text("فاطمة") == normalize_text("فاطمه")
+    assert normalize_text("Ōmar") == "omar"
+    assert name_tokens("Sara Ōmar", "sara") == ["omar", "sara"]
+
+
+def test_search_fields_store_tokens_reversed_phones_and_card():
+    fields = build_search_fields(CUSTOMER)
+    assert fields["search_tokens"] == sorted(["احمد", "محمد", "omar", "sara"])
+    assert fields["search_phone_rev"] == sorted(["765432197269", "7654321970"])
+    assert fields["search_card"] == "card-00123"
+
+
+def test_filter_uses_anchored_prefixes_only():
+    name_filter = build_search_filter("احم")
+    assert name_filter == {"$or": [
+        {"search_tokens": {"$regex": "^احم"}},
+        {"search_card": {"$regex": "^احم"}},
+    ]}
+
+    # Local trunk zero is dropped so it matches the international form as a suffix
+    phone_filter = build_search_filter("0791234567")
+    clauses = phone_filter["$or"]
+    assert {"search_phone_rev": {"$regex": "^765432197"}} in clauses
+    for clause in clauses:
+        for condition in clause.values():
+            assert condition["$regex"].startswith("^")
+
+    assert build_search_filter("  ") is None
+
+
+def test_customers_missing_search_fields_fall_back_to_substring_match():
+    search_filter = build_search_filter_with_fallback(" 079+1 ")
+    indexed, unindexed = search_filter["$or"]
+
+    assert indexed == build_search_filter("079+1")
+    # Only rows the backfill has not reached, with the typed text escaped
+    assert unindexed["search_card"] == {"$exists": False}
+    assert {"guardian.phone": {"$regex": r"079\+1", "$options": "i"}} in unindexed["$or"]
+    assert build_search_filter_with_fallback("  ") is None
+
+
+def test_fallback_only_until_search_backfill_migration_is_applied(query_counter):
+    db = query_counter.wrap(FakeDB())
+
+    assert "$or" in asyncio.run(customer_search_filter(db, "sara"))["$or"][1]
+
+    db._db.migrations.docs.append({"_id": SEARCH_BACKFILL_MIGRATION, "state": "applied"})
+    searchBackfill.clear()
+    assert asyncio.run(customer_search_filter(db, "sara")) == build_search_filter("sara")
+    # Once applied, the migration record is not read again
+    asyncio.run(customer_search_filter(db, "sara"))
+    assert query_counter.calls["migrations.find_one"] == 2
+
+
+class TimingOutCursor(FakeCursor):
+    def max_time_ms(self, ms: int):
+        raise ExecutionTimeout("operation exceeded time limit")
+
+
+def test_typeahead_timeout_is_a_503_not_a_500():
+    db = FakeDB(migrations=[{"_id": SEARCH_BACKFILL_MIGRATION, "state": "applied"}])
+    db.customers.find = lambda query, projection=None: TimingOutCursor(db.customers, query, projection)
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(search_customers(q="a", branch_id=None, limit=10, user={"role": "ADMIN"}, db=db))
+    assert exc.value.status_code == 503
+
+
+def test_typeahead_orders_the_limited_page_by_child_name():
+    db = FakeDB(
+        migrations=[{"_id": SEARCH_BACKFILL_MIGRATION, "state": "applied"}],
+        customers=[
+            {"customer_id": f"cust-{i}", "card_number": f"CARD-{i}", "branch_id": "b1", "child_name": name,
+             **build_search_fields({"child_name": name})}
+            for i, name in enumerate(["Zaid Ali", "Adam Ali", "Lina Ali"])
+        ],
+    )
+
+    results = asyncio.run(search_customers(q="ali", branch_id=None, limit=10, user={"role": "ADMIN"}, db=db))
+    assert [r.child_name for r in results] == ["Adam Ali", "Lina Ali", "Zaid Ali"]
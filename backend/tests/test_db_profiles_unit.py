@@ -0,0 +1,15 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from utils.db_profiles import client_options
+
+
+def test_pool_settings_are_read_when_the_client_is_built(monkeypatch):
+    monkeypatch.delenv("MONGO_MAX_POOL_SIZE", raising=False)
+    assert client_options()["maxPoolSize"] == 100
+
+    # Set after import, as load_dotenv() may be
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "7")
+    assert client_options()["maxPoolSize"] == 7
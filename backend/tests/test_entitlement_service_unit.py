@@ -0,0 +1,41 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fakes import FakeDB
+from services.entitlement_service import consume_visit_pack
+
+
+def test_concurrent_consumes_never_double_spend():
+    pack = {"pack_id": "pack-1", "child_id": "child-1", "status": "ACTIVE", "remaining_visits": 5, "purchased_at": "2026-10-01"}
+    db = FakeDB(visit_packs=[pack])
+    # Concurrent callers interleave between operations; each update stays atomic
+    db.visit_packs.interleave = True
+
+    async def storm():
+        return await asyncio.gather(*(
+            consume_visit_pack(db, {"pack_id": "pack-1"}, "2026-10-19T08:00:00+00:00") for _ in range(20)
+        ))
+
+    results = asyncio.run(storm())
+
+    assert sum(1 for r in results if r) == 5
+    assert sorted(r["remaining_visits"] for r in results if r) == [0, 1, 2, 3, 4]
+    assert db.visit_packs.docs[0]["remaining_visits"] == 0
+    assert db.visit_packs.docs[0]["status"] == "EXHAUSTED"
+
+
+def test_oldest_active_pack_is_consumed_first():
+    packs = [
+        {"pack_id": "newer", "child_id": "child-1", "status": "ACTIVE", "remaining_visits": 3, "purchased_at": "2026-10-10"},
+        {"pack_id": "older", "child_id": "child-1", "status": "ACTIVE", "remaining_visits": 1, "purchased_at": "2026-09-01"},
+    ]
+    db = FakeDB(visit_packs=packs)
+
+    first = asyncio.run(consume_visit_pack(db, {"child_id": "child-1"}, "now"))
+    second = asyncio.run(consume_visit_pack(db, {"child_id": "child-1"}, "now"))
+
+    assert (first["pack_id"], first["status"]) == ("older", "EXHAUSTED")
+    assert (second["pack_id"], second["remaining_visits"], second["status"]) == ("newer", 2, "ACTIVE")
@@ -0,0 +1,113 @@
+import asyncio
+import random
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+from fastapi import HTTPException
+from pymongo.errors import AutoReconnect
+
+import routers.events as events_router
+from fakes import FakeDB
+from models.event_booking import EventBookRequest
+
+
+def _db(event):
+    db = FakeDB(events=[event])
+    db.event_registrations.add_unique_index("event_id", "customer_id", partial={"status": "booked"})
+    db.events.interleave = db.event_registrations.interleave = True
+    return db
+
+
+async def _no_notification(*args, **kwargs):
+    return None
+
+
+@pytest.fixture(autouse=True)
+def _no_notifications(monkeypatch):
+    monkeypatch.setattr(events_router, "maybe_send_whatsapp_notification", _no_notification)
+
+
+def _run_storm(event, customers):
+    db = _db(event)
+
+    async def book(customer_id):
+        try:
+            await events_router.book_event(
+                EventBookRequest(eventId="evt-1", customerId=customer_id), {"user_id": "staff-1"}, db
+            )
+            return "booked"
+        except HTTPException as exc:
+            return exc.detail
+
+    async def storm():
+        return await asyncio.gather(*(book(c) for c in customers))
+
+    return db, asyncio.run(storm())
+
+
+def test_hundreds_of_concurrent_bookings_never_oversell():
+    random.seed(7)
+    event = {"id": "evt-1", "title": "Birthday", "capacity": 40, "status": "scheduled", "booked_count": 0}
+    # 300 requests: 250 distinct customers plus 50 double-taps
+    customers = [f"cust-{i}" for i in range(250)] + [f"cust-{i}" for i in range(50)]
+    random.shuffle(customers)
+
+    db, outcomes = _run_storm(event, customers)
+
+    booked = [r for r in db.event_registrations.docs if r["status"] == "booked"]
+    assert outcomes.count("booked") == len(booked) == 40
+    assert len({r["customer_id"] for r in booked}) == 40
+    assert db.events.docs[0]["booked_count"] == 40
+    assert db.events.docs[0]["status"] == "full"
+    assert set(outcomes) <= {"booked", "Event has reached capacity", "Customer already booked"}
+
+
+def test_legacy_event_counter_is_seeded_before_reserving():
+    random.seed(11)
+    event = {"id": "evt-1", "title": "Trip", "capacity": 5, "status": "scheduled"}
+    db, outcomes = _run_storm(event, [f"cust-{i}" for i in range(30)])
+
+    assert outcomes.count("booked") == 5
+    assert db.events.docs[0]["booked_count"] == 5
+
+
+def test_failed_booking_write_gives_the_seat_back():
+    db = _db({"id": "evt-1", "title": "Trip", "capacity": 5, "status": "scheduled", "booked_count": 4})
+
+    async def unreachable(doc):
+        raise AutoReconnect("primary stepped down")
+
+    db.event_registrations.insert_one = unreachable
+    with pytest.raises(AutoReconnect):
+        asyncio.run(events_router.book_event(
+            EventBookRequest(eventId="evt-1", customerId="cust-1"), {"user_id": "staff-1"}, db
+        ))
+
+    assert db.events.docs[0]["booked_count"] == 4
+    assert db.events.docs[0]["status"] == "scheduled"
+
+
+def test_capacity_lowered_during_a_booking_is_respected():
+    event = {"id": "evt-1", "title": "Birthday", "capacity": 10, "status": "scheduled", "booked_count": 3}
+    db = _db(event)
+    db.events.interleave = False
+    find_one = db.events.find_one
+
+    async def read_then_admin_lowers_capacity(*args, **kwargs):
+        doc = await find_one(*args, **kwargs)
+        db.events.docs[0]["capacity"] = 3
+        return doc
+
+    db.events.find_one = read_then_admin_lowers_capacity
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(events_router.book_event(
+            EventBookRequest(eventId="evt-1", customerId="cust-1"), {"user_id": "staff-1"}, db
+        ))
+
+    assert exc.value.detail == "Event has reached capacity"
+    assert db.events.docs[0]["booked_count"] == 3
+    assert db.event_registrations.docs == []
@@ -0,0 +1,76 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fakes import FakeDB
+from services.household_graph import HouseholdGraph
+
+
+def _db():
+    return FakeDB(
+        children=[
+            {"child_id": "child-1", "guardian_id": "guardian-1"},
+            {"child_id": "child-2", "guardian_id": "guardian-1"},
+            {"child_id": "child-3", "guardian_id": "guardian-2"},
+        ],
+        households=[
+            {"household_id": "hh-1", "primary_guardian": "Sara", "children": ["child-1"], "authorized_pickups": ["Omar"]},
+        ],
+        customers=[
+            {"customer_id": "cust-1", "household_id": "hh-1"},
+            {"customer_id": "cust-2", "household_id": "hh-1"},
+        ],
+    )
+
+
+def test_guardian_children_are_loaded_once_and_answer_reverse_lookups(query_counter):
+    db = query_counter.wrap(_db())
+    graph = HouseholdGraph(ttl_seconds=60)
+
+    for _ in range(3):
+        assert asyncio.run(graph.child_ids_for_guardian(db, "guardian-1")) == ["child-1", "child-2"]
+    assert asyncio.run(graph.guardians_for_children(db, ["child-1", "child-2"])) == {
+        "child-1": "guardian-1", "child-2": "guardian-1",
+    }
+    assert query_counter.calls == {"children.find": 1}
+
+    assert asyncio.run(graph.guardians_for_children(db, ["child-1", "child-3"]))["child-3"] == "guardian-2"
+    assert query_counter.calls == {"children.find": 2}
+
+
+def test_new_child_is_seen_after_invalidation_and_empty_guardians_are_not_cached():
+    db = _db()
+    graph = HouseholdGraph(ttl_seconds=60)
+
+    assert asyncio.run(graph.child_ids_for_guardian(db, "guardian-3")) == []
+    db.children.docs.append({"child_id": "child-4", "guardian_id": "guardian-3"})
+    assert asyncio.run(graph.child_ids_for_guardian(db, "guardian-3")) == ["child-4"]
+
+    asyncio.run(graph.child_ids_for_guardian(db, "guardian-1"))
+    child = {"child_id": "child-5", "guardian_id": "guardian-1"}
+    db.children.docs.append(child)
+    graph.invalidate_child(child)
+    assert asyncio.run(graph.child_ids_for_guardian(db, "guardian-1")) == ["child-1", "child-2", "child-5"]
+
+
+def test_household_nodes_carry_pickups_and_linked_customers(query_counter):
+    db = _db()
+    counted = query_counter.wrap(db)
+    graph = HouseholdGraph(ttl_seconds=60)
+
+    node = asyncio.run(graph.household(counted, "hh-1"))
+    assert node["authorized_pickups"] == ["Omar"]
+    assert node["customer_ids"] == ["cust-1", "cust-2"]
+    assert asyncio.run(graph.household(counted, "hh-missing")) is None
+
+    # Callers get copies; mutating one does not change the cached node
+    node["customer_ids"].append("cust-x")
+    assert asyncio.run(graph.households(counted, ["hh-1"]))["hh-1"]["customer_ids"] == ["cust-1", "cust-2"]
+    assert query_counter.calls == {"households.find": 2, "customers.find": 1}
+
+    moved = {"customer_id": "cust-3", "household_id": "hh-1"}
+    db.customers.docs.append(moved)
+    graph.invalidate_customer({"customer_id": "cust-3", "household_id": None}, moved)
+    assert asyncio.run(graph.household(db, "hh-1"))["customer_ids"] == ["cust-1", "cust-2", "cust-3"]
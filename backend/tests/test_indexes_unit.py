@@ -0,0 +1,86 @@
+import asyncio
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from pymongo.errors import OperationFailure
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from utils.indexes import create_indexes, ensure_audit_id_index, index_specs, skip_index_creation
+
+
+class FakeCollection:
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+
+    async def create_indexes(self, models):
+        names = [model.document["name"] for model in models]
+        self.db.commands.append((self.name, names))
+        if any((self.name, n) in self.db.duplicates for n in names):
+            raise OperationFailure("E11000 duplicate key error", code=11000)
+        self.db.indexes[self.name].update(names)
+        return names
+
+    async def create_index(self, keys, **kwargs):
+        if self.name == "audit_logs" and "audit_id_1" in self.db.indexes["audit_logs"]:
+            raise OperationFailure("Index with name: audit_id_1 already exists with different options", code=85)
+        self.db.indexes[self.name].add("audit_id_1")
+        return "audit_id_1"
+
+    async def drop_index(self, name):
+        self.db.dropped.append(name)
+        self.db.indexes[self.name].discard(name)
+
+
+class FakeDB:
+    def __init__(self, duplicates=()):
+        self.commands = []
+        self.indexes = defaultdict(set)
+        self.dropped = []
+        self.duplicates = set(duplicates)
+
+    def __getitem__(self, name):
+        return FakeCollection(self, name)
+
+    def __getattr__(self, name):
+        return FakeCollection(self, name)
+
+
+def test_one_create_indexes_command_per_collection():
+    db = FakeDB()
+    asyncio.run(create_indexes(db))
+
+    for name, models in index_specs().items():
+        assert (name, [m.document["name"] for m in models]) in db.commands
+    assert len([c for c in db.commands if c[0] == "users"]) == 1
+    assert "email_1" in db.indexes["users"]
+    assert "card_number_1" in db.indexes["customers"]
+    assert "event_customer_booked_unique" in db.indexes["event_registrations"]
+
+
+def test_guarded_index_failure_does_not_skip_the_rest_of_the_collection(capsys):
+    db = FakeDB(duplicates=[("customers", "card_number_1")])
+    asyncio.run(create_indexes(db))
+
+    assert "card_number_1" not in db.indexes["customers"]
+    assert "search_tokens_1" in db.indexes["customers"]
+    assert "customers index card_number_1 creation skipped" in capsys.readouterr().out
+
+
+def test_legacy_audit_id_index_is_replaced():
+    db = FakeDB()
+    db.indexes["audit_logs"].add("audit_id_1")
+    asyncio.run(ensure_audit_id_index(db))
+
+    assert db.dropped == ["audit_id_1"]
+    assert "audit_id_1" in db.indexes["audit_logs"]
+
+
+def test_skip_switch_is_read_at_startup(monkeypatch):
+    monkeypatch.delenv("SKIP_INDEX_CREATION", raising=False)
+    assert skip_index_creation() is False
+
+    monkeypatch.setenv("SKIP_INDEX_CREATION", "true")
+    assert skip_index_creation() is True
@@ -0,0 +1,79 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import services.gemini_service as gemini_service
+from fakes import FakeDB
+from services.llm_service import LLMService, StubProvider, cache_key
+
+
+class FailingProvider:
+    model = "failing"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def complete(self, kind, system_prompt, prompt):
+        self.calls += 1
+        return "not json"
+
+
+def test_cache_key_normalizes_whitespace_but_keeps_case():
+    assert cache_key("lesson-plan", "m", "sys", "Topic:  Shapes\nAge group: 3-4") == \
+        cache_key("lesson-plan", "m", "sys", " Topic: Shapes Age group: 3-4 ")
+    assert cache_key("daily-report", "m", "sys", "Child: Sara") != cache_key("daily-report", "m", "sys", "Child: sara")
+    assert cache_key("lesson-plan", "m", "sys", "Topic: Shapes") != cache_key("lesson-plan", "m2", "sys", "Topic: Shapes")
+
+
+def test_concurrent_identical_requests_share_one_generation():
+    provider = StubProvider(delay_seconds=0.05)
+    service = LLMService(provider=provider)
+
+    async def scenario():
+        return await asyncio.gather(*(
+            service.complete_json("lesson-plan", "sys", "Topic: Shapes") for _ in range(10)
+        ))
+
+    results = asyncio.run(scenario())
+
+    assert provider.calls == 1
+    assert service.coalesced == 9
+    assert all(result == results[0] for result in results)
+    results[0]["plan_en"] = "mutated"
+    assert asyncio.run(service.complete_json("lesson-plan", "sys", "Topic:  Shapes"))["plan_en"] != "mutated"
+    assert provider.calls == 1
+
+
+def test_outputs_are_shared_through_the_database():
+    db = FakeDB()
+    first = LLMService(provider=StubProvider())
+    second_provider = StubProvider()
+    second = LLMService(provider=second_provider)
+
+    generated = asyncio.run(first.complete_json("daily-report", "sys", "Child name: Adam", db=db))
+    reused = asyncio.run(second.complete_json("daily-report", "sys", "Child name: Adam", db=db))
+
+    assert reused == generated
+    assert second_provider.calls == 0
+    assert len(db.llm_cache.docs) == 1
+
+
+def test_unparseable_output_is_not_cached(monkeypatch):
+    provider = FailingProvider()
+    monkeypatch.setattr(gemini_service, "llmService", LLMService(provider=provider))
+
+    for _ in range(2):
+        plan = asyncio.run(gemini_service.generate_lesson_plan("Shapes", "3-4"))
+        assert plan["plan_en"] == "Lesson plan about: Shapes — Age group: 3-4"
+
+    assert provider.calls == 2
+
+
+def test_gemini_service_uses_the_stub_provider(monkeypatch):
+    monkeypatch.setattr(gemini_service, "llmService", LLMService(provider=StubProvider()))
+
+    report = asyncio.run(gemini_service.generate_daily_report("Adam", "Painted a tree"))
+
+    assert report["report_en"] == "[stub] Child name: Adam | Teacher notes: Painted a tree"
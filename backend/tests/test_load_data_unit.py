@@ -0,0 +1,129 @@
+import asyncio
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+from pymongo.errors import BulkWriteError
+
+from fakes import FakeCollection, FakeDB
+from services.dev_seed_service import DevSeedService
+from services.load_data import LoadDataGenerator, LoadProfile, generate
+
+ANCHOR = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+class InFlightCollection(FakeCollection):
+    """Records batch sizes and how many insert_many calls overlap."""
+
+    def __init__(self, db, name, docs=()):
+        super().__init__(name, docs)
+        self.db = db
+
+    async def insert_many(self, documents, ordered=True, **kwargs):
+        documents = list(documents)
+        self.db.in_flight += 1
+        self.db.max_in_flight = max(self.db.max_in_flight, self.db.in_flight)
+        self.db.batch_sizes.append(len(documents))
+        try:
+            await asyncio.sleep(0)
+            return await super().insert_many(documents, ordered=ordered)
+        finally:
+            self.db.in_flight -= 1
+
+
+class InFlightDB(FakeDB):
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.batch_sizes = []
+        super().__init__()
+
+    def new_collection(self, name, docs=()):
+        return InFlightCollection(self, name, docs)
+
+
+def _profile(**overrides):
+    return LoadProfile(**{"branches": 2, "customers": 60, "sessions": 600, "days": 90, "anchor": ANCHOR, **overrides})
+
+
+def _quiet(_):
+    pass
+
+
+def test_same_seed_produces_the_same_documents_whatever_the_batching():
+    first, second = FakeDB(), FakeDB()
+    counts = asyncio.run(generate(first, _profile(batch_size=7, concurrency=1), log=_quiet))
+    asyncio.run(generate(second, _profile(batch_size=500, concurrency=4), log=_quiet))
+
+    def key(doc):
+        return doc.get("id") or doc.get("session_id") or doc.get("order_id") or doc["customer_id"]
+
+    for name in ("customers", "checkin_sessions", "orders", "event_ledger", "event_registrations"):
+        assert sorted(first[name].docs, key=key) == sorted(second[name].docs, key=key)
+    assert counts["customers"] == 60
+    assert 400 < counts["checkin_sessions"] < 800
+
+    other = LoadDataGenerator(_profile(seed=7)).customer(0)["customers"][0]
+    assert other["customer_id"] != first.customers.docs[0]["customer_id"]
+
+
+def test_generated_documents_are_consistent():
+    generator = LoadDataGenerator(_profile())
+    customer = max((generator.customer(i) for i in range(60)), key=lambda c: len(c["checkin_sessions"]))
+    doc = customer["customers"][0]
+    sessions = customer["checkin_sessions"]
+
+    assert doc["total_visits"] == len(sessions)
+    assert doc["search_card"] and doc["search_tokens"]
+    assert all(s["customer_id"] == doc["customer_id"] for s in sessions)
+    orders = {o["order_id"] for o in customer["orders"]}
+    assert {s["order_id"] for s in sessions if s["order_id"]} == orders
+    check_ins = sum(1 for e in customer["event_ledger"] if e["eventType"] == "CHECK_IN")
+    assert check_ins == len(sessions)
+
+    event = next(generator.events())
+    registered = {r["customer_id"] for r in event["event_registrations"]}
+    assert len(registered) == event["events"][0]["booked_count"]
+    assert registered <= {generator.customer_id(i) for i in range(60)}
+
+
+def test_writer_batches_and_caps_parallel_inserts():
+    db = InFlightDB()
+    asyncio.run(generate(db, _profile(batch_size=50, concurrency=3), log=_quiet))
+
+    assert max(db.batch_sizes) == 50
+    assert 1 < db.max_in_flight <= 3
+
+
+def test_a_failed_batch_fails_the_whole_run():
+    db = InFlightDB()
+    logged = []
+
+    async def rejected(documents, ordered=True, **kwargs):
+        await asyncio.sleep(0)
+        raise BulkWriteError({"writeErrors": [{"index": 0, "code": 11000}]})
+
+    db.checkin_sessions.insert_many = rejected
+
+    with pytest.raises(RuntimeError) as exc:
+        asyncio.run(generate(db, _profile(batch_size=50, concurrency=4), log=logged.append))
+
+    assert isinstance(exc.value.__cause__, BulkWriteError)
+    assert any("checkin_sessions failed" in line for line in logged)
+
+
+def test_load_mode_requires_dev_mode_and_runs_once(monkeypatch):
+    db = FakeDB()
+    monkeypatch.delenv("DEV_MODE", raising=False)
+    assert asyncio.run(DevSeedService(db).seed_load(_profile(), log=_quiet))["allowed"] is False
+
+    monkeypatch.setenv("DEV_MODE", "true")
+    first = asyncio.run(DevSeedService(db).seed_load(_profile(), log=_quiet))
+    again = asyncio.run(DevSeedService(db).seed_load(_profile(), log=_quiet))
+
+    assert first["created"]["customers"] == 60
+    assert again["created"] == {}
+    assert len(db.customers.docs) == 60
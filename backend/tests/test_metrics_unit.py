@@ -0,0 +1,155 @@
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+from fastapi import FastAPI
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from middleware.metrics import (
+    DBCommandListener, DBPoolListener, MetricsMiddleware, MetricsRegistry, query_shape, slow_query_threshold_ms,
+)
+
+
+def _app(registry, listener):
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, registry=registry, server_timing=True)
+
+    @app.get("/api/items/{item_id}")
+    async def get_item(item_id: str):
+        # Motor, like to_thread, runs pymongo on a thread with a copy of the context
+        def run_commands():
+            for name in ("find", "find", "aggregate"):
+                listener.succeeded(SimpleNamespace(command_name=name, duration_micros=2000))
+
+        await asyncio.to_thread(run_commands)
+        return {"id": item_id}
+
+    return app
+
+
+async def _get(app, *paths):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return [await client.get(path) for path in paths]
+
+
+def test_requests_are_labelled_by_route_template_with_db_counts():
+    registry = MetricsRegistry()
+    listener = DBCommandListener(registry)
+    app = _app(registry, listener)
+
+    first, second, missing = asyncio.run(_get(app, "/api/items/a", "/api/items/b", "/nope"))
+
+    assert first.status_code == 200
+    assert 'db;dur=6.0;desc="3 commands"' in first.headers["server-timing"]
+    assert missing.status_code == 404
+
+    text = registry.render()
+    assert 'http_requests_total{method="GET",route="/api/items/{item_id}",status="200"} 2' in text
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"} 1' in text
+    assert 'http_request_db_commands_bucket{method="GET",route="/api/items/{item_id}",le="3.0"} 2' in text
+    assert 'http_request_db_commands_bucket{method="GET",route="/api/items/{item_id}",le="2.0"} 0' in text
+    assert 'mongodb_commands_total{command="find",outcome="ok"} 4' in text
+
+
+def test_commands_outside_a_request_only_count_globally():
+    registry = MetricsRegistry()
+    listener = DBCommandListener(registry)
+
+    listener.failed(SimpleNamespace(command_name="insert", duration_micros=500))
+
+    assert 'mongodb_commands_total{command="insert",outcome="error"} 1' in registry.render()
+    assert registry.requests == {}
+
+
+def test_query_shape_redacts_values():
+    command = {
+        "find": "customers",
+        "filter": {"branch_id": "b-1", "customer_id": {"$in": ["a", "b", "c"]}},
+        "sort": {"created_at": -1},
+        "lsid": {"id": "x"},
+    }
+
+    assert query_shape("find", command) == {
+        "collection": "customers",
+        "filter": {"branch_id": "?", "customer_id": {"$in": ["?"]}},
+        "sort": {"created_at": "?"},
+    }
+
+
+def test_slow_commands_are_logged_with_shape(capsys):
+    listener = DBCommandListener(MetricsRegistry(), slow_query_ms=10)
+
+    for request_id, micros in ((1, 2000), (2, 50000)):
+        event = SimpleNamespace(
+            command_name="find", connection_id=("db", 27017), request_id=request_id,
+            command={"find": "orders", "filter": {"guardian_id": "g-1"}}, duration_micros=micros,
+        )
+        listener.started(event)
+        listener.succeeded(event)
+
+    lines = capsys.readouterr().out.strip().splitlines()
+    assert lines == ['Slow query: 50.0ms find route=background shape={"collection": "orders", "filter": {"guardian_id": "?"}}']
+    assert listener._shapes == {}
+
+
+def test_pool_listener_tracks_checkouts_and_exhaustion():
+    registry = MetricsRegistry()
+    listener = DBPoolListener(registry)
+    event = SimpleNamespace(options={"maxPoolSize": 2}, reason="timeout")
+
+    listener.pool_created(event)
+    for _ in range(3):
+        listener.connection_check_out_started(event)
+    for _ in range(2):
+        listener.connection_created(event)
+        listener.connection_checked_out(event)
+    listener.connection_check_out_failed(event)
+    listener.connection_checked_in(event)
+
+    assert registry.pool == {
+        "max_size": 2, "open": 2, "checked_out": 1, "checked_out_peak": 2, "waiting": 0, "checkouts": 2,
+    }
+    text = registry.render()
+    assert 'mongodb_pool_connections{state="checked_out_peak"} 2' in text
+    assert 'mongodb_pool_checkout_failures_total{reason="timeout"} 1' in text
+
+
+def test_dev_flags_are_read_when_the_app_starts_not_at_import(monkeypatch):
+    monkeypatch.delenv("DEV_MODE", raising=False)
+    monkeypatch.delenv("SLOW_QUERY_LOG", raising=False)
+    assert MetricsMiddleware(None).server_timing is False
+    assert slow_query_threshold_ms() is None
+
+    # As if loaded from backend/.env after middleware.metrics was imported
+    monkeypatch.setenv("DEV_MODE", "true")
+    monkeypatch.setenv("SLOW_QUERY_MS", "40")
+    assert MetricsMiddleware(None).server_timing is True
+    assert slow_query_threshold_ms() == 40.0
+
+
+def test_metrics_need_the_scrape_token_or_an_admin(monkeypatch):
+    from fastapi import Depends
+    from middleware.auth import create_token, require_metrics_access
+
+    monkeypatch.setenv("METRICS_TOKEN", "scrape-secret")
+    app = FastAPI()
+
+    @app.get("/api/metrics", dependencies=[Depends(require_metrics_access)])
+    async def metrics():
+        return "ok"
+
+    async def get(token=None):
+        transport = httpx.ASGITransport(app=app)
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return (await client.get("/api/metrics", headers=headers)).status_code
+
+    assert asyncio.run(get()) == 401
+    assert asyncio.run(get("wrong")) == 401
+    assert asyncio.run(get(create_token("u-1", "staff@x.com", "STAFF"))) == 403
+    assert asyncio.run(get(create_token("u-2", "admin@x.com", "ADMIN"))) == 200
+    assert asyncio.run(get("scrape-secret")) == 200
@@ -0,0 +1,102 @@
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fakes import FakeDB
+from migrations.runner import Migration, MigrationRunner, discover
+
+
+def _backfill(fail_after=None):
+    async def up(ctx):
+        async def apply(batch):
+            if fail_after is not None and batch[0]["_id"] >= fail_after:
+                raise RuntimeError("connection reset")
+            for doc in ctx.db.items.docs:
+                if any(doc["_id"] == b["_id"] for b in batch):
+                    doc["done"] = True
+
+        await ctx.backfill("items", {}, apply)
+    return up
+
+
+def _runner(*migrations, batch_size=10):
+    return MigrationRunner(list(migrations), batch_size=batch_size)
+
+
+def test_applies_pending_migrations_once_in_order():
+    db = FakeDB()
+    calls = []
+
+    async def record(ctx):
+        calls.append(ctx.migration.version)
+
+    runner = _runner(Migration("0001", "first", record), Migration("0002", "second", record))
+
+    assert asyncio.run(runner.up(db, log=lambda _: None)) == ["0001", "0002"]
+    assert asyncio.run(runner.up(db, log=lambda _: None)) == []
+    assert calls == ["0001", "0002"]
+    assert {m["_id"]: m["state"] for m in db.migrations.docs} == {"0001": "applied", "0002": "applied"}
+    assert db.job_leases.docs == []
+
+
+def test_interrupted_backfill_resumes_from_checkpoint():
+    db = FakeDB(items=[{"_id": i, "done": False} for i in range(35)])
+    log = []
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(_runner(Migration("0001", "backfill", _backfill(fail_after=20))).up(db, log=log.append))
+    record = db.migrations.docs[0]
+    assert record["state"] == "failed"
+    assert record["checkpoint"] == 19 and record["processed"] == 20
+
+    # The retry only sees what is left
+    asyncio.run(_runner(Migration("0001", "backfill", _backfill())).up(db, log=log.append))
+    assert db.migrations.docs[0]["state"] == "applied"
+    assert db.migrations.docs[0]["processed"] == 35
+    assert all(doc["done"] for doc in db.items.docs)
+    assert "Resuming 0001_backfill after 20 documents" in log
+
+
+def test_startup_skips_when_another_replica_holds_the_lock():
+    db = FakeDB()
+    expires = (datetime.now(timezone.utc) + timedelta(minutes=5)).isoformat()
+    db.job_leases.docs.append({"_id": "migrations", "owner": "other-replica", "expires_at": expires})
+
+    async def noop(ctx):
+        pass
+
+    runner = _runner(Migration("0001", "indexes", noop, run_on_startup=True))
+    assert asyncio.run(runner.up(db, startup=True, log=lambda _: None)) == []
+    with pytest.raises(RuntimeError):
+        asyncio.run(runner.up(db, log=lambda _: None))
+
+
+def test_startup_applies_every_startup_migration_past_a_pending_backfill():
+    db = FakeDB()
+    db.migrations.docs.append({"_id": "0001", "state": "applied"})
+    log = []
+
+    async def noop(ctx):
+        pass
+
+    runner = _runner(
+        Migration("0001", "indexes", noop, run_on_startup=True),
+        Migration("0002", "backfill", noop),
+        Migration("0003", "more_indexes", noop, run_on_startup=True),
+    )
+
+    assert asyncio.run(runner.up(db, startup=True, log=log.append)) == ["0003"]
+    assert any("0002_backfill is pending" in line for line in log)
+    assert asyncio.run(runner.up(db, log=log.append)) == ["0002"]
+
+
+def test_discovers_numbered_migrations():
+    versions = [m.version for m in discover()]
+    assert versions == sorted(versions)
+    assert versions[:2] == ["0001", "0002"]
+    assert discover()[0].run_on_startup
@@ -0,0 +1,73 @@
+import asyncio
+import inspect
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi import HTTPException, Response
+
+from fakes import FakeCollection
+from routers import children, daily_reports, households, learning, users
+from utils.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, paginate
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("2026-10-19T08:00:00+00:00", "cust-7")
+    assert decode_cursor(cursor) == ("2026-10-19T08:00:00+00:00", "cust-7")
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor")
+    assert exc.value.status_code == 400
+
+
+def test_pages_walk_all_documents_once_with_timestamp_ties():
+    # Ten documents sharing three timestamps so the id tiebreak matters
+    docs = [
+        {"customer_id": f"cust-{i:02d}", "created_at": f"2026-10-1{i % 3}T00:00:00", "branch_id": "b1"}
+        for i in range(10)
+    ]
+    docs.append({"customer_id": "other", "created_at": "2026-10-19T00:00:00", "branch_id": "b2"})
+    collection = FakeCollection("customers", docs)
+
+    async def walk():
+        seen, cursor = [], None
+        while True:
+            response = Response()
+            page = await paginate(
+                collection, {"branch_id": "b1"}, sort_field="created_at", id_field="customer_id",
+                limit=4, cursor=cursor, response=response,
+            )
+            seen.extend(doc["customer_id"] for doc in page)
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if not cursor:
+                return seen
+
+    seen = asyncio.run(walk())
+    assert len(seen) == 10
+    assert set(seen) == {f"cust-{i:02d}" for i in range(10)}
+
+
+def test_list_endpoints_keep_their_previous_page_sizes_by_default():
+    defaults = {
+        users.list_users: 100,
+        households.list_households: 200,
+        children.list_children: 100,
+        daily_reports.list_reports: 100,
+        daily_reports.get_child_reports: 100,
+        learning.list_observations: 200,
+        learning.get_child_observations: 200,
+    }
+    for endpoint, expected in defaults.items():
+        assert inspect.signature(endpoint).parameters["limit"].default == expected
+
+
+def test_page_size_is_capped_and_the_rest_follows_the_cursor():
+    response = Response()
+    page = asyncio.run(paginate(
+        FakeCollection("orders", [{"order_id": f"o-{i:03d}", "created_at": i} for i in range(450)]),
+        {}, sort_field="created_at", id_field="order_id", limit=400, response=response,
+    ))
+    assert len(page) == 200
+    assert response.headers.get(NEXT_CURSOR_HEADER)
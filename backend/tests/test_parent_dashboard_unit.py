@@ -0,0 +1,55 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from starlette.requests import Request
+
+import routers.parent_portal as parent_portal
+from fakes import FakeDB
+
+
+def _family(guardian_id, child_id):
+    return {
+        "children": [{"child_id": child_id, "guardian_id": guardian_id}],
+        "parent_timeline": [{"id": "feed-1", "guardian_id": guardian_id, "created_at": "2026-10-19T08:00:00"}],
+        "sessions": [{"child_id": child_id, "session_id": "s-1", "checkin_at": "2026-10-18T08:00:00", "state": "CLOSED"}],
+        "subscriptions": [{"child_id": child_id, "status": "ACTIVE"}],
+    }
+
+
+def _db():
+    # Two guardians whose records differ only in ids, so their dashboards have the same content
+    first, second = _family("guardian-1", "child-1"), _family("guardian-2", "child-2")
+    return FakeDB(**{name: first[name] + second[name] for name in first})
+
+
+def _request(etag=None):
+    headers = [(b"if-none-match", etag.encode())] if etag else []
+    return Request({"type": "http", "method": "GET", "path": "/api/parent/dashboard", "headers": headers})
+
+
+def test_dashboard_resolves_children_once_and_serves_304_from_cache(query_counter):
+    parent_portal._dashboard_cache.clear()
+    db = query_counter.wrap(_db())
+    user = {"user_id": "guardian-1", "role": "PARENT"}
+
+    first = asyncio.run(parent_portal.get_parent_dashboard(_request(), user, db))
+    body = json.loads(first.body)
+
+    assert query_counter.calls["children.find"] == 1
+    assert body["feed"][0]["id"] == "feed-1"
+    assert body["payments"]["subscription_status"] == "ACTIVE"
+    assert body["attendance"][0]["status"] == "Present"
+    assert first.headers["ETag"]
+
+    queries_after_first = query_counter.total
+    second = asyncio.run(parent_portal.get_parent_dashboard(_request(first.headers["ETag"]), user, db))
+    assert second.status_code == 304
+    assert query_counter.total == queries_after_first
+
+    other_guardian = asyncio.run(parent_portal.get_parent_dashboard(_request(first.headers["ETag"]), {"user_id": "guardian-2"}, db))
+    assert query_counter.total > queries_after_first
+    assert other_guardian.status_code == 304  # same data, same validator
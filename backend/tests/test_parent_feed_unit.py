@@ -0,0 +1,52 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi import Response
+
+from fakes import FakeDB
+from services.parent_feed import ParentFeedService
+from utils.pagination import NEXT_CURSOR_HEADER
+
+
+def _db():
+    return FakeDB(children=[
+        {"child_id": "child-1", "guardian_id": "guardian-1"},
+        {"child_id": "child-2", "guardian_id": "guardian-1"},
+    ])
+
+
+def _item(n, child_id="child-1"):
+    return {"id": f"report-{n}", "child_id": child_id, "type": "daily_report", "created_at": f"2026-10-19T08:{n:02d}:00"}
+
+
+def test_publish_fans_out_once_per_guardian_and_is_idempotent():
+    db = _db()
+    feed = ParentFeedService(cap=100, trim_every=10)
+
+    assert asyncio.run(feed.publish(db, _item(1), child_id="child-1")) == 1
+    asyncio.run(feed.publish(db, _item(1), child_id="child-1"))
+    asyncio.run(feed.publish(db, _item(2, "child-2"), child_id="child-2"))
+
+    assert [d["id"] for d in db.parent_timeline.docs] == ["report-1", "report-2"]
+    assert all(d["guardian_id"] == "guardian-1" for d in db.parent_timeline.docs)
+    assert asyncio.run(feed.publish(db, _item(3, "unknown"), child_id="unknown")) == 0
+
+
+def test_timeline_is_trimmed_to_cap_and_read_by_pages():
+    db = _db()
+    feed = ParentFeedService(cap=5, trim_every=4)
+    for n in range(12):
+        asyncio.run(feed.publish(db, _item(n), guardian_ids=["guardian-1"]))
+
+    # Trimmed after writes 4, 8 and 12, so only the newest five remain
+    assert sorted(d["id"] for d in db.parent_timeline.docs) == [f"report-{n}" for n in (10, 11, 7, 8, 9)]
+
+    response = Response()
+    first = asyncio.run(feed.read(db, "guardian-1", limit=3, response=response))
+    assert [d["id"] for d in first] == ["report-11", "report-10", "report-9"]
+
+    rest = asyncio.run(feed.read(db, "guardian-1", limit=3, cursor=response.headers[NEXT_CURSOR_HEADER]))
+    assert [d["id"] for d in rest] == ["report-8", "report-7"]
@@ -0,0 +1,133 @@
+import asyncio
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from services.password_service import PasswordService, calibrate_rounds, client_address, hash_rounds
+
+
+def test_hash_and_verify_run_off_the_event_loop():
+    service = PasswordService(rounds="4")
+    loop_thread = threading.get_ident()
+    seen_threads = []
+
+    def spy(fn):
+        def wrapped(*args):
+            seen_threads.append(threading.get_ident())
+            return fn(*args)
+        return wrapped
+
+    async def scenario():
+        import bcrypt
+        original_hashpw, original_checkpw = bcrypt.hashpw, bcrypt.checkpw
+        bcrypt.hashpw, bcrypt.checkpw = spy(original_hashpw), spy(original_checkpw)
+        try:
+            hashed = await service.hash("secret")
+            return hashed, await service.verify("secret", hashed), await service.verify("wrong", hashed)
+        finally:
+            bcrypt.hashpw, bcrypt.checkpw = original_hashpw, original_checkpw
+
+    hashed, ok, bad = asyncio.run(scenario())
+    service.shutdown()
+
+    assert (ok, bad) == (True, False)
+    assert hash_rounds(hashed) == 4
+    assert seen_threads and loop_thread not in seen_threads
+
+
+def test_malformed_hash_fails_verification():
+    service = PasswordService(rounds="4")
+    assert asyncio.run(service.verify("secret", "not-a-bcrypt-hash")) is False
+    service.shutdown()
+
+
+def test_rehash_only_raises_the_cost():
+    service = PasswordService(rounds="12")
+
+    async def scenario():
+        return [await service.needs_rehash(h) for h in (
+            "$2b$10$" + "a" * 53, "$2b$12$" + "a" * 53, "$2b$14$" + "a" * 53, "not-a-bcrypt-hash",
+        )]
+
+    assert asyncio.run(scenario()) == [True, False, False, False]
+    service.shutdown()
+    assert 10 <= calibrate_rounds(target_ms=1) <= 15
+
+
+def test_auto_rounds_are_calibrated_on_the_pool_at_startup(monkeypatch):
+    import services.password_service as module
+    service = PasswordService(rounds="auto")
+    calibrated_on = []
+    monkeypatch.setattr(module, "calibrate_rounds", lambda: calibrated_on.append(threading.get_ident()) or 11)
+
+    asyncio.run(service.startup())
+    asyncio.run(service.startup())
+    service.shutdown()
+
+    assert len(calibrated_on) == 1 and calibrated_on[0] != threading.get_ident()
+    assert asyncio.run(service.rounds()) == 11
+
+
+def test_login_limit_per_ip_and_email():
+    service = PasswordService(rounds="4", per_ip=2, per_email=1)
+
+    async def scenario():
+        async with service.limit("10.0.0.1", "a@x.com"):
+            with pytest.raises(HTTPException) as same_email:
+                async with service.limit("10.0.0.2", "a@x.com"):
+                    pass
+            async with service.limit("10.0.0.1", "b@x.com"):
+                with pytest.raises(HTTPException) as same_ip:
+                    async with service.limit("10.0.0.1", "c@x.com"):
+                        pass
+                # Other addresses are unaffected
+                async with service.limit("10.0.0.3", "c@x.com"):
+                    pass
+        return same_email.value, same_ip.value
+
+    same_email, same_ip = asyncio.run(scenario())
+
+    assert same_email.status_code == same_ip.status_code == 429
+    assert same_ip.headers["Retry-After"] == "1"
+    assert service._in_flight == {}
+
+
+def request(forwarded=None):
+    headers = {"x-forwarded-for": forwarded} if forwarded else {}
+    return SimpleNamespace(client=SimpleNamespace(host="10.8.0.1"), headers=headers)
+
+
+def test_client_address_uses_the_entry_our_proxy_appended():
+    # A forged leftmost entry is ignored; the load balancer appended the real peer
+    assert client_address(request("1.2.3.4, 203.0.113.7"), trusted_hops=1) == "203.0.113.7"
+    assert client_address(request("1.2.3.4, 203.0.113.7, 10.1.0.5"), trusted_hops=2) == "203.0.113.7"
+    assert client_address(request(), trusted_hops=1) == "10.8.0.1"
+    # Fewer entries than trusted proxies: the header never passed through all of them
+    assert client_address(request("1.2.3.4"), trusted_hops=2) == "10.8.0.1"
+    assert client_address(request("203.0.113.7"), trusted_hops=0) == "10.8.0.1"
+
+
+def test_forged_forwarded_header_without_a_proxy_still_hits_the_ip_cap():
+    service = PasswordService(rounds="4", per_ip=1, per_email=5)
+
+    async def scenario():
+        async with service.limit(client_address(request("1.1.1.1")), "a@x.com"):
+            with pytest.raises(HTTPException) as rotated:
+                async with service.limit(client_address(request("2.2.2.2")), "b@x.com"):
+                    pass
+        return rotated.value
+
+    assert asyncio.run(scenario()).status_code == 429
+
+
+def test_pending_cap_rejects_with_429():
+    service = PasswordService(rounds="4", max_pending=0)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(service.hash("secret"))
+    assert exc.value.status_code == 429
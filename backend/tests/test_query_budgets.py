@@ -0,0 +1,133 @@
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fakes import FakeDB
+from routers.checkin import list_active_sessions, list_session_history
+from routers.orders import list_orders
+from routers.sessions import get_active_sessions, list_sessions
+
+ADMIN = {"user_id": "admin-1", "role": "ADMIN", "branch_id": "branch-1"}
+ROWS = 25
+NOW = datetime.now(timezone.utc)
+
+
+def _iso(minutes):
+    return (NOW + timedelta(minutes=minutes)).isoformat()
+
+
+def _checkin_db():
+    return FakeDB(
+        checkin_sessions=[
+            {
+                "session_id": f"cs-{i}", "customer_id": f"cust-{i}", "card_number": f"C{i}",
+                "branch_id": "branch-1", "check_in_time": _iso(-i), "payment_type": "HOURLY",
+                "status": "CHECKED_IN",
+            }
+            for i in range(ROWS)
+        ],
+        customers=[
+            {"customer_id": f"cust-{i}", "child_name": f"Child {i}", "guardian": {"name": f"G{i}", "phone": "0500"}}
+            for i in range(ROWS)
+        ],
+        wristbands=[{"id": f"wb-{i}", "session_id": f"cs-{i}", "status": "active"} for i in range(0, ROWS, 2)],
+    )
+
+
+def _session_docs():
+    return [
+        {
+            "session_id": f"s-{i}", "child_id": f"child-{i}", "guardian_id": f"g-{i % 5}",
+            "area": "DAYCARE", "session_type": "WALK_IN", "state": "ACTIVE", "branchId": "branch-1",
+            "created_at": _iso(-60 - i), "checkin_at": _iso(-60 - i), "started_at": _iso(-60 - i),
+            "planned_end_at": _iso(30 - 2 * i), "included_minutes": 90,
+        }
+        for i in range(ROWS)
+    ]
+
+
+def _people():
+    return {
+        "children": [{"child_id": f"child-{i}", "full_name": f"Child {i}"} for i in range(ROWS)],
+        "users": [{"user_id": f"g-{i}", "display_name": f"Guardian {i}", "phone": "0500"} for i in range(5)],
+    }
+
+
+@pytest.mark.query_budget(4)
+def test_checkin_active_board(query_counter):
+    db = query_counter.wrap(_checkin_db())
+
+    result = asyncio.run(list_active_sessions(branch_id=None, user=ADMIN, db=db))
+
+    assert len(result) == ROWS
+    assert result[0].child_name == "Child 0"
+    assert result[0].wristband_status == "active"
+    assert result[1].wristband_status == "not_assigned"
+
+
+@pytest.mark.query_budget(2)
+def test_checkin_history(query_counter):
+    db = query_counter.wrap(_checkin_db())
+
+    result = asyncio.run(list_session_history(
+        branch_id=None, customer_id=None, date_from=None, limit=20, cursor=None, response=None, user=ADMIN, db=db,
+    ))
+
+    assert len(result) == 20
+    assert all(entry.guardian_name for entry in result)
+
+
+@pytest.mark.query_budget(3)
+def test_sessions_list(query_counter):
+    db = query_counter.wrap(FakeDB(sessions=_session_docs(), **_people()))
+
+    result = asyncio.run(list_sessions(
+        state=None, child_id=None, guardian_id=None, active_only=False,
+        limit=20, cursor=None, response=None, user=ADMIN, db=db,
+    ))
+
+    assert len(result) == 20
+    assert all(s.child_name and s.guardian_name for s in result)
+
+
+@pytest.mark.query_budget(5)
+def test_sessions_active_board_marks_overdue_in_one_write(query_counter):
+    fake = FakeDB(
+        sessions=_session_docs(),
+        pricing_rules=[{"branchId": "branch-1", "baseDurationMinutes": 60, "basePrice": 50, "extraMinutePrice": 1}],
+        **_people(),
+    )
+    db = query_counter.wrap(fake)
+
+    result = asyncio.run(get_active_sessions(user=ADMIN, db=db))
+
+    assert len(result) == ROWS
+    overdue = [s.session_id for s in result if s.state == "OVERDUE"]
+    assert overdue
+    assert sorted(d["session_id"] for d in fake.sessions.docs if d["state"] == "OVERDUE") == sorted(overdue)
+    assert query_counter.calls["sessions.update_many"] == 1
+
+
+@pytest.mark.query_budget(3)
+def test_orders_list(query_counter):
+    orders = [
+        {
+            "order_id": f"o-{i}", "order_number": f"N{i}", "guardian_id": f"g-{i % 5}", "child_id": f"child-{i}",
+            "items": [], "subtotal": 10, "tax_amount": 1.5, "tax_rate": 0.15, "total_amount": 11.5,
+            "status": "PAID", "created_at": _iso(-i),
+        }
+        for i in range(ROWS)
+    ]
+    db = query_counter.wrap(FakeDB(orders=orders, **_people()))
+
+    result = asyncio.run(list_orders(
+        guardian_id=None, status_filter=None, limit=20, cursor=None, response=None, user=ADMIN, db=db,
+    ))
+
+    assert len(result) == 20
+    assert all(o.guardian_name and o.child_name for o in result)
@@ -0,0 +1,115 @@
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import services.gemini_service as gemini_service
+from fakes import FakeDB
+from routers.daily_reports import DailyReportBatchCreate, DailyReportCreate, create_daily_reports_batch
+from services.llm_service import LLMService, StubProvider
+from services.report_jobs import PENDING_DESCRIPTION, RateLimiter, ReportJobService
+
+TEACHER = {"user_id": "t-1", "role": "STAFF", "display_name": "Teacher"}
+
+
+def _db():
+    return FakeDB(
+        children=[{"child_id": f"c-{i}", "full_name": f"Child {i}", "guardian_id": f"g-{i}"} for i in range(3)],
+        sessions=[{"child_id": "c-1", "session_id": "s-1", "state": "ACTIVE", "checkin_at": "2026-10-19T08:00:00"}],
+    )
+
+
+class FlakyProvider(StubProvider):
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    async def complete(self, kind, system_prompt, prompt):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("upstream 503")
+        return await super().complete(kind, system_prompt, prompt)
+
+
+def _queue_batch(db):
+    body = DailyReportBatchCreate(reports=[
+        DailyReportCreate(child_id=f"c-{i}", notes=f"Built a tower {i}") for i in range(3)
+    ])
+    return asyncio.run(create_daily_reports_batch(body, user=TEACHER, db=db))
+
+
+def test_batch_publishes_every_report_to_the_feed_in_one_write(query_counter):
+    db = query_counter.wrap(_db())
+
+    _queue_batch(db)
+
+    assert query_counter.calls["parent_timeline.bulk_write"] == 1
+
+
+def test_batch_returns_pending_reports_and_workers_fill_them_in(monkeypatch):
+    monkeypatch.setattr(gemini_service, "llmService", LLMService(provider=StubProvider()))
+    db = _db()
+
+    reports = _queue_batch(db)
+
+    assert [r["status"] for r in reports] == ["PENDING"] * 3
+    # Screens that render the text before polling show a placeholder, not nothing
+    assert all(r["report_ar"] == PENDING_DESCRIPTION and r["report_en"] for r in reports)
+    assert [r["child_name"] for r in reports] == ["Child 0", "Child 1", "Child 2"]
+    assert reports[1]["session_id"] == "s-1"
+    assert {item["status"] for item in db.parent_timeline.docs} == {"PENDING"}
+    assert sorted(item["guardian_id"] for item in db.parent_timeline.docs) == ["g-0", "g-1", "g-2"]
+
+    jobs = ReportJobService(rate_per_minute=0)
+    assert asyncio.run(jobs.run_pending(db)) == 3
+
+    stored = {r["report_id"]: r for r in db.daily_reports.docs}
+    for report in reports:
+        done = stored[report["report_id"]]
+        assert done["status"] == "READY"
+        assert done["report_en"].startswith("[stub] Child name: Child")
+        assert "claimed_by" not in done
+    assert {item["status"] for item in db.parent_timeline.docs} == {"READY"}
+    assert all(item["description"].startswith("[stub]") for item in db.parent_timeline.docs)
+
+
+def test_failed_generation_is_retried_then_falls_back(monkeypatch):
+    monkeypatch.setattr(gemini_service, "llmService", LLMService(provider=FlakyProvider(failures=10)))
+    db = _db()
+    _queue_batch(db)
+    jobs = ReportJobService(rate_per_minute=0, max_attempts=2, retry_seconds=0)
+
+    async def drain():
+        # Retry backoff is zero, so everything is claimable again straight away
+        while await jobs.run_pending(db):
+            pass
+
+    asyncio.run(drain())
+
+    assert jobs.retried == 3
+    assert jobs.failed == 3
+    assert all(r["status"] == "FAILED" and r["attempts"] == 2 for r in db.daily_reports.docs)
+    assert db.daily_reports.docs[0]["report_en"] == "Daily report for Child 0: Built a tower 0"
+
+
+def test_rate_limiter_spaces_calls():
+    clock = SimpleNamespace(now=100.0)
+    limiter = RateLimiter(rate_per_minute=120, clock=lambda: clock.now)
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+
+    async def scenario():
+        original = asyncio.sleep
+        asyncio.sleep = fake_sleep
+        try:
+            for _ in range(3):
+                await limiter.acquire()
+        finally:
+            asyncio.sleep = original
+
+    asyncio.run(scenario())
+    assert slept == [0.5, 1.0]
@@ -0,0 +1,150 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi import HTTPException
+
+from fakes import FakeDB
+from services.customer_cache import CustomerCardCache
+from services.scan_queue import ScanQueueService
+
+
+def _queue_without_warmup():
+    queue = ScanQueueService(card_cache=CustomerCardCache(ttl_seconds=60))
+    queue._warmed = True
+    return queue
+
+
+def test_provisional_checkin_uses_cached_card_and_session():
+    queue = _queue_without_warmup()
+    assert queue.provisional_checkin("CARD-1")["status"] == "PENDING_LOOKUP"
+
+    queue._cards.store({"customer_id": "cust-1", "card_number": "CARD-1", "waiver_accepted": False})
+    assert queue.provisional_checkin("CARD-1")["status"] == "PENDING_LOOKUP"
+
+    queue._cards.store({"customer_id": "cust-1", "card_number": "CARD-1", "waiver_accepted": True})
+    assert queue.provisional_checkin("CARD-1")["status"] == "CHECKED_IN"
+
+    queue.remember_active_session("cust-1", "sess-1")
+    provisional = queue.provisional_checkin("CARD-1")
+    assert provisional["status"] == "ALREADY_CHECKED_IN"
+    assert provisional["session_id"] == "sess-1"
+
+    queue.forget_active_session("cust-1")
+    assert queue.provisional_checkin("CARD-1")["status"] == "CHECKED_IN"
+
+
+def test_provisional_wristband_by_code():
+    queue = _queue_without_warmup()
+    queue.remember_wristband({"id": "wb-1", "code": "wb-abc", "session_id": "sess-1", "status": "issued"})
+    assert queue.provisional_wristband(None, " WB-ABC ")["status"] == "ACTIVATED"
+
+    queue.remember_wristband({"id": "wb-1", "code": "WB-ABC", "session_id": "sess-1", "status": "active"})
+    assert queue.provisional_wristband("wb-1", None)["status"] == "REJECTED"
+    assert queue.provisional_wristband("wb-unknown", None)["status"] == "PENDING_LOOKUP"
+
+
+def test_scans_commit_in_order_and_failures_are_recorded():
+    async def scenario():
+        queue = _queue_without_warmup()
+        db = FakeDB()
+        committed = []
+
+        async def commit(_db, payload, _user):
+            await asyncio.sleep(0.001 * (3 - payload["n"]))
+            if payload["n"] == 1:
+                raise HTTPException(status_code=400, detail="الطفل مسجل دخول بالفعل")
+            committed.append(payload["n"])
+            return {"n": payload["n"]}
+
+        tickets = []
+        for n in range(3):
+            tickets.append(await queue.submit(
+                db, "CHECKIN", {"n": n}, {"user_id": "staff-1"},
+                provisional={"status": "CHECKED_IN"}, commit=commit,
+            ))
+
+        assert all(t["status"] == "QUEUED" for t in tickets)
+        # Acknowledged without a round trip; the journal records them right after
+        assert db.scan_queue.docs == []
+        await queue._journal.join()
+        assert [doc["status"] for doc in db.scan_queue.docs] == ["QUEUED"] * 3
+        await queue.drain()
+        return queue, db, committed, tickets
+
+    queue, db, committed, tickets = asyncio.run(scenario())
+
+    assert committed == [0, 2]
+    assert [doc["status"] for doc in db.scan_queue.docs] == ["COMMITTED", "FAILED", "COMMITTED"]
+    failed = queue.get_recent(tickets[1]["scan_id"])
+    assert failed["error_status_code"] == 400
+    assert failed["provisional_status"] == "CHECKED_IN"
+
+
+def test_outcome_is_recorded_when_the_queued_journal_write_fails():
+    async def scenario():
+        queue = _queue_without_warmup()
+        db = FakeDB()
+
+        async def unreachable(docs, ordered=True):
+            raise ConnectionError("primary stepped down")
+
+        db.scan_queue.insert_many = unreachable
+
+        async def commit(_db, payload, _user):
+            return {"ok": True}
+
+        ticket = await queue.submit(db, "CHECKIN", {}, {"user_id": "staff-1"},
+                                    provisional={"status": "CHECKED_IN"}, commit=commit)
+        await queue.drain()
+        return ticket, db
+
+    ticket, db = asyncio.run(scenario())
+
+    assert ticket["status"] == "QUEUED"
+    [doc] = db.scan_queue.docs
+    assert doc["scan_id"] == ticket["scan_id"]
+    assert doc["status"] == "COMMITTED"
+    assert doc["accepted_at"] == ticket["accepted_at"]
+
+
+def test_cancelled_drain_records_uncommitted_scans_as_failed():
+    async def scenario():
+        queue = _queue_without_warmup()
+        db = FakeDB()
+
+        async def hanging_commit(_db, payload, _user):
+            await asyncio.Event().wait()
+
+        tickets = [
+            await queue.submit(db, "CHECKIN", {"n": n}, {"user_id": "staff-1"},
+                               provisional={"status": "CHECKED_IN"}, commit=hanging_commit)
+            for n in range(2)
+        ]
+        drain = asyncio.create_task(queue.drain(timeout=60))
+        await asyncio.sleep(0.01)
+        drain.cancel()
+        try:
+            await drain
+        except asyncio.CancelledError:
+            pass
+        return queue, db, tickets
+
+    queue, db, tickets = asyncio.run(scenario())
+
+    by_id = {doc["scan_id"]: doc for doc in db.scan_queue.docs}
+    assert sorted(by_id) == sorted(t["scan_id"] for t in tickets)
+    # Neither scan is left looking like it is still on its way
+    assert {doc["status"] for doc in by_id.values()} == {"FAILED"}
+    assert all(doc["error_status_code"] == 503 for doc in by_id.values())
+    assert queue._unsettled == {}
+
+
+def test_reconciliation_includes_abandoned_queued_scans():
+    query = _queue_without_warmup().needs_attention_query()
+
+    assert {"status": "FAILED"} in query["$or"]
+    stale = next(q for q in query["$or"] if q["status"] == "QUEUED")
+    assert "$lt" in stale["accepted_at"]
@@ -0,0 +1,58 @@
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fakes import FakeDB
+from services.subscription_jobs import expire_subscriptions, send_renewal_reminders
+
+NOW = datetime(2026, 10, 19, 8, 0, tzinfo=timezone.utc)
+
+
+def _iso(days):
+    return (NOW + timedelta(days=days)).isoformat()
+
+
+def _subscriptions():
+    return [
+        {"subscription_id": "s-expired", "guardian_id": "g-1", "status": "ACTIVE", "expires_at": _iso(-1)},
+        {"subscription_id": "s-soon-1", "guardian_id": "g-1", "status": "ACTIVE", "expires_at": _iso(1)},
+        {"subscription_id": "s-soon-2", "guardian_id": "g-2", "status": "ACTIVE", "expires_at": _iso(2)},
+        {"subscription_id": "s-later", "guardian_id": "g-3", "status": "ACTIVE", "expires_at": _iso(20)},
+    ]
+
+
+def test_expiry_dry_run_counts_then_flips_with_one_update():
+    db = FakeDB(subscriptions=_subscriptions())
+
+    dry = asyncio.run(expire_subscriptions(db, now=NOW, dry_run=True))
+    assert (dry["matched"], dry["modified"]) == (1, 0)
+    assert db.subscriptions.docs[0]["status"] == "ACTIVE"
+
+    run = asyncio.run(expire_subscriptions(db, now=NOW))
+    assert run["modified"] == 1
+    assert db.subscriptions.docs[0]["status"] == "EXPIRED"
+    assert "duration_ms" in run
+
+
+def test_reminders_are_batched_and_sent_once_per_term():
+    db = FakeDB(subscriptions=_subscriptions())
+
+    dry = asyncio.run(send_renewal_reminders(db, days=3, now=NOW, dry_run=True, batch_size=1))
+    assert (dry["matched"], dry["sent"]) == (2, 0)
+    assert db.notification_logs.docs == []
+
+    run = asyncio.run(send_renewal_reminders(db, days=3, now=NOW, batch_size=1))
+    assert run["sent"] == 2
+    assert sorted(log["recipient_user_id"] for log in db.notification_logs.docs) == ["g-1", "g-2"]
+    assert all(log["action"] == "RENEWAL_REMINDER" for log in db.notification_logs.docs)
+
+    again = asyncio.run(send_renewal_reminders(db, days=3, now=NOW))
+    assert again["sent"] == 0
+
+    # Renewal moves expires_at, which re-arms the reminder for the new term
+    db.subscriptions.docs[1]["expires_at"] = _iso(2.5)
+    renewed = asyncio.run(send_renewal_reminders(db, days=3, now=NOW))
+    assert renewed["sent"] == 1
@@ -0,0 +1,59 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fakes import FakeDB
+from services.user_directory import UserDirectory
+from utils.indexes import index_specs
+
+
+PARENT = {"user_id": "user-1", "email": "sara@example.com", "phone": "+962790000001"}
+
+
+def test_guardian_lookups_are_cached_by_email_then_phone(query_counter):
+    db = query_counter.wrap(FakeDB(users=[PARENT]))
+    directory = UserDirectory(ttl_seconds=60)
+
+    by_email = {"email": "sara@example.com", "phone": "+962790000001"}
+    by_phone = {"name": "Sara", "phone": "+962790000001"}
+    for _ in range(3):
+        assert asyncio.run(directory.resolve_guardian_id(db, by_email)) == "user-1"
+        assert asyncio.run(directory.resolve_guardian_id(db, by_phone)) == "user-1"
+
+    assert query_counter.calls == {"users.find_one": 2}
+    assert asyncio.run(directory.resolve_guardian_id(db, {})) is None
+    assert query_counter.total == 2
+
+
+def test_phone_fields_are_tried_in_order():
+    db = FakeDB(users=[PARENT])
+    directory = UserDirectory(ttl_seconds=60)
+    guardian = {"whatsapp": "+962790000001", "phone": "+962790000009"}
+
+    assert asyncio.run(directory.resolve_guardian_id(db, guardian, phone_fields=("whatsapp", "phone"))) == "user-1"
+    assert asyncio.run(directory.resolve_guardian_id(db, guardian)) is None
+
+
+def test_registration_invalidates_a_cached_miss(query_counter):
+    db = FakeDB()
+    counted = query_counter.wrap(db)
+    directory = UserDirectory(ttl_seconds=60, miss_ttl_seconds=60)
+    guardian = {"email": "sara@example.com"}
+
+    assert asyncio.run(directory.resolve_guardian_id(counted, guardian)) is None
+    assert asyncio.run(directory.resolve_guardian_id(counted, guardian)) is None
+    assert query_counter.total == 1
+
+    db.users.docs.append(PARENT)
+    directory.invalidate(PARENT)
+    assert asyncio.run(directory.resolve_guardian_id(counted, guardian)) == "user-1"
+
+
+def test_users_are_indexed_for_contact_and_listing_queries():
+    keys = [list(model.document["key"].keys()) for model in index_specs()["users"]]
+
+    assert ["email"] in keys and ["phone"] in keys
+    assert ["role", "created_at", "user_id"] in keys
+    assert ["branch_id", "created_at", "user_id"] in keys
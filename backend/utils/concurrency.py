@@ -0,0 +1,30 @@
+import asyncio
+from typing import Any, Awaitable, Optional
+
+
+async def gather_lookups(*lookups: Optional[Awaitable[Any]]) -> list:
+    """
+    Run independent reads concurrently and return their results in order.
+
+    `None` entries are skipped and yield None, so optional lookups can be
+    written inline. If any lookup raises, the others are cancelled and awaited
+    before the original exception propagates unchanged (an HTTPException stays
+    an HTTPException), so no query outlives the request that started it.
+    """
+    tasks = {
+        index: asyncio.ensure_future(lookup)
+        for index, lookup in enumerate(lookups)
+        if lookup is not None
+    }
+    try:
+        done = await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+
+    results = [None] * len(lookups)
+    for index, value in zip(tasks, done):
+        results[index] = value
+    return results
@@ -0,0 +1,67 @@
+import os
+
+from pymongo import ReadPreference
+from pymongo.read_concern import ReadConcern
+from pymongo.read_preferences import SecondaryPreferred
+from pymongo.write_concern import WriteConcern
+
+# Settings are read when a client or profile is built rather than at import, so
+# values from backend/.env apply whichever module happens to import this first.
+DEFAULTS = {
+    # Connection pool sizing, passed straight to AsyncIOMotorClient
+    "MONGO_MAX_POOL_SIZE": "100",
+    "MONGO_MIN_POOL_SIZE": "10",
+    "MONGO_MAX_IDLE_TIME_MS": "300000",
+    "MONGO_WAIT_QUEUE_TIMEOUT_MS": "5000",
+    "FRONTDESK_WRITE_CONCERN": "majority",
+    "FRONTDESK_WRITE_TIMEOUT_MS": "5000",
+    # 0 disables the staleness bound; otherwise MongoDB requires at least 90 seconds
+    "REPORTS_MAX_STALENESS_SECONDS": "120",
+}
+
+
+def _setting(name: str) -> str:
+    return os.environ.get(name, DEFAULTS[name])
+
+
+def client_options() -> dict:
+    return {
+        "maxPoolSize": int(_setting("MONGO_MAX_POOL_SIZE")),
+        "minPoolSize": int(_setting("MONGO_MIN_POOL_SIZE")),
+        "maxIdleTimeMS": int(_setting("MONGO_MAX_IDLE_TIME_MS")),
+        "waitQueueTimeoutMS": int(_setting("MONGO_WAIT_QUEUE_TIMEOUT_MS")),
+    }
+
+
+def _write_concern_w(value: str):
+    return int(value) if value.isdigit() else value
+
+
+def frontdesk_db(database):
+    """
+    Default profile for check-in, POS and every other interactive workload.
+
+    Reads go to the primary so staff always see their own writes, and writes wait
+    for the configured write concern with a bounded timeout.
+    """
+    return database.with_options(
+        read_preference=ReadPreference.PRIMARY,
+        write_concern=WriteConcern(
+            w=_write_concern_w(_setting("FRONTDESK_WRITE_CONCERN")),
+            wtimeout=int(_setting("FRONTDESK_WRITE_TIMEOUT_MS")),
+        ),
+    )
+
+
+def reports_db(database):
+    """
+    Read-only profile for reports and analytics.
+
+    Prefers secondaries (falling back to the primary) so long scans do not
+    compete with the front desk for primary connections, and accepts data up to
+    REPORTS_MAX_STALENESS_SECONDS old.
+    """
+    return database.with_options(
+        read_preference=SecondaryPreferred(max_staleness=int(_setting("REPORTS_MAX_STALENESS_SECONDS")) or -1),
+        read_concern=ReadConcern("local"),
+    )
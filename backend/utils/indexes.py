@@ -0,0 +1,230 @@
+import asyncio
+import os
+
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
+
+AUDIT_ID_FILTER = {"audit_id": {"$exists": True, "$type": "string", "$ne": None}}
+
+
+def skip_index_creation() -> bool:
+    """
+    SKIP_INDEX_CREATION=true when `python -m migrations up` runs as a separate
+    release step, so containers start serving without touching indexes at all.
+
+    Read at startup rather than import so the value may come from backend/.env.
+    """
+    return os.environ.get("SKIP_INDEX_CREATION", "").lower() == "true"
+
+
+def index_specs() -> dict[str, list[IndexModel]]:
+    """
+    Indexes per collection; each list is sent as one createIndexes command.
+
+    Databases that already applied migration 0001 only pick up additions through
+    a new migration (see migrations/versions).
+    """
+    from services.llm_service import LLM_CACHE_TTL_SECONDS
+
+    return {
+        "users": [
+            IndexModel("email", unique=True),
+            IndexModel("user_id", unique=True),
+            IndexModel([("created_at", -1), ("user_id", -1)]),
+            # Guardian resolution by phone; most staff accounts have none
+            IndexModel("phone", partialFilterExpression={"phone": {"$type": "string"}}),
+            # list_users pages by (created_at, user_id) within a role or branch
+            IndexModel([("role", 1), ("created_at", -1), ("user_id", -1)]),
+            IndexModel([("branch_id", 1), ("created_at", -1), ("user_id", -1)]),
+        ],
+        "children": [
+            IndexModel("child_id", unique=True),
+            IndexModel("guardian_id"),
+            IndexModel("household_id"),
+            IndexModel([("guardian_id", 1), ("created_at", -1), ("child_id", -1)]),
+        ],
+        "households": [
+            IndexModel("household_id", unique=True),
+            IndexModel("primary_guardian"),
+            IndexModel([("created_at", -1), ("household_id", -1)]),
+        ],
+        "products": [
+            IndexModel("product_id", unique=True),
+            IndexModel("category"),
+        ],
+        "orders": [
+            IndexModel("order_id", unique=True),
+            IndexModel("order_number", unique=True),
+            IndexModel("guardian_id"),
+            IndexModel([("status", 1), ("created_at", -1)]),
+            IndexModel([("guardian_id", 1), ("created_at", -1), ("order_id", -1)]),
+        ],
+        # Sessions - critical for active session queries
+        "sessions": [
+            IndexModel("session_id", unique=True),
+            IndexModel("child_id"),
+            IndexModel("state"),
+            IndexModel([("state", 1), ("checkin_at", -1)]),
+            IndexModel([("child_id", 1), ("state", 1)]),
+            IndexModel([("guardian_id", 1), ("created_at", -1), ("session_id", -1)]),
+        ],
+        # Check-in sessions (reception operations)
+        "checkin_sessions": [
+            IndexModel("session_id", unique=True),
+            IndexModel([("status", 1), ("branch_id", 1), ("check_in_time", -1)]),
+            IndexModel([("customer_id", 1), ("status", 1)]),
+            IndexModel([("check_out_time", -1), ("status", 1)]),
+            IndexModel([("branch_id", 1), ("check_in_time", -1)]),
+        ],
+        "wristbands": [
+            IndexModel("id", unique=True),
+            IndexModel("code", unique=True),
+            IndexModel([("session_id", 1), ("status", 1)]),
+        ],
+        # Queued front-desk scans (accept-then-process)
+        "scan_queue": [
+            IndexModel("scan_id", unique=True),
+            IndexModel([("status", 1), ("reconciled", 1), ("branch_id", 1), ("accepted_at", -1)]),
+        ],
+        # Domain events
+        "events": [
+            IndexModel("event_id", unique=True),
+            IndexModel([("type", 1), ("created_at", -1)]),
+        ],
+        "event_registrations": [
+            IndexModel([("event_id", 1), ("status", 1)]),
+        ],
+        "subscriptions": [
+            IndexModel("subscription_id", unique=True),
+            IndexModel("child_id"),
+            IndexModel([("child_id", 1), ("status", 1)]),
+            IndexModel([("customer_id", 1), ("status", 1), ("expires_at", 1)]),
+            IndexModel([("status", 1), ("expires_at", 1)]),
+        ],
+        "visit_packs": [
+            IndexModel("pack_id", unique=True),
+            IndexModel("child_id"),
+            IndexModel([("child_id", 1), ("status", 1)]),
+        ],
+        "entitlement_usage": [
+            IndexModel("usage_id", unique=True),
+            IndexModel([("subscription_id", 1), ("usage_date", 1)]),
+        ],
+        "audit_logs": [
+            IndexModel([("entity_type", 1), ("entity_id", 1), ("created_at", -1)]),
+        ],
+        "event_ledger": [
+            IndexModel("id", unique=True),
+            IndexModel([("eventType", 1), ("timestamp", -1)]),
+            IndexModel([("branchId", 1), ("timestamp", -1)]),
+            IndexModel([("actorType", 1), ("actorId", 1), ("timestamp", -1)]),
+            IndexModel([("sessionId", 1), ("timestamp", -1)]),
+            IndexModel([("orderId", 1), ("timestamp", -1)]),
+        ],
+        "payments": [
+            IndexModel("payment_id", unique=True),
+            IndexModel("order_id"),
+        ],
+        "customers": [
+            IndexModel("household_id"),
+            IndexModel([("branch_id", 1), ("created_at", -1), ("customer_id", -1)]),
+            # Type-ahead search keys (anchored prefix scans)
+            IndexModel("search_tokens"),
+            IndexModel("search_phone_rev"),
+            IndexModel("search_card"),
+        ],
+        # Parent timelines (fan-out-on-write feed)
+        "parent_timeline": [
+            IndexModel([("guardian_id", 1), ("id", 1)], unique=True),
+            IndexModel([("guardian_id", 1), ("created_at", -1), ("id", -1)]),
+            IndexModel("id"),
+        ],
+        # Daily Reports (AI-generated)
+        "daily_reports": [
+            IndexModel("report_id", unique=True),
+            IndexModel([("child_id", 1), ("created_at", -1)]),
+            IndexModel([("teacher_id", 1), ("created_at", -1)]),
+            IndexModel([("status", 1), ("next_attempt_at", 1)]),
+            IndexModel([("status", 1), ("claimed_at", 1)]),
+        ],
+        # Generated report / lesson plan cache (keyed by content hash in _id)
+        "llm_cache": [
+            IndexModel("created_at", expireAfterSeconds=int(LLM_CACHE_TTL_SECONDS)),
+        ],
+        # Billing
+        "fee_plans": [
+            IndexModel("plan_id", unique=True),
+            IndexModel([("child_id", 1), ("active", 1)]),
+        ],
+        "invoices": [
+            IndexModel("invoice_id", unique=True),
+            IndexModel([("child_id", 1), ("created_at", -1)]),
+            IndexModel([("guardian_id", 1), ("status", 1)]),
+        ],
+        # Learning & Assessment
+        "lessons": [
+            IndexModel("lesson_id", unique=True),
+            IndexModel([("teacher_id", 1), ("created_at", -1)]),
+        ],
+        "observations": [
+            IndexModel("observation_id", unique=True),
+            IndexModel([("child_id", 1), ("created_at", -1)]),
+            IndexModel([("teacher_id", 1), ("created_at", -1)]),
+        ],
+        "child_progress": [
+            IndexModel([("child_id", 1), ("school_year", -1)]),
+        ],
+    }
+
+
+# Unique indexes that existing data can violate. Each is created on its own so a
+# failure only skips that index (with a warning) instead of the whole collection.
+GUARDED_INDEXES = [
+    # One live booking per customer per event
+    ("event_registrations", IndexModel(
+        [("event_id", 1), ("customer_id", 1)],
+        unique=True,
+        partialFilterExpression={"status": "booked"},
+        name="event_customer_booked_unique",
+    )),
+    # Existing duplicate cards must be cleaned up before the unique index can be built
+    ("customers", IndexModel("card_number", unique=True)),
+]
+
+
+async def _create_guarded(db, collection: str, index: IndexModel) -> None:
+    try:
+        await db[collection].create_indexes([index])
+    except OperationFailure as exc:
+        print(f"Warning: {collection} index {index.document['name']} creation skipped: {exc}")
+
+
+async def ensure_audit_id_index(db) -> None:
+    """Unique only when audit_id exists and is a string; replaces the legacy full unique index."""
+    try:
+        await db.audit_logs.create_index("audit_id", unique=True, partialFilterExpression=AUDIT_ID_FILTER)
+    except OperationFailure as exc:
+        if exc.code in (85, 86):
+            try:
+                await db.audit_logs.drop_index("audit_id_1")
+            except Exception as drop_exc:
+                print(f"Warning: could not drop legacy audit_id index: {drop_exc}")
+            try:
+                await db.audit_logs.create_index("audit_id", unique=True, partialFilterExpression=AUDIT_ID_FILTER)
+            except Exception as recreate_exc:
+                print(f"Warning: could not create partial unique audit_id index: {recreate_exc}")
+        else:
+            print(f"Warning: audit_id index creation skipped: {exc}")
+
+
+async def create_indexes(db) -> None:
+    """
+    Create every index, one createIndexes command per collection, all collections concurrently.
+
+    createIndexes is a no-op for indexes that already exist with the same options,
+    so rerunning it is safe. Applied by migration 0001; the audit_id repair is 0002.
+    """
+    await asyncio.gather(
+        *(db[name].create_indexes(models) for name, models in index_specs().items()),
+        *(_create_guarded(db, name, index) for name, index in GUARDED_INDEXES),
+    )
@@ -0,0 +1,18 @@
+from typing import Iterable, Optional
+
+
+async def fetch_by_ids(collection, field: str, ids: Iterable, projection: Optional[dict] = None) -> dict:
+    """
+    Load the documents whose `field` is in `ids` with one `$in` query.
+
+    Returns {id: document}. List endpoints use this to join related documents
+    for a whole page at once instead of issuing one find_one per row.
+    """
+    ids = list(dict.fromkeys(i for i in ids if i))
+    if not ids:
+        return {}
+    docs = await collection.find(
+        {field: {"$in": ids}},
+        projection if projection is not None else {"_id": 0},
+    ).to_list(len(ids))
+    return {doc[field]: doc for doc in docs}
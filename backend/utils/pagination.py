@@ -0,0 +1,86 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Optional
+
+from fastapi import HTTPException, Response, status
+
+# Endpoints that used to return a fixed 100-200 rows keep that as their default
+# limit; larger lists (the dashboard's 400 recent orders) follow the cursor.
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# List endpoints keep returning plain arrays; the cursor for the next page
+# travels in this header and is absent on the last page.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: Any, doc_id: Any) -> str:
+    if isinstance(sort_value, datetime):
+        sort_value = {"$dt": sort_value.isoformat()}
+    raw = json.dumps([sort_value, doc_id], separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[Any, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, doc_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError, binascii.Error, UnicodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="مؤشر الصفحة غير صالح"  # Invalid page cursor
+        )
+    if isinstance(sort_value, dict) and "$dt" in sort_value:
+        sort_value = datetime.fromisoformat(sort_value["$dt"])
+    return sort_value, doc_id
+
+
+def keyset_filter(sort_field: str, id_field: str, cursor: str, direction: int = -1) -> dict:
+    """Documents strictly after the cursor position in (sort_field, id_field) order."""
+    sort_value, doc_id = decode_cursor(cursor)
+    op = "$lt" if direction < 0 else "$gt"
+    return {"$or": [
+        {sort_field: {op: sort_value}},
+        {sort_field: sort_value, id_field: {op: doc_id}},
+    ]}
+
+
+async def paginate(
+    collection,
+    query: dict,
+    *,
+    sort_field: str,
+    id_field: str,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    direction: int = -1,
+    projection: Optional[dict] = None,
+    response: Optional[Response] = None,
+) -> list[dict]:
+    """
+    Fetch one page ordered by (sort_field, id_field) and set the next-page cursor.
+
+    The id field breaks ties so documents sharing a timestamp are neither skipped
+    nor repeated. Reads limit + 1 documents to know whether another page exists.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if cursor:
+        query = {"$and": [query, keyset_filter(sort_field, id_field, cursor, direction)]} if query else \
+            keyset_filter(sort_field, id_field, cursor, direction)
+
+    docs = await collection.find(query, projection if projection is not None else {"_id": 0}) \
+        .sort([(sort_field, direction), (id_field, direction)]) \
+        .limit(limit + 1) \
+        .to_list(limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        next_cursor = encode_cursor(last.get(sort_field), last.get(id_field))
+
+    if response is not None and next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return docs
@@ -44,6 +44,18 @@ const getBranchId = (entity) => {
   );
 };
 
+// List endpoints return at most 200 rows a page and put the next cursor in X-Next-Cursor
+const getPages = async (url, params, maxRows) => {
+  const rows = [];
+  let cursor;
+  do {
+    const res = await api.get(url, { params: { ...params, limit: Math.min(200, maxRows - rows.length), cursor } });
+    rows.push(...toSafeArray(res.data));
+    cursor = res.headers?.['x-next-cursor'];
+  } while (cursor && rows.length < maxRows);
+  return { data: rows };
+};
+
 const Dashboard = () => {
   const { user } = useAuth();
   const [loading, setLoading] = useState(true);
@@ -78,7 +90,7 @@ const Dashboard = () => {
             { key: 'attendance', label: 'تحليلات الحضور', request: api.get('/analytics/attendance') },
             { key: 'sessions', label: 'تحليلات الجلسات', request: api.get('/analytics/sessions') },
             { key: 'openOrders', label: 'الطلبات المفتوحة', request: api.get('/orders', { params: { status_filter: 'OPEN', limit: 200 } }) },
-            { key: 'paidOrders', label: 'المدفوعات الحديثة', request: api.get('/orders', { params: { status_filter: 'PAID', limit: 400 } }) },
+            { key: 'paidOrders', label: 'المدفوعات الحديثة', request: getPages('/orders', { status_filter: 'PAID' }, 400) },
             { key: 'subscriptions', label: 'الاشتراكات النشطة', request: api.get('/subscriptions', { params: { status_filter: 'ACTIVE' } }) },
             { key: 'activeCheckins', label: 'جلسات الحضور النشطة', request: api.get('/checkin/active') },
             { key: 'dailySummary', label: 'الملخص اليومي', request: api.get('/reports/daily-summary') },
@@ -13,6 +13,10 @@ import {
   Loader2, CheckCircle2, AlertTriangle, Globe
 } from 'lucide-react';
 
+// Reports are generated in the background; POST returns them PENDING
+const GENERATING_STATUSES = ['PENDING', 'GENERATING'];
+const REPORT_POLL_MS = 3000;
+
 const TeacherDailyReport = () => {
   const [childId, setChildId] = useState('');
   const [childName, setChildName] = useState('');
@@ -40,6 +44,10 @@ const TeacherDailyReport = () => {
     }
   }, []);
 
+  const resultPending = GENERATING_STATUSES.includes(result?.status);
+  const resultReportId = result?.report_id;
+
+  // Refetch when a report is created or its job finishes, not on every poll tick
   useEffect(() => {
     if (!childId) return;
     const fetchReports = async () => {
@@ -49,7 +57,21 @@ const TeacherDailyReport = () => {
       } catch { setRecentReports([]); }
     };
     fetchReports();
-  }, [childId, result]);
+  }, [childId, resultReportId, resultPending]);
+
+  useEffect(() => {
+    if (!resultPending || !result?.report_id) return undefined;
+    const timer = setTimeout(async () => {
+      try {
+        const res = await api.get(`/daily-reports/${result.report_id}`);
+        setResult(res.data);
+      } catch {
+        // Keep showing the pending report; the next tick retries
+        setResult((current) => (current ? { ...current } : current));
+      }
+    }, REPORT_POLL_MS);
+    return () => clearTimeout(timer);
+  }, [result, resultPending]);
 
   const handleChildSelect = (child) => {
     setChildId(child.id);
@@ -188,8 +210,22 @@ const TeacherDailyReport = () => {
             <CardHeader className="pb-2">
               <div className="flex items-center justify-between">
                 <CardTitle className="text-base flex items-center gap-2">
-                  <CheckCircle2 className="w-4 h-4 text-emerald-500" />
-                  تم إنشاء التقرير بنجاح
+                  {resultPending ? (
+                    <>
+                      <Loader2 className="w-4 h-4 text-purple-500 animate-spin" />
+                      جاري إعداد التقرير...
+                    </>
+                  ) : result.status === 'FAILED' ? (
+                    <>
+                      <AlertTriangle className="w-4 h-4 text-amber-500" />
+                      تعذر إنشاء الملخص، تم إرسال الملاحظات كما هي
+                    </>
+                  ) : (
+                    <>
+                      <CheckCircle2 className="w-4 h-4 text-emerald-500" />
+                      تم إنشاء التقرير بنجاح
+                    </>
+                  )}
                 </CardTitle>
                 <div className="flex items-center gap-1">
                   <button